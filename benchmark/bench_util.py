@@ -0,0 +1,27 @@
+import pathlib
+import typing
+from stefansearch.engine.metrics import percentile
+from stefansearch.engine.search_engine import SearchEngine
+"""Helpers shared by the benchmarks."""
+
+
+# Path to the root "TestData" folder. Assumes benchmarks are run from the
+# project root
+TESTDATA_PATH = pathlib.Path('test') / 'TestData'
+
+
+def record_latencies(benchmark, timings: typing.Sequence[float]):
+    """Record the p50/p95/p99 of `timings` (in seconds) in the benchmark's `extra_info`."""
+    for percent in (50, 95, 99):
+        benchmark.extra_info['p{}'.format(percent)] = percentile(timings, percent)
+
+
+def index_sonnets(engine: SearchEngine):
+    for sonnet_path in (TESTDATA_PATH / 'Sonnets').glob('*'):
+        engine.index_file(sonnet_path, 'SONNET-{}'.format(sonnet_path.stem))
+
+
+def index_plays(engine: SearchEngine):
+    for play_path in (TESTDATA_PATH / 'Plays').rglob('*'):
+        if play_path.is_file():
+            engine.index_file(play_path, str(play_path.absolute()), encoding='utf-8')
@@ -0,0 +1,86 @@
+import itertools
+import math
+import random
+import typing
+"""
+Deterministic generator of synthetic corpora for scaling benchmarks.
+
+Words are drawn from a Zipfian distribution over a synthetic vocabulary,
+and document lengths from a log-normal distribution. The same parameters
+and seed always produce the same documents, and a smaller corpus is
+always a prefix of a larger one.
+"""
+
+
+# Words are built from these syllables, so that they survive tokenizing
+SYLLABLES = [consonant + vowel for consonant in 'bdfgklmnprstvz' for vowel in 'aeiou']
+
+
+def make_word(rank: int) -> str:
+    """Return the (unique) word of the given rank in the vocabulary."""
+    syllables = []
+    rank += 1
+    while rank:
+        rank, index = divmod(rank - 1, len(SYLLABLES))
+        syllables.append(SYLLABLES[index])
+    return ''.join(reversed(syllables))
+
+
+class ZipfCorpus:
+    """
+    Generates documents whose words follow Zipf's law: the word of rank `r`
+    (starting at 1) occurs with probability proportional to `1 / r^exponent`.
+
+    Document lengths follow a log-normal distribution with mean
+    `mean_doc_length` words. `doc_length_sigma` controls the spread (0
+    makes every document the same length).
+    """
+    def __init__(
+            self,
+            vocab_size: int = 100_000,
+            exponent: float = 1.0,
+            mean_doc_length: int = 300,
+            doc_length_sigma: float = 1.0,
+            seed: int = 0,
+    ):
+        self.vocab_size = vocab_size
+        self.exponent = exponent
+        self.mean_doc_length = mean_doc_length
+        self.doc_length_sigma = doc_length_sigma
+        self.seed = seed
+        self.words = [make_word(rank) for rank in range(vocab_size)]
+        self._cum_weights = list(itertools.accumulate(
+            1 / (rank ** exponent) for rank in range(1, vocab_size + 1)
+        ))
+        # Choose mu such that the mean of the distribution is `mean_doc_length`
+        self._length_mu = math.log(mean_doc_length) - doc_length_sigma ** 2 / 2
+
+    def sample_words(self, rng: random.Random, num_words: int) -> typing.List[str]:
+        return rng.choices(self.words, cum_weights=self._cum_weights, k=num_words)
+
+    def sample_doc_length(self, rng: random.Random) -> int:
+        return max(1, round(rng.lognormvariate(self._length_mu, self.doc_length_sigma)))
+
+    def documents(self, num_docs: int) -> typing.Iterator[typing.Tuple[str, str]]:
+        """Generate `num_docs` `(slug, text)` pairs."""
+        rng = random.Random(self.seed)
+        for doc_index in range(num_docs):
+            words = self.sample_words(rng, self.sample_doc_length(rng))
+            yield 'doc-{:08d}'.format(doc_index), ' '.join(words)
+
+    def queries(
+            self,
+            num_queries: int,
+            min_terms: int = 1,
+            max_terms: int = 4,
+    ) -> typing.List[str]:
+        """
+        Generate `num_queries` queries of `min_terms` to `max_terms` words,
+        drawn from the same distribution as the documents.
+        """
+        # Use a different stream than `documents()`
+        rng = random.Random(-1 - self.seed)
+        return [
+            ' '.join(self.sample_words(rng, rng.randint(min_terms, max_terms)))
+            for _ in range(num_queries)
+        ]
@@ -0,0 +1,125 @@
+import gc
+import json
+import pathlib
+import tempfile
+import time
+import tracemalloc
+import typing
+import click
+from stefansearch.engine.metrics import percentile
+from stefansearch.engine.search_engine import SearchEngine
+from corpus_generator import ZipfCorpus
+"""
+Scaling benchmark over synthetic Zipfian corpora.
+
+Indexes corpora that grow by powers of ten and reports, for each size:
+- `docs_per_sec`, `postings_per_sec`: indexing throughput
+- `commit_secs`, `index_bytes`: time to commit and size of the index file
+- `open_secs`: time to open the committed index
+- `open_peak_bytes`, `resident_bytes`: peak and retained memory (traced
+  with tracemalloc) while opening the index
+- `search_p50` etc.: query latency in seconds
+- `remove_p50` etc.: `remove_document()` latency in seconds
+
+Runs fully offline. From the project root (with `stefansearch` importable):
+    PYTHONPATH=. python benchmark/scaling.py --max-docs 100000 --json scaling.json
+"""
+
+
+def measure(
+        corpus: ZipfCorpus,
+        num_docs: int,
+        directory: pathlib.Path,
+        num_queries: int = 200,
+        num_removals: int = 100,
+) -> typing.Dict[str, float]:
+    """Index the first `num_docs` documents of `corpus` in `directory` and measure the engine."""
+    results: typing.Dict[str, float] = {'num_docs': num_docs}
+    index_path = directory / 'index-{}.json'.format(num_docs)
+    engine = SearchEngine(index_path)
+
+    elapsed = 0.0
+    for slug, text in corpus.documents(num_docs):
+        start = time.perf_counter()
+        engine.index_string(text, slug)
+        elapsed += time.perf_counter() - start
+    results['num_postings'] = engine.num_terms
+    results['index_secs'] = elapsed
+    results['docs_per_sec'] = num_docs / elapsed
+    results['postings_per_sec'] = engine.num_terms / elapsed
+
+    start = time.perf_counter()
+    engine.commit()
+    results['commit_secs'] = time.perf_counter() - start
+    results['index_bytes'] = index_path.stat().st_size
+    del engine
+
+    gc.collect()
+    start = time.perf_counter()
+    SearchEngine(index_path)
+    results['open_secs'] = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        engine = SearchEngine(index_path)
+        results['resident_bytes'], results['open_peak_bytes'] = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for query in corpus.queries(num_queries):
+        start = time.perf_counter()
+        engine.search(query)
+        timings.append(time.perf_counter() - start)
+    for percent in (50, 95, 99):
+        results['search_p{}'.format(percent)] = percentile(timings, percent)
+
+    timings = []
+    step = max(1, num_docs // num_removals)
+    for doc_index in range(0, num_docs, step):
+        start = time.perf_counter()
+        engine.remove_document('doc-{:08d}'.format(doc_index))
+        timings.append(time.perf_counter() - start)
+    for percent in (50, 95, 99):
+        results['remove_p{}'.format(percent)] = percentile(timings, percent)
+    return results
+
+
+@click.command()
+@click.option('--min-docs', default=100, show_default=True, help='Number of documents of the smallest corpus')
+@click.option('--max-docs', default=100_000, show_default=True, help='Maximum number of documents')
+@click.option('--vocab-size', default=100_000, show_default=True)
+@click.option('--exponent', default=1.0, show_default=True, help='Exponent of the Zipf distribution')
+@click.option('--mean-length', default=300, show_default=True, help='Mean number of words per document')
+@click.option('--length-sigma', default=1.0, show_default=True, help='Sigma of the log-normal document length')
+@click.option('--seed', default=0, show_default=True)
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False, path_type=pathlib.Path),
+              help='Also write the results to this JSON file')
+def run_scaling(
+        min_docs: int,
+        max_docs: int,
+        vocab_size: int,
+        exponent: float,
+        mean_length: int,
+        length_sigma: float,
+        seed: int,
+        json_path: typing.Optional[pathlib.Path],
+):
+    """Measure the engine on synthetic corpora growing by powers of ten."""
+    corpus = ZipfCorpus(vocab_size, exponent, mean_length, length_sigma, seed)
+    all_results = []
+    num_docs = min_docs
+    with tempfile.TemporaryDirectory() as directory:
+        while num_docs <= max_docs:
+            results = measure(corpus, num_docs, pathlib.Path(directory))
+            click.echo(json.dumps(results))
+            all_results.append(results)
+            num_docs *= 10
+    if json_path:
+        with open(json_path, 'w') as out:
+            json.dump(all_results, out, indent=2)
+
+
+if __name__ == '__main__':
+    run_scaling()
@@ -0,0 +1,14 @@
+import pytest
+from stefansearch.engine.search_engine import SearchEngine
+from test_tokenizer_benchmarks import make_text
+"""Benchmarks for text analysis (tokenizing, stopping and stemming)."""
+
+
+TEXT = make_text(1_000_000)
+
+
+@pytest.mark.parametrize('cache_size', [0, 65536], ids=['uncached', 'cached'])
+def test_process_text(benchmark, tmp_path, cache_size: int):
+    engine = SearchEngine(tmp_path / 'index.json', analysis_cache_size=cache_size)
+    benchmark.pedantic(lambda: sum(1 for _ in engine._process_text(TEXT)), rounds=5)
+    benchmark.extra_info['chars_per_sec'] = len(TEXT) / benchmark.stats.stats.mean
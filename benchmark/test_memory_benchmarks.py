@@ -0,0 +1,134 @@
+import gc
+import pathlib
+import tracemalloc
+import typing
+import pytest
+from stefansearch.engine.front_coding import StringTable
+from stefansearch.engine.inverted_list import InvertedList
+from stefansearch.engine.search_engine import SearchEngine
+from stefansearch.engine.term_dictionary import TermDictionary
+from corpus_generator import ZipfCorpus
+"""
+Memory benchmarks for the in-memory index representation.
+
+The size of the postings built from the Plays is recorded under
+`extra_info['index_bytes']` and `extra_info['bytes_per_posting']`. The
+size of the vocabulary and the (absolute path) slugs of the Plays is
+recorded under `extra_info['string_bytes']`.
+
+The size of the engine's index for each representation of the
+InvertedLists, built from a synthetic corpus, is recorded under
+`extra_info['bytes_per_posting']` and `extra_info['components']` (see
+`SearchEngine.memory_report()`).
+"""
+# TODO: THERE IS SOME CODE REUSE WITH THE `test` FOLDER.
+# Path to the root "TestData" folder.
+TESTDATA_PATH = pathlib.Path('test') / 'TestData'
+
+
+class LegacyPostingList:
+    """The object-per-document PostingList that InvertedList used to store."""
+    def __init__(self, doc_id: int, postings: typing.List[int]):
+        self.doc_id = doc_id
+        self.postings = postings
+
+
+def build_legacy_index(docs: typing.List[typing.List[str]]) -> typing.Dict[str, typing.List[LegacyPostingList]]:
+    index = {}
+    for doc_id, terms in enumerate(docs, start=1):
+        for position, term in enumerate(terms):
+            posting_lists = index.setdefault(term, [])
+            if posting_lists and posting_lists[-1].doc_id == doc_id:
+                posting_lists[-1].postings.append(position)
+            else:
+                posting_lists.append(LegacyPostingList(doc_id, [position]))
+    return index
+
+
+def build_compact_index(docs: typing.List[typing.List[str]]) -> typing.List[InvertedList]:
+    term_dict = TermDictionary()
+    index = []
+    for doc_id, terms in enumerate(docs, start=1):
+        for position, term in enumerate(terms):
+            term_id = term_dict.add(term)
+            if term_id == len(index):
+                index.append(InvertedList(term_id))
+            index[term_id].add_posting(doc_id, position)
+    return index
+
+
+def traced_size(build: typing.Callable[[], typing.Any]) -> int:
+    """Return the number of bytes that remain allocated by the object `build()` returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        built = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return size
+
+
+def build_string_dict(strings: typing.List[str]) -> typing.Dict[str, int]:
+    return {string: string_id for string_id, string in enumerate(strings)}
+
+
+def build_string_table(strings: typing.List[str]) -> StringTable:
+    table = StringTable()
+    for string_id, string in enumerate(strings):
+        table.add(string, string_id)
+    table.freeze()
+    return table
+
+
+@pytest.fixture(scope='module')
+def plays_terms(tmp_path_factory) -> typing.List[typing.List[str]]:
+    """The processed terms of every play scene, in indexing order."""
+    engine = SearchEngine(tmp_path_factory.mktemp('memory') / 'index.json')
+    docs = []
+    for play_path in (TESTDATA_PATH / 'Plays').rglob('*'):
+        if play_path.is_file():
+            docs.append(list(engine._process_text(play_path.read_text(encoding='utf-8'))))
+    return docs
+
+
+@pytest.mark.parametrize('build', [build_legacy_index, build_compact_index], ids=['legacy', 'compact'])
+def test_index_memory(benchmark, plays_terms, build):
+    size = benchmark.pedantic(traced_size, args=(lambda: build(plays_terms),), rounds=1)
+    num_postings = sum(len(terms) for terms in plays_terms)
+    benchmark.extra_info['index_bytes'] = size
+    benchmark.extra_info['bytes_per_posting'] = size / num_postings
+
+
+@pytest.mark.parametrize('build', [build_string_dict, build_string_table], ids=['dict', 'front_coded'])
+def test_string_memory(benchmark, plays_terms, build):
+    strings = sorted({term for terms in plays_terms for term in terms})
+    strings += [str(path.absolute()) for path in (TESTDATA_PATH / 'Plays').rglob('*') if path.is_file()]
+    # Decode the strings inside `build` so that their memory is traced
+    encoded = [string.encode('utf8') for string in strings]
+    size = benchmark.pedantic(traced_size, args=(lambda: build([e.decode('utf8') for e in encoded]),), rounds=1)
+    benchmark.extra_info['string_bytes'] = size
+
+
+# Keyword arguments of the SearchEngine for each representation of the InvertedLists
+REPRESENTATIONS = {
+    'sparse': {},
+    'dense': {'dense_threshold': 0.05},
+    'offsets': {'store_offsets': True},
+    'freqs': {'granularity': 'freqs'},
+    'docs': {'granularity': 'docs'},
+}
+
+
+@pytest.mark.parametrize('representation', list(REPRESENTATIONS))
+def test_engine_memory(benchmark, tmp_path, representation: str):
+    engine = SearchEngine(tmp_path / 'index.json', **REPRESENTATIONS[representation])
+    for slug, text in ZipfCorpus(vocab_size=20_000, mean_doc_length=200).documents(2000):
+        engine.index_string(text, slug)
+    # Dense InvertedLists are created on commit
+    engine.commit()
+    report = benchmark.pedantic(engine.memory_report, rounds=1)
+    benchmark.extra_info['bytes_per_posting'] = report.bytes_per_posting
+    benchmark.extra_info['components'] = report.components
+    benchmark.extra_info['index_bytes'] = engine.filepath.stat().st_size
@@ -0,0 +1,101 @@
+import itertools
+import pathlib
+import typing
+import pytest
+from stefansearch.engine.search_engine import SearchEngine
+from stefansearch.scoring.bm25 import Bm25Scorer
+from stefansearch.scoring.ql import QlScorer
+from stefansearch.scoring.reranker import MinimalSpanReranker
+from bench_util import index_plays, index_sonnets, record_latencies
+"""
+Query latency benchmarks over the Sonnets and Plays.
+
+Every round of a search benchmark runs a single query, cycling through the
+queries of its kind, so the round times form the latency distribution.
+Its p50/p95/p99 (in seconds) are recorded under `extra_info`.
+
+Save the results with `--benchmark-autosave` (or `--benchmark-json=PATH`)
+and compare runs with `--benchmark-compare`.
+"""
+
+
+CORPORA = {'sonnets': index_sonnets, 'plays': index_plays}
+SCORERS = {'ql': QlScorer, 'bm25': Bm25Scorer}
+SHORT_QUERIES = ['love', 'sweet death', 'king', 'gentle night']
+LONG_QUERIES = [
+    'Shall I compare thee to a summer\'s day? Thou art more lovely and more temperate',
+    'O Romeo, Romeo, wherefore art thou Romeo? Deny thy father and refuse thy name',
+    'Now is the winter of our discontent made glorious summer by this sun of York',
+    'When in disgrace with fortune and men\'s eyes I all alone beweep my outcast state',
+]
+# Number of rare and common terms to query
+NUM_SELECTED_TERMS = 20
+ROUNDS = 200
+
+
+@pytest.fixture(scope='module', params=list(CORPORA))
+def index_path(request, tmp_path_factory) -> pathlib.Path:
+    """Path to a committed index of each corpus."""
+    path = tmp_path_factory.mktemp(request.param) / 'index.json'
+    engine = SearchEngine(path)
+    CORPORA[request.param](engine)
+    engine.commit()
+    return path
+
+
+def select_terms(engine: SearchEngine, rare: bool) -> typing.List[str]:
+    """
+    Select the `NUM_SELECTED_TERMS` terms that occur in the fewest (or most)
+    documents. Only terms that are unchanged by analysis are used, so that
+    querying a term looks up that same term.
+    """
+    terms = []
+    for inverted_list in engine._index:
+        if inverted_list is None:
+            continue
+        term = engine._term_dict.get_term(inverted_list.term_id)
+        if engine._analyze_token(term) == term:
+            terms.append((inverted_list.num_docs, term))
+    terms.sort(reverse=not rare)
+    return [term for _, term in terms[:NUM_SELECTED_TERMS]]
+
+
+@pytest.mark.parametrize('scorer', list(SCORERS))
+@pytest.mark.parametrize('kind', ['short', 'long', 'rare', 'common'])
+def test_search_latency(benchmark, index_path, scorer: str, kind: str):
+    engine = SearchEngine(index_path, scorer=SCORERS[scorer]())
+    if kind == 'short':
+        queries = SHORT_QUERIES
+    elif kind == 'long':
+        queries = LONG_QUERIES
+    else:
+        queries = select_terms(engine, rare=kind == 'rare')
+    cycle = itertools.cycle(queries)
+    benchmark.pedantic(engine.search, setup=lambda: ((next(cycle),), {}), rounds=ROUNDS, warmup_rounds=len(queries))
+    record_latencies(benchmark, benchmark.stats.stats.data)
+
+
+@pytest.mark.parametrize('rerank_depth', [10, 100])
+def test_rerank_latency(benchmark, index_path, rerank_depth: int):
+    engine = SearchEngine(index_path, scorer=Bm25Scorer(), reranker=MinimalSpanReranker(), rerank_depth=rerank_depth)
+    cycle = itertools.cycle(LONG_QUERIES)
+    benchmark.pedantic(engine.search, setup=lambda: ((next(cycle),), {}), rounds=ROUNDS, warmup_rounds=len(LONG_QUERIES))
+    record_latencies(benchmark, benchmark.stats.stats.data)
+
+
+def test_suggest_latency(benchmark, index_path):
+    engine = SearchEngine(index_path, completion_size=10)
+    prefixes = [term[:length] for term in select_terms(engine, rare=False) for length in (1, 2, 3)]
+    cycle = itertools.cycle(prefixes)
+    benchmark.pedantic(engine.suggest, setup=lambda: ((next(cycle),), {}), rounds=ROUNDS, warmup_rounds=len(prefixes))
+    record_latencies(benchmark, benchmark.stats.stats.data)
+
+
+def test_open(benchmark, index_path):
+    benchmark.pedantic(SearchEngine, args=(index_path,), rounds=10)
+    benchmark.extra_info['index_bytes'] = index_path.stat().st_size
+
+
+def test_commit(benchmark, index_path):
+    engine = SearchEngine(index_path)
+    benchmark.pedantic(engine.commit, rounds=10)
@@ -0,0 +1,76 @@
+import itertools
+import time
+import pytest
+from stefansearch.engine.dense_inverted_list import DenseInvertedList
+from stefansearch.engine.inverted_list import InvertedList
+from stefansearch.engine.search_engine import SearchEngine
+from bench_util import record_latencies
+from corpus_generator import ZipfCorpus
+from scaling import measure
+"""
+Scaling benchmarks over small synthetic corpora. Use `scaling.py` for
+larger ones.
+
+The measurements of `scaling.measure()` are recorded under `extra_info`.
+"""
+
+
+@pytest.fixture(scope='module')
+def corpus() -> ZipfCorpus:
+    return ZipfCorpus(vocab_size=20_000, mean_doc_length=100)
+
+
+def test_corpus_is_deterministic(corpus):
+    docs = list(corpus.documents(100))
+    assert list(ZipfCorpus(vocab_size=20_000, mean_doc_length=100).documents(10)) == docs[:10]
+    assert corpus.queries(10) == corpus.queries(10)
+
+
+@pytest.mark.parametrize('num_docs', [100, 1000, 10_000])
+def test_scaling(benchmark, tmp_path, corpus, num_docs: int):
+    results = benchmark.pedantic(measure, args=(corpus, num_docs, tmp_path), rounds=1)
+    benchmark.extra_info.update(results)
+
+
+@pytest.mark.parametrize('num_terms', [1, 4, 16, 64])
+def test_query_length(benchmark, tmp_path, corpus, num_terms: int):
+    """Search latency by number of query terms, over 2000 documents."""
+    engine = SearchEngine(tmp_path / 'index.json')
+    for slug, text in corpus.documents(2000):
+        engine.index_string(text, slug)
+    cycle = itertools.cycle(corpus.queries(20, num_terms, num_terms))
+    benchmark.pedantic(engine.search, setup=lambda: ((next(cycle),), {}), rounds=50, warmup_rounds=5)
+    record_latencies(benchmark, benchmark.stats.stats.data)
+
+
+def iterate_dense(num_docs: int) -> float:
+    """Seconds taken to move a cursor over a dense list containing every other document."""
+    inverted_list = InvertedList(0)
+    for doc_id in range(0, num_docs, 2):
+        inverted_list.add_posting(doc_id, 0)
+    dense = DenseInvertedList.from_inverted_list(inverted_list)
+    start = time.perf_counter()
+    while not dense.is_finished():
+        dense.move_to_next()
+    return time.perf_counter() - start
+
+
+@pytest.mark.parametrize('num_docs', [80_000, 320_000])
+def test_dense_cursor(benchmark, num_docs: int):
+    benchmark.pedantic(iterate_dense, args=(num_docs,), rounds=3)
+
+
+def test_dense_cursor_is_linear():
+    # 4x the documents should take about 4x as long (16x if quadratic)
+    small = min(iterate_dense(80_000) for _ in range(3))
+    large = min(iterate_dense(320_000) for _ in range(3))
+    assert large / small < 8
+
+
+@pytest.mark.parametrize('num_docs', [20_000, 80_000])
+def test_filtered_search(benchmark, tmp_path, num_docs: int):
+    """A filter that half of the documents pass, over a term that all of them contain."""
+    engine = SearchEngine(tmp_path / 'index.json')
+    for doc_id in range(num_docs):
+        engine.index_string('APPLE BANANA', str(doc_id), metadata={'half': doc_id % 2})
+    benchmark.pedantic(engine.search, args=('APPLE',), kwargs={'filter': {'half': 1}}, rounds=3)
@@ -0,0 +1,72 @@
+import random
+import typing
+import pytest
+from stefansearch.tokenizing.tokenizer import Tokenizer
+from stefansearch.tokenizing.alphanumeric_tokenizer import AlphanumericTokenizer
+from stefansearch.tokenizing.unicode_tokenizer import UnicodeTokenizer
+"""
+Microbenchmarks for the tokenizers.
+
+Each benchmark records its throughput in characters per second under
+`extra_info['chars_per_sec']`.
+"""
+
+
+class LoopTokenizer(Tokenizer):
+    """The original character-by-character `AlphanumericTokenizer`, for comparison."""
+    def __init__(self, lowercase: bool = False):
+        self._make_lower = lowercase
+
+    def tokenize_string(self, string: str) -> typing.Generator[str, None, None]:
+        in_token = False
+        token_start = None
+        for i, char in enumerate(string):
+            is_tokenizable = self._is_tokenizable(char)
+            if is_tokenizable and not in_token:
+                in_token = True
+                token_start = i
+            elif in_token and not is_tokenizable:
+                in_token = False
+                yield string[token_start:i].lower() if self._make_lower else string[token_start:i]
+        if in_token:
+            yield string[token_start:len(string)].lower() if self._make_lower else string[token_start:len(string)]
+
+    @staticmethod
+    def _is_tokenizable(char: str) -> bool:
+        if len(char) != 1:
+            raise ValueError('`char` must have length one')
+        return (
+            'a' <= char <= 'z' or
+            'A' <= char <= 'Z' or
+            '0' <= char <= '9'
+        )
+
+
+def make_text(num_chars: int) -> str:
+    """Generate roughly `num_chars` characters of English-like text."""
+    rng = random.Random(4472)
+    words = [
+        'the', 'and', 'I', 'to', 'of', 'a', 'my', 'you', 'that', 'in', 'thou',
+        'Romeo', 'wherefore', 'art', 'summer’s', 'day', 'compare', 'thee', 'O',
+    ]
+    parts = []
+    length = 0
+    while length < num_chars:
+        word = rng.choice(words) + rng.choice([' ', ' ', ' ', ', ', '.\n', '? ', '; '])
+        parts.append(word)
+        length += len(word)
+    return ''.join(parts)
+
+
+TEXT = make_text(1_000_000)
+
+
+@pytest.mark.parametrize('tokenizer', [
+    LoopTokenizer(),
+    AlphanumericTokenizer(),
+    AlphanumericTokenizer(lowercase=True),
+    UnicodeTokenizer(),
+], ids=['loop', 'alphanumeric', 'alphanumeric-lowercase', 'unicode'])
+def test_tokenize(benchmark, tokenizer: Tokenizer):
+    benchmark.pedantic(lambda: sum(1 for _ in tokenizer.tokenize_string(TEXT)), rounds=5)
+    benchmark.extra_info['chars_per_sec'] = len(TEXT) / benchmark.stats.stats.mean
@@ -10,6 +10,10 @@ setuptools.setup(
     author='Stefan Kussmaul',
     author_email='',
     platforms=['any'],
-    packages=[],
-    python_requires='>=3.6',
+    packages=setuptools.find_packages(include=['stefansearch', 'stefansearch.*']),
+    python_requires='>=3.7',
+    install_requires=['click>=8.0'],
+    entry_points={
+        'console_scripts': ['stefansearch=stefansearch.cli:main'],
+    },
 )
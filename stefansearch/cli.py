@@ -0,0 +1,246 @@
+"""
+The `stefansearch` command-line tool.
+
+Run `stefansearch --help` (or `python -m stefansearch.cli --help`) for the
+list of commands.
+"""
+import cProfile
+import json
+import pathlib
+import pstats
+import shutil
+import sys
+import time
+import typing
+import click
+from stefansearch.engine.inverted_list import GRANULARITIES
+from stefansearch.engine.metrics import percentile
+from stefansearch.engine.search_engine import SearchEngine, SearchResults
+from stefansearch.scoring.bm25 import Bm25Scorer
+from stefansearch.scoring.ql import QlScorer
+from stefansearch.server import run_server
+
+
+SCORERS = {'ql': QlScorer, 'bm25': Bm25Scorer}
+INDEX_PATH = click.Path(dir_okay=False, path_type=pathlib.Path)
+EXISTING_INDEX_PATH = click.Path(exists=True, dir_okay=False, path_type=pathlib.Path)
+scorer_option = click.option(
+    '--scorer', type=click.Choice(list(SCORERS)), default='ql', show_default=True, help='Scoring function',
+)
+
+
+def load_engine(index_path: pathlib.Path, **kwargs) -> SearchEngine:
+    """`SearchEngine(index_path, **kwargs)`, reporting invalid or corrupt indexes as a ClickException."""
+    try:
+        return SearchEngine(index_path, **kwargs)
+    except ValueError as e:
+        raise click.ClickException(f'{index_path}: {e}')
+
+
+def open_engine(index_path: pathlib.Path, scorer: str) -> SearchEngine:
+    """Open the index at `index_path` for searching with the named scorer."""
+    engine = load_engine(index_path, scorer=SCORERS[scorer]())
+    if engine.granularity == 'docs' and SCORERS[scorer].needs_term_freqs:
+        raise click.ClickException(
+            f'--scorer {scorer} requires term frequencies, but the index was created with granularity "docs"'
+        )
+    return engine
+
+
+def search(engine: SearchEngine, query_string: str) -> SearchResults:
+    """`engine.search()`, reporting invalid queries as a ClickException."""
+    try:
+        return engine.search(query_string)
+    except ValueError as e:
+        raise click.ClickException(f'{query_string!r}: {e}')
+
+
+def read_queries(queries_file: typing.TextIO) -> typing.List[str]:
+    """Read one query per line, skipping blank lines."""
+    return [line.strip() for line in queries_file if line.strip()]
+
+
+@click.group()
+def main():
+    """Build, query and inspect stefansearch indexes."""
+
+
+@main.command()
+@click.argument('index_path', type=INDEX_PATH)
+@click.argument('directories', nargs=-1, required=True, type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path))
+@click.option('--pattern', default='*', show_default=True, help='Glob of the files to index, matched recursively')
+@click.option('--encoding', default='utf8', show_default=True)
+@click.option('--workers', type=int, default=None, help='Number of threads that hash files [default: CPU-based]')
+@click.option('--granularity', type=click.Choice(GRANULARITIES), default=None, help='For new indexes [default: positions]')
+@click.option('--store-offsets', is_flag=True, help='Store character offsets and text, for highlighting')
+@click.option('--completion-size', type=int, default=None,
+              help='Number of completions stored per prefix, 0 to disable [default: unchanged, or 0 for new indexes]')
+def index(
+        index_path: pathlib.Path,
+        directories: typing.Tuple[pathlib.Path, ...],
+        pattern: str,
+        encoding: str,
+        workers: typing.Optional[int],
+        granularity: typing.Optional[str],
+        store_offsets: bool,
+        completion_size: typing.Optional[int],
+):
+    """
+    Synchronize the index at INDEX_PATH with the files in DIRECTORIES, then
+    commit it. Documents are keyed by absolute path. New files are indexed,
+    changed files are re-indexed and deleted files are removed; unchanged
+    files are skipped, so re-running is cheap. Files that aren't valid
+    ENCODING are reported and left out.
+    """
+    engine = load_engine(
+        index_path, granularity=granularity, store_offsets=store_offsets, completion_size=completion_size,
+    )
+    for directory in directories:
+        start = time.perf_counter()
+        try:
+            report = engine.index_directory(directory, pattern, encoding=encoding, hash_workers=workers)
+        except (ValueError, LookupError) as e:
+            raise click.ClickException(f'{directory}: {e}')
+        for slug in report.skipped:
+            click.echo(f'Skipped {slug}: not valid {encoding}', err=True)
+        click.echo(
+            f'{directory}: {len(report.added)} added, {len(report.updated)} updated, '
+            f'{len(report.removed)} removed, {report.unchanged} unchanged, {len(report.skipped)} skipped '
+            f'({time.perf_counter() - start:.2f}s)'
+        )
+    start = time.perf_counter()
+    engine.commit()
+    click.echo(f'Committed {engine.num_docs} documents to {index_path} ({time.perf_counter() - start:.2f}s)')
+
+
+@main.command()
+@click.argument('index_path', type=EXISTING_INDEX_PATH)
+@click.argument('queries_file', type=click.File(encoding='utf8'), default='-')
+@scorer_option
+@click.option('--top', default=10, show_default=True, help='Number of results to print per query')
+@click.option('--json', 'as_json', is_flag=True, help='Print one JSON object per query')
+def query(index_path: pathlib.Path, queries_file: typing.TextIO, scorer: str, top: int, as_json: bool):
+    """
+    Run the queries in QUERIES_FILE (one per line; default: stdin) against
+    the index at INDEX_PATH, printing the top results and the time taken
+    by each query, followed by latency percentiles.
+    """
+    engine = open_engine(index_path, scorer)
+    latencies = []
+    for query_string in read_queries(queries_file):
+        start = time.perf_counter()
+        results = search(engine, query_string)
+        latency = time.perf_counter() - start
+        latencies.append(latency)
+        if as_json:
+            click.echo(json.dumps({
+                'query': query_string,
+                'ms': latency * 1000,
+                'num_results': len(results),
+                'results': [{'slug': result.slug, 'score': result.score} for result in results[:top]],
+            }))
+        else:
+            click.echo(f'{query_string!r}: {len(results)} results in {latency * 1000:.2f}ms')
+            for result in results[:top]:
+                click.echo(f'  {result.score:10.4f}  {result.slug}')
+    if latencies and not as_json:
+        click.echo(
+            f'{len(latencies)} queries: p50 {percentile(latencies, 50) * 1000:.2f}ms, '
+            f'p95 {percentile(latencies, 95) * 1000:.2f}ms, p99 {percentile(latencies, 99) * 1000:.2f}ms'
+        )
+
+
+@main.command()
+@click.argument('index_path', type=EXISTING_INDEX_PATH)
+@click.option('--top', default=10, show_default=True, help='Number of largest terms to list')
+def stats(index_path: pathlib.Path, top: int):
+    """Print statistics of the index at INDEX_PATH."""
+    start = time.perf_counter()
+    engine = load_engine(index_path)
+    open_secs = time.perf_counter() - start
+    report = engine.memory_report(top)
+    click.echo(f'File:            {index_path} ({index_path.stat().st_size:,} bytes)')
+    click.echo(f'Generation:      {engine.generation}')
+    click.echo(f'Granularity:     {engine.granularity}')
+    click.echo(f'Documents:       {engine.num_docs:,}')
+    click.echo(f'Terms:           {int(engine.metrics.get("stefansearch_vocabulary_size").value):,}')
+    click.echo(f'Postings:        {engine.num_terms:,}')
+    click.echo(f'Open time:       {open_secs:.2f}s')
+    click.echo(f'Memory:          {report.total_bytes:,} bytes ({report.bytes_per_posting:.1f} bytes/posting)')
+    for component, size in report.components.items():
+        click.echo(f'  {component:<15}{size:,}')
+    click.echo('Largest terms:')
+    for term, size in report.top_terms:
+        click.echo(f'  {term:<15}{size:,}')
+
+
+@main.command()
+@click.argument('index_path', type=EXISTING_INDEX_PATH)
+@click.option('--output', type=INDEX_PATH, default=None, help='Write to this path instead of rewriting INDEX_PATH')
+def compact(index_path: pathlib.Path, output: typing.Optional[pathlib.Path]):
+    """
+    Rewrite the index at INDEX_PATH in the current file format, renumbering
+    the documents so that the doc_ids left by removed documents are
+    reclaimed. Also converts index files written by older versions.
+    """
+    if output is not None:
+        shutil.copyfile(index_path, output)
+        index_path = output
+    before = index_path.stat().st_size
+    engine = load_engine(index_path)
+    engine.compact()
+    engine.commit()
+    click.echo(f'{index_path}: {before:,} -> {index_path.stat().st_size:,} bytes')
+
+
+@main.command()
+@click.argument('index_path', type=EXISTING_INDEX_PATH)
+@click.argument('queries_file', type=click.File(encoding='utf8'), default='-')
+@scorer_option
+@click.option('--repeat', default=1, show_default=True, help='Number of times to run the queries')
+@click.option('--sort', default='cumulative', show_default=True, help='pstats sort key')
+@click.option('--limit', default=30, show_default=True, help='Number of functions to print')
+@click.option('--output', type=click.Path(dir_okay=False, path_type=pathlib.Path), default=None,
+              help='Also save the raw profile (e.g. for snakeviz)')
+def profile(
+        index_path: pathlib.Path,
+        queries_file: typing.TextIO,
+        scorer: str,
+        repeat: int,
+        sort: str,
+        limit: int,
+        output: typing.Optional[pathlib.Path],
+):
+    """
+    Profile running the queries in QUERIES_FILE (one per line; default:
+    stdin) against the index at INDEX_PATH with cProfile, and print the
+    most expensive functions. Opening the index is not profiled.
+    """
+    engine = open_engine(index_path, scorer)
+    queries = read_queries(queries_file)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    for _ in range(repeat):
+        for query_string in queries:
+            search(engine, query_string)
+    profiler.disable()
+    click.echo(f'Ran {repeat * len(queries)} queries in {time.perf_counter() - start:.2f}s')
+    if output is not None:
+        profiler.dump_stats(output)
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats(sort).print_stats(limit)
+
+
+@main.command()
+@click.argument('index_path', type=INDEX_PATH)
+@scorer_option
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=8080, show_default=True)
+@click.option('--max-pending', default=64, show_default=True, help='Maximum number of queued engine calls')
+def serve(index_path: pathlib.Path, scorer: str, host: str, port: int, max_pending: int):
+    """Serve the index at INDEX_PATH over HTTP (see `stefansearch.server`)."""
+    run_server(open_engine(index_path, scorer), host, port, max_pending)
+
+
+if __name__ == '__main__':
+    main()
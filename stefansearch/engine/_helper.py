@@ -1,4 +1,5 @@
 import dataclasses as dc
+import typing
 # TODO: BETTER NAME/ORGANIZATION FOR THIS FILE. PROBABLY TEMPORARY
 
 
@@ -18,3 +19,5 @@ class DocInfo:
     """Store some metainformation for an indexed document."""
     slug: str
     num_terms: int
+    # User-provided attributes that can be used to filter searches
+    metadata: typing.Optional[typing.Dict[str, typing.Any]] = None
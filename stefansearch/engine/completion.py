@@ -0,0 +1,98 @@
+import typing
+
+
+class _TrieNode:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children: typing.Dict[str, '_TrieNode'] = {}
+        # Ids of the (at most k) most frequent terms below this node, most frequent first
+        self.top: typing.List[int] = []
+
+
+class CompletionTrie:
+    """
+    Prefix trie over the terms of an index, used for autocompletion.
+
+    Every node stores the ids of the `k` most frequent terms that start
+    with its prefix, so `suggest()` only has to walk down the prefix and
+    takes time proportional to its length, no matter how many terms
+    share it.
+    """
+    def __init__(self, k: int = 10):
+        self.k = k
+        self._root = _TrieNode()
+        self._num_nodes = 1
+
+    @staticmethod
+    def build(
+            terms: typing.Iterable[typing.Tuple[int, str, int]],
+            k: int = 10,
+    ) -> 'CompletionTrie':
+        """Build a trie from (term_id, term, frequency) tuples."""
+        trie = CompletionTrie(k)
+        # Insert the most frequent terms first, so every node's `top` fills
+        # up in rank order and stays sorted. Ties are broken by term.
+        for term_id, term, _ in sorted(terms, key=lambda t: (-t[2], t[1])):
+            trie._insert(term_id, term)
+        return trie
+
+    def _insert(self, term_id: int, term: str):
+        node = self._root
+        if len(node.top) < self.k:
+            node.top.append(term_id)
+        for char in term:
+            child = node.children.get(char)
+            if child is None:
+                child = _TrieNode()
+                node.children[char] = child
+                self._num_nodes += 1
+            node = child
+            if len(node.top) < self.k:
+                node.top.append(term_id)
+
+    def suggest(self, prefix: str, k: int = None) -> typing.List[int]:
+        """
+        Return the ids of the `k` most frequent terms that start with
+        `prefix`, most frequent first. At most `self.k` ids are returned.
+        """
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top[:k] if k is not None else list(node.top)
+
+    def __len__(self) -> int:
+        """Number of nodes."""
+        return self._num_nodes
+
+    def to_json(self):
+        """
+        Serializes to a dict which can be JSON-ified. Nodes are stored as
+        a flat list of [parent_index, char, top] in depth-first order,
+        which avoids nesting as deep as the longest term.
+        """
+        nodes = [[-1, '', self._root.top]]
+        stack = [(0, self._root)]
+        while stack:
+            index, node = stack.pop()
+            for char, child in node.children.items():
+                stack.append((len(nodes), child))
+                nodes.append([index, char, child.top])
+        return {'k': self.k, 'nodes': nodes}
+
+    @staticmethod
+    def from_json(json_data) -> 'CompletionTrie':
+        trie = CompletionTrie(json_data['k'])
+        nodes = []
+        for parent_index, char, top in json_data['nodes']:
+            if parent_index < 0:
+                node = trie._root
+            else:
+                node = _TrieNode()
+                nodes[parent_index].children[char] = node
+            node.top = top
+            nodes.append(node)
+        trie._num_nodes = len(nodes)
+        return trie
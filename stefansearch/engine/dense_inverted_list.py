@@ -0,0 +1,177 @@
+import array
+import typing
+from stefansearch.engine.doc_bitmap import DocBitmap
+from stefansearch.engine.inverted_list import InvertedList
+
+
+class DenseInvertedList:
+    """
+    Dense representation of an InvertedList, used for terms that occur in
+    a large fraction of the documents.
+
+    Stores the set of documents containing the term as a DocBitmap, plus
+    an array of term frequencies indexed by doc_id. Term positions (and
+    character offsets) are *not* kept.
+
+    With `granularity` 'docs', every document counts as a single posting
+    (with a term frequency of 1), like in an `InvertedList` with that
+    granularity. Otherwise it is 'freqs'.
+
+    Implements the same cursor API as `InvertedList`, so the two
+    representations can be used interchangeably during a search. Moving
+    the cursor is a bit operation rather than a scan over PostingLists.
+    """
+    __slots__ = ('term_id', 'granularity', 'doc_bits', 'term_freqs', 'num_docs', 'num_postings', 'curr_doc_id')
+
+    def __init__(
+            self,
+            term_id: int,
+            doc_bits: DocBitmap = None,
+            term_freqs: array.array = None,
+            granularity: str = 'freqs',
+    ):
+        # Id of the term in the TermDictionary
+        self.term_id = term_id
+        self.granularity = granularity
+        self.doc_bits = doc_bits if doc_bits else DocBitmap()
+        # Number of occurrences of the term, indexed by doc_id
+        self.term_freqs = term_freqs if term_freqs else array.array('I')
+        self.num_docs = len(self.doc_bits)
+        self.num_postings = sum(self.term_freqs)
+        self.curr_doc_id = self.doc_bits.next_doc(0)
+
+    @staticmethod
+    def from_inverted_list(inverted_list: InvertedList) -> 'DenseInvertedList':
+        """Convert an InvertedList to the dense representation."""
+        granularity = 'docs' if inverted_list.granularity == 'docs' else 'freqs'
+        dense = DenseInvertedList(inverted_list.term_id, granularity=granularity)
+        # Without frequencies (granularity 'docs'), every document counts once
+        term_freqs = inverted_list.term_freqs if inverted_list.term_freqs is not None else [1] * inverted_list.num_docs
+        for doc_id, term_freq in zip(inverted_list.doc_ids, term_freqs):
+            dense._set_term_freq(doc_id, term_freq)
+            dense.doc_bits.add(doc_id)
+        dense.num_docs = inverted_list.num_docs
+        dense.num_postings = inverted_list.num_postings
+        dense.reset_pointer()
+        return dense
+
+    def to_inverted_list(self) -> InvertedList:
+        """
+        Convert back to an InvertedList. As positions aren't stored here,
+        its granularity is at most 'freqs'.
+        """
+        inverted_list = InvertedList(self.term_id, granularity=self.granularity)
+        inverted_list.doc_ids = array.array('I', self.doc_bits)
+        if self.granularity != 'docs':
+            inverted_list.term_freqs = array.array('I', (self.term_freqs[doc_id] for doc_id in self.doc_bits))
+        inverted_list.num_docs = self.num_docs
+        inverted_list.num_postings = self.num_postings
+        return inverted_list
+
+    def _set_term_freq(self, doc_id: int, term_freq: int):
+        if doc_id >= len(self.term_freqs):
+            self.term_freqs.extend([0] * (doc_id + 1 - len(self.term_freqs)))
+        self.term_freqs[doc_id] = term_freq
+
+    def reset_pointer(self):
+        self.curr_doc_id = self.doc_bits.next_doc(0)
+
+    def add_posting(
+            self,
+            doc_id: int,
+            term_position: int,
+            offset: typing.Tuple[int, int] = None,
+    ):
+        # Note: `term_position` and `offset` are not stored
+        if doc_id not in self.doc_bits:
+            self.doc_bits.add(doc_id)
+            self._set_term_freq(doc_id, 0)
+            self.num_docs += 1
+        elif self.granularity == 'docs':
+            return
+        self.term_freqs[doc_id] += 1
+        self.num_postings += 1
+
+    def remove_document(self, doc_id: int) -> int:
+        """
+        Remove `doc_id` from the list. Returns the number of postings
+        that were removed. Resets the pointer.
+        """
+        if doc_id not in self.doc_bits:
+            return 0
+        num_removed = self.term_freqs[doc_id]
+        self.doc_bits.remove(doc_id)
+        self.term_freqs[doc_id] = 0
+        self.num_docs -= 1
+        self.num_postings -= num_removed
+        self.reset_pointer()
+        return num_removed
+
+    def remap_doc_ids(self, mapping: typing.Dict[int, int]):
+        """Replace every doc_id with `mapping[doc_id]`. Resets the pointer."""
+        term_freqs = [(mapping[doc_id], self.term_freqs[doc_id]) for doc_id in self.doc_bits]
+        self.doc_bits = DocBitmap()
+        self.term_freqs = array.array('I')
+        for doc_id, term_freq in term_freqs:
+            self.doc_bits.add(doc_id)
+            self._set_term_freq(doc_id, term_freq)
+        self.reset_pointer()
+
+    def doc_bitmap(self) -> DocBitmap:
+        """Return the DocBitmap of documents that contain this term."""
+        return self.doc_bits
+
+    def is_finished(self) -> bool:
+        return self.curr_doc_id is None
+
+    def get_curr_doc_id(self) -> int:
+        return self.curr_doc_id
+
+    def has_document(self, doc_id: int) -> bool:
+        return doc_id in self.doc_bits
+
+    def get_posting_list(self, doc_id: int) -> None:
+        # Positions are not stored in the dense representation
+        return None
+
+    def move_to(self, doc_id):
+        if self.curr_doc_id is not None and self.curr_doc_id < doc_id:
+            self.curr_doc_id = self.doc_bits.next_doc(doc_id)
+        return self.curr_doc_id == doc_id
+
+    def move_to_next(self):
+        if self.curr_doc_id is not None:
+            self.curr_doc_id = self.doc_bits.next_doc(self.curr_doc_id + 1)
+        return self.curr_doc_id is not None
+
+    def move_past(self, doc_id):
+        self.move_to(doc_id + 1)
+
+    def get_term_freq(self):
+        return self.term_freqs[self.curr_doc_id] if self.curr_doc_id is not None else 0
+
+    def __repr__(self):
+        return '{} (dense): {} docs, curr_id {}'.format(self.term_id, self.num_docs, self.curr_doc_id)
+
+    def to_json(self):
+        """Serializes to a dict which can be JSON-ified"""
+        serialized = {
+            'term_id': self.term_id,
+            'doc_bits': self.doc_bits.to_json(),
+        }
+        if self.granularity != 'docs':
+            # Only store frequencies of the documents in `doc_bits`, in order
+            serialized['term_freqs'] = [self.term_freqs[doc_id] for doc_id in self.doc_bits]
+        return serialized
+
+    @staticmethod
+    def from_json(json_data) -> 'DenseInvertedList':
+        granularity = 'freqs' if 'term_freqs' in json_data else 'docs'
+        dense = DenseInvertedList(
+            json_data['term_id'], DocBitmap.from_json(json_data['doc_bits']), granularity=granularity,
+        )
+        term_freqs = json_data['term_freqs'] if granularity == 'freqs' else [1] * dense.num_docs
+        for doc_id, term_freq in zip(dense.doc_bits, term_freqs):
+            dense._set_term_freq(doc_id, term_freq)
+        dense.num_postings = sum(dense.term_freqs)
+        return dense
@@ -0,0 +1,58 @@
+import concurrent.futures
+import dataclasses as dc
+import hashlib
+import pathlib
+import typing
+
+
+@dc.dataclass
+class FileRecord:
+    """What was indexed from a file by `SearchEngine.index_directory()`."""
+    path: str
+    # The directory that was synced
+    root: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+    def to_json(self):
+        """Serializes to a dict which can be JSON-ified"""
+        return dc.asdict(self)
+
+    @staticmethod
+    def from_json(json_data) -> 'FileRecord':
+        return FileRecord(**json_data)
+
+
+@dc.dataclass
+class SyncReport:
+    """The changes made by `SearchEngine.index_directory()`, by slug."""
+    added: typing.List[str] = dc.field(default_factory=list)
+    updated: typing.List[str] = dc.field(default_factory=list)
+    removed: typing.List[str] = dc.field(default_factory=list)
+    # Files that couldn't be decoded
+    skipped: typing.List[str] = dc.field(default_factory=list)
+    # Number of files that didn't change
+    unchanged: int = 0
+    # Number of files whose content was hashed
+    hashed: int = 0
+
+
+def hash_file(path: pathlib.Path, chunk_size: int = 1 << 20) -> str:
+    """Return the hex SHA-256 of the file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_files(paths: typing.List[pathlib.Path], max_workers: int = None) -> typing.List[str]:
+    """
+    Hash the files in parallel threads (hashlib releases the GIL while
+    hashing). Returns the hashes in the order of `paths`.
+    """
+    if len(paths) <= 1:
+        return [hash_file(path) for path in paths]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(hash_file, paths))
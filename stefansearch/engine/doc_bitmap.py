@@ -0,0 +1,119 @@
+import array
+import sys
+import typing
+
+
+# Number of doc_ids per word of a DocBitmap
+WORD_BITS = 64
+_WORD_MASK = (1 << WORD_BITS) - 1
+
+
+class DocBitmap:
+    """
+    A set of doc_ids stored as a bitmap.
+
+    The bitmap is stored as an array of 64-bit words, so adding, removing
+    and testing a doc_id only touch a single word, and `next_doc()` scans
+    forward from the word of its argument. (A single Python int would have
+    to be shifted as a whole, making a cursor over it quadratic.) Set
+    operations (`&`, `|`, `-`) are word-by-word bit operations.
+    """
+    __slots__ = ('_words',)
+
+    def __init__(self, words: array.array = None):
+        self._words = words if words is not None else array.array('Q')
+
+    @staticmethod
+    def from_doc_ids(doc_ids: typing.Iterable[int]) -> 'DocBitmap':
+        bitmap = DocBitmap()
+        for doc_id in doc_ids:
+            bitmap.add(doc_id)
+        return bitmap
+
+    def add(self, doc_id: int):
+        word_index = doc_id // WORD_BITS
+        if word_index >= len(self._words):
+            self._words.extend([0] * (word_index + 1 - len(self._words)))
+        self._words[word_index] |= 1 << (doc_id % WORD_BITS)
+
+    def remove(self, doc_id: int):
+        word_index = doc_id // WORD_BITS
+        if word_index < len(self._words):
+            self._words[word_index] &= _WORD_MASK ^ (1 << (doc_id % WORD_BITS))
+
+    def next_doc(self, doc_id: int) -> typing.Optional[int]:
+        """Return the smallest doc_id >= `doc_id` in the bitmap, or None."""
+        words = self._words
+        word_index = doc_id // WORD_BITS
+        if word_index >= len(words):
+            return None
+        word = words[word_index] >> (doc_id % WORD_BITS)
+        if word:
+            # Isolate the lowest set bit to find its index
+            return doc_id + (word & -word).bit_length() - 1
+        for word_index in range(word_index + 1, len(words)):
+            word = words[word_index]
+            if word:
+                return word_index * WORD_BITS + (word & -word).bit_length() - 1
+        return None
+
+    def __contains__(self, doc_id: int) -> bool:
+        word_index = doc_id // WORD_BITS
+        return word_index < len(self._words) and (self._words[word_index] >> (doc_id % WORD_BITS)) & 1 == 1
+
+    def __iter__(self) -> typing.Iterator[int]:
+        for word_index, word in enumerate(self._words):
+            base = word_index * WORD_BITS
+            while word:
+                lowest = word & -word
+                yield base + lowest.bit_length() - 1
+                word ^= lowest
+
+    def __len__(self) -> int:
+        return sum(bin(word).count('1') for word in self._words)
+
+    def __bool__(self) -> bool:
+        return any(self._words)
+
+    def __and__(self, other: 'DocBitmap') -> 'DocBitmap':
+        return DocBitmap(array.array('Q', (a & b for a, b in zip(self._words, other._words))))
+
+    def __or__(self, other: 'DocBitmap') -> 'DocBitmap':
+        longer, shorter = (self._words, other._words) if len(self._words) >= len(other._words) else \
+            (other._words, self._words)
+        words = array.array('Q', longer)
+        for word_index, word in enumerate(shorter):
+            words[word_index] |= word
+        return DocBitmap(words)
+
+    def __sub__(self, other: 'DocBitmap') -> 'DocBitmap':
+        words = array.array('Q', self._words)
+        for word_index, word in enumerate(other._words[:len(words)]):
+            words[word_index] &= _WORD_MASK ^ word
+        return DocBitmap(words)
+
+    def _to_int(self) -> int:
+        data = array.array('Q', self._words)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        return int.from_bytes(data.tobytes(), 'little')
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DocBitmap) and self._to_int() == other._to_int()
+
+    def __repr__(self):
+        return 'DocBitmap({})'.format(list(self))
+
+    def to_json(self) -> str:
+        """Serializes to a hex string"""
+        return format(self._to_int(), 'x')
+
+    @staticmethod
+    def from_json(json_data: str) -> 'DocBitmap':
+        bits = int(json_data, 16)
+        num_words = (bits.bit_length() + WORD_BITS - 1) // WORD_BITS
+        words = array.array('Q')
+        words.frombytes(bits.to_bytes(num_words * 8, 'little'))
+        if sys.byteorder == 'big':
+            words.byteswap()
+        return DocBitmap(words)
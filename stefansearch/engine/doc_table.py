@@ -0,0 +1,152 @@
+import array
+import typing
+from stefansearch.engine._helper import DocInfo
+from stefansearch.engine.doc_bitmap import DocBitmap
+from stefansearch.engine.front_coding import StringTable
+
+
+class DocTable:
+    """
+    Columnar store of per-document data, indexed by doc_id.
+
+    doc_ids are allocated sequentially starting at zero and are never
+    reused, so removing a document leaves a hole in every column. Call
+    `compact()` to renumber the remaining documents densely.
+
+    Columns:
+    - `lengths`: number of terms in each document
+    - slugs: a front-coded StringTable mapping slugs to doc_ids and back.
+      Call `freeze()` (done on every commit) to move newly-added slugs
+      into the compact front-coded store. Lookups of frozen slugs go
+      through an LRU cache of `lookup_cache_size` entries.
+    - metadata: optional dict of attributes for each document
+    """
+    def __init__(self, lookup_cache_size: int = 4096):
+        self.lengths = array.array('I')
+        self._lookup_cache_size = lookup_cache_size
+        self._slugs = StringTable(lookup_cache_size=lookup_cache_size)
+        self._metadata: typing.List[typing.Optional[typing.Dict[str, typing.Any]]] = []
+        self._alive = DocBitmap()
+        self._num_docs = 0
+
+    @property
+    def next_doc_id(self) -> int:
+        """The doc_id that will be allocated to the next added document."""
+        return len(self.lengths)
+
+    def add(
+            self,
+            slug: str,
+            num_terms: int,
+            metadata: typing.Dict[str, typing.Any] = None,
+    ) -> int:
+        """Add a document and return its newly-allocated doc_id."""
+        doc_id = self.next_doc_id
+        self.lengths.append(num_terms)
+        self._slugs.add(slug, doc_id)
+        self._metadata.append(metadata)
+        self._alive.add(doc_id)
+        self._num_docs += 1
+        return doc_id
+
+    def remove(self, doc_id: int):
+        self._slugs.remove(self.get_slug(doc_id))
+        self.lengths[doc_id] = 0
+        self._metadata[doc_id] = None
+        self._alive.remove(doc_id)
+        self._num_docs -= 1
+
+    def get_doc_id(self, slug: str) -> typing.Optional[int]:
+        return self._slugs.get_id(slug)
+
+    def get_slug(self, doc_id: int) -> str:
+        return self._slugs.get_string(doc_id)
+
+    def get_metadata(self, doc_id: int) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        return self._metadata[doc_id]
+
+    def get(self, doc_id: int) -> DocInfo:
+        return DocInfo(self.get_slug(doc_id), self.lengths[doc_id], self._metadata[doc_id])
+
+    def doc_ids(self) -> typing.Iterator[int]:
+        """Iterate over the doc_ids of all documents, in increasing order."""
+        return iter(self._alive)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._alive
+
+    def __len__(self) -> int:
+        return self._num_docs
+
+    def compact(self) -> typing.Dict[int, int]:
+        """
+        Renumber the documents so that doc_ids are dense again, keeping
+        their order. Returns the mapping from old to new doc_ids.
+        """
+        mapping = {}
+        compacted = DocTable(self._lookup_cache_size)
+        for doc_id in self.doc_ids():
+            mapping[doc_id] = compacted.add(self.get_slug(doc_id), self.lengths[doc_id], self._metadata[doc_id])
+        compacted.freeze()
+        self.__dict__.update(compacted.__dict__)
+        return mapping
+
+    def freeze(self):
+        """Move all slugs into the front-coded store."""
+        self._slugs.freeze()
+
+    def to_json(self):
+        """Serializes to a dict which can be JSON-ified"""
+        doc_ids = list(self.doc_ids())
+        return {
+            'next_doc_id': self.next_doc_id,
+            'doc_ids': doc_ids,
+            'slugs': self._slugs.to_json(),
+            'lengths': [self.lengths[doc_id] for doc_id in doc_ids],
+            'metadata': {
+                str(doc_id): self._metadata[doc_id] for doc_id in doc_ids if self._metadata[doc_id]
+            },
+        }
+
+    @staticmethod
+    def from_json(json_data) -> 'DocTable':
+        table = DocTable()
+        metadata = json_data.get('metadata', {})
+        if isinstance(json_data['slugs'], list):
+            # Older index files store the slugs as a list parallel to `doc_ids`
+            slugs = json_data['slugs']
+        else:
+            slug_table = StringTable.from_json(json_data['slugs'])
+            slugs = [slug_table.get_string(doc_id) for doc_id in json_data['doc_ids']]
+        docs = zip(json_data['doc_ids'], slugs, json_data['lengths'])
+        table._load(
+            ((doc_id, DocInfo(slug, length, metadata.get(str(doc_id)))) for doc_id, slug, length in docs),
+            json_data['next_doc_id'],
+        )
+        return table
+
+    @staticmethod
+    def from_doc_data_json(json_data) -> 'DocTable':
+        """Read the `doc_data` dict that older index files store."""
+        table = DocTable()
+        docs = sorted(
+            (int(doc_id), DocInfo(doc_info['slug'], doc_info['num_terms'], doc_info.get('metadata')))
+            for doc_id, doc_info in json_data.items()
+        )
+        table._load(docs, docs[-1][0] + 1 if docs else 0)
+        return table
+
+    def _load(self, docs: typing.Iterable[typing.Tuple[int, DocInfo]], next_doc_id: int):
+        """Fill the (empty) table with `docs`, which must be sorted by doc_id."""
+        for doc_id, doc_info in docs:
+            while self.next_doc_id < doc_id:
+                self._add_hole()
+            self.add(doc_info.slug, doc_info.num_terms, doc_info.metadata)
+        while self.next_doc_id < next_doc_id:
+            self._add_hole()
+        self.freeze()
+
+    def _add_hole(self):
+        """Allocate a doc_id without a document, i.e. of a removed document."""
+        self.lengths.append(0)
+        self._metadata.append(None)
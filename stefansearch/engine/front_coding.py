@@ -0,0 +1,263 @@
+import array
+import bisect
+import functools
+import typing
+
+
+def _encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(data: bytes, pos: int) -> typing.Tuple[int, int]:
+    """Returns the decoded value and the position after it."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _common_prefix_length(a: typing.Sequence, b: typing.Sequence) -> int:
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+class FrontCodedStrings:
+    """
+    An immutable, sorted set of strings stored with block front coding.
+
+    The strings are split into blocks of `block_size`. The first string of
+    each block (its header) is stored in full; every other string is
+    stored as the length of the prefix it shares with its predecessor
+    plus the remaining suffix, encoded as UTF-8 into one `bytes` object
+    per block. This removes most of the redundancy of strings with shared
+    prefixes, such as the vocabulary of a language or file paths. Lone
+    surrogates, which Python uses for file names that aren't valid
+    UTF-8, are allowed.
+
+    Strings are identified by their rank in sorted order. Lookups binary
+    search the block headers and then decode a single block, so they take
+    O(log(n / block_size) + block_size).
+    """
+    def __init__(self, strings: typing.Sequence[str] = (), block_size: int = 16):
+        """`strings` must be sorted and unique."""
+        self._block_size = block_size
+        self._headers: typing.List[str] = []
+        self._blocks: typing.List[bytes] = []
+        self._len = len(strings)
+        for start in range(0, len(strings), block_size):
+            block = strings[start:start + block_size]
+            self._headers.append(block[0])
+            encoded = bytearray()
+            prev = block[0].encode('utf8', 'surrogatepass')
+            for string in block[1:]:
+                curr = string.encode('utf8', 'surrogatepass')
+                prefix_length = _common_prefix_length(prev, curr)
+                _encode_varint(prefix_length, encoded)
+                _encode_varint(len(curr) - prefix_length, encoded)
+                encoded += curr[prefix_length:]
+                prev = curr
+            self._blocks.append(bytes(encoded))
+
+    def _decode_block(self, block_index: int, count: int = None) -> typing.List[str]:
+        """Decode the first `count` strings of a block (default: all of them)."""
+        strings = [self._headers[block_index]]
+        data = self._blocks[block_index]
+        prev = strings[0].encode('utf8', 'surrogatepass')
+        end = len(data)
+        remaining = (count if count is not None else self._block_size) - 1
+        pos = 0
+        while pos < end and remaining > 0:
+            # Lengths are almost always < 128, i.e. a single byte
+            prefix_length = data[pos]
+            if prefix_length < 0x80:
+                pos += 1
+            else:
+                prefix_length, pos = _decode_varint(data, pos)
+            suffix_length = data[pos]
+            if suffix_length < 0x80:
+                pos += 1
+            else:
+                suffix_length, pos = _decode_varint(data, pos)
+            prev = prev[:prefix_length] + data[pos:pos + suffix_length]
+            pos += suffix_length
+            strings.append(prev.decode('utf8', 'surrogatepass'))
+            remaining -= 1
+        return strings
+
+    def get(self, rank: int) -> str:
+        """Return the string with the given rank."""
+        if not 0 <= rank < self._len:
+            raise IndexError('rank out of range')
+        block_index, offset = divmod(rank, self._block_size)
+        if offset == 0:
+            return self._headers[block_index]
+        return self._decode_block(block_index, offset + 1)[offset]
+
+    def rank_of(self, string: str) -> typing.Optional[int]:
+        """Return the rank of `string`, or None if it isn't in the set."""
+        block_index = bisect.bisect_right(self._headers, string) - 1
+        if block_index < 0:
+            return None
+        if self._headers[block_index] == string:
+            return block_index * self._block_size
+        for offset, candidate in enumerate(self._decode_block(block_index)):
+            if candidate == string:
+                return block_index * self._block_size + offset
+        return None
+
+    def __iter__(self) -> typing.Iterator[str]:
+        for block_index in range(len(self._blocks)):
+            yield from self._decode_block(block_index)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def to_json(self):
+        """
+        Serializes to a dict which can be JSON-ified. Each block is stored
+        as its header followed by a (prefix length, suffix) pair for each
+        of its other strings.
+        """
+        blocks = []
+        for block_index in range(len(self._blocks)):
+            strings = self._decode_block(block_index)
+            serialized = [strings[0]]
+            for prev, curr in zip(strings, strings[1:]):
+                prefix_length = _common_prefix_length(prev, curr)
+                serialized.extend((prefix_length, curr[prefix_length:]))
+            blocks.append(serialized)
+        return {'block_size': self._block_size, 'blocks': blocks}
+
+    @staticmethod
+    def from_json(json_data) -> 'FrontCodedStrings':
+        strings = []
+        for serialized in json_data['blocks']:
+            strings.append(serialized[0])
+            for i in range(1, len(serialized), 2):
+                strings.append(strings[-1][:serialized[i]] + serialized[i + 1])
+        return FrontCodedStrings(strings, json_data['block_size'])
+
+
+class StringTable:
+    """
+    Bidirectional mapping between strings and integer ids.
+
+    Most strings are kept in a front-coded `FrontCodedStrings`. Strings
+    added since the last call to `freeze()` are kept in a dict, and are
+    merged into the front-coded store by the next `freeze()`.
+
+    Lookups in the front-coded store (in both directions) can optionally be
+    memoized in LRU caches of `lookup_cache_size` entries, which trades
+    some memory for faster repeated lookups.
+    """
+    # Marks a rank or id without a mapping
+    _NO_ID = 0xFFFFFFFF
+
+    def __init__(self, block_size: int = 16, lookup_cache_size: int = 0):
+        self._block_size = block_size
+        self._lookup_cache_size = lookup_cache_size
+        self._frozen = FrontCodedStrings((), block_size)
+        # id of the string with each rank in `_frozen`
+        self._rank_to_id = array.array('I')
+        # rank in `_frozen` of each id
+        self._id_to_rank = array.array('I')
+        self._pending: typing.Dict[str, int] = {}
+        self._pending_strings: typing.Dict[int, str] = {}
+        self._num_frozen = 0
+        self._reset_lookup()
+
+    def _reset_lookup(self):
+        if self._lookup_cache_size > 0:
+            cache = functools.lru_cache(maxsize=self._lookup_cache_size)
+            self._frozen_rank_of = cache(self._frozen.rank_of)
+            self._frozen_get = cache(self._frozen.get)
+        else:
+            self._frozen_rank_of = self._frozen.rank_of
+            self._frozen_get = self._frozen.get
+
+    def add(self, string: str, string_id: int):
+        """Map `string` to `string_id`. Neither may be mapped already."""
+        self._pending[string] = string_id
+        self._pending_strings[string_id] = string
+
+    def get_id(self, string: str) -> typing.Optional[int]:
+        string_id = self._pending.get(string)
+        if string_id is not None:
+            return string_id
+        rank = self._frozen_rank_of(string)
+        if rank is None or self._rank_to_id[rank] == self._NO_ID:
+            return None
+        return self._rank_to_id[rank]
+
+    def get_string(self, string_id: int) -> typing.Optional[str]:
+        string = self._pending_strings.get(string_id)
+        if string is not None:
+            return string
+        if string_id >= len(self._id_to_rank) or self._id_to_rank[string_id] == self._NO_ID:
+            return None
+        return self._frozen_get(self._id_to_rank[string_id])
+
+    def remove(self, string: str):
+        """Remove the mapping of `string`."""
+        string_id = self._pending.pop(string, None)
+        if string_id is not None:
+            del self._pending_strings[string_id]
+            return
+        string_id = self.get_id(string)
+        if string_id is None:
+            raise KeyError(string)
+        self._rank_to_id[self._id_to_rank[string_id]] = self._NO_ID
+        self._id_to_rank[string_id] = self._NO_ID
+        self._num_frozen -= 1
+
+    def items(self) -> typing.Iterator[typing.Tuple[str, int]]:
+        """Iterate over all `(string, id)` pairs."""
+        for rank, string in enumerate(self._frozen):
+            if self._rank_to_id[rank] != self._NO_ID:
+                yield string, self._rank_to_id[rank]
+        yield from self._pending.items()
+
+    def __len__(self) -> int:
+        return self._num_frozen + len(self._pending)
+
+    def freeze(self):
+        """Merge all strings into the front-coded store."""
+        if not self._pending and self._num_frozen == len(self._frozen):
+            return
+        self._load(sorted(self.items()))
+
+    def _load(self, items: typing.Sequence[typing.Tuple[str, int]]):
+        """Replace the contents with `items`, which must be sorted by string."""
+        self._frozen = FrontCodedStrings([string for string, _ in items], self._block_size)
+        self._rank_to_id = array.array('I', (string_id for _, string_id in items))
+        max_id = max(self._rank_to_id) if items else -1
+        self._id_to_rank = array.array('I', [self._NO_ID]) * (max_id + 1)
+        for rank, string_id in enumerate(self._rank_to_id):
+            self._id_to_rank[string_id] = rank
+        self._pending = {}
+        self._pending_strings = {}
+        self._num_frozen = len(items)
+        self._reset_lookup()
+
+    def to_json(self):
+        """Serializes to a dict which can be JSON-ified. Implies `freeze()`."""
+        self.freeze()
+        return {'strings': self._frozen.to_json(), 'ids': self._rank_to_id.tolist()}
+
+    @staticmethod
+    def from_json(json_data, lookup_cache_size: int = 0) -> 'StringTable':
+        strings = FrontCodedStrings.from_json(json_data['strings'])
+        table = StringTable(json_data['strings']['block_size'], lookup_cache_size)
+        table._load(list(zip(strings, json_data['ids'])))
+        return table
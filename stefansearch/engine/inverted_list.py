@@ -1,22 +1,72 @@
+import array
+import bisect
 import typing
+from stefansearch.engine.doc_bitmap import DocBitmap
 from stefansearch.engine.posting_list import PostingList
 
 
+# What an InvertedList stores about each document that contains its term:
+# - 'docs': only that it contains the term
+# - 'freqs': also the number of occurrences
+# - 'positions': also the position of every occurrence
+GRANULARITIES = ('docs', 'freqs', 'positions')
+
+
 class InvertedList:
+    """
+    Stores all postings of a single term.
+
+    The postings are kept in contiguous arrays of unsigned ints rather
+    than as Python objects:
+    - `doc_ids`: the documents containing the term, in increasing order
+    - `term_freqs`: the number of occurrences in each document
+    - `positions`: the term positions of all documents, concatenated
+    - `position_offsets`: the positions of `doc_ids[i]` are
+      `positions[position_offsets[i]:position_offsets[i + 1]]`
+    - `char_offsets`: if the engine stores character offsets, the
+      `(start, end)` span of every position, flattened into pairs.
+      Otherwise None. These are 64-bit, as files may be larger than
+      4 GiB.
+
+    Depending on the `granularity` (see `GRANULARITIES`), `positions` and
+    `position_offsets` (below 'positions'), and `term_freqs` (below
+    'freqs') are None. With 'docs', every document counts as a single
+    posting, and `get_term_freq()` returns 1.
+
+    NOTE: The cursor ONLY ITERATES FORWARD (for now). Call `reset_pointer()`
+    between usages.
+    """
+    __slots__ = (
+        'term_id', 'doc_ids', 'term_freqs', 'positions', 'position_offsets',
+        'char_offsets', 'num_docs', 'num_postings', 'curr_index',
+    )
+
     def __init__(
             self,
-            term: str,
+            term_id: int,
             posting_lists: typing.List[PostingList] = None,
+            granularity: str = 'positions',
     ):
-        # TODO: INVERTEDLISTS MUST REMAIN SORTED. THIS IS A KEY TO EFFICIENT OPERATIONS. LOOK INTO USING BYSECT()
-        # TODO: efficiency and other general improvements. Maintain a current pointer and use binary search to move to an arbitrary file
-        # NOTE: ONLY ITERATES FORWARD (for now). Call `reset()` between usages.
-        self.term = term
-        # list of PostingLists RENAME TO SOMETHING ELSE
-        self.posting_lists = posting_lists if posting_lists else []
-        self.num_docs = len(self.posting_lists)
-        self.num_postings = sum([len(posting_list.postings) for posting_list in self.posting_lists])
+        # Id of the term in the TermDictionary
+        self.term_id = term_id
+        self.doc_ids = array.array('I')
+        self.term_freqs = array.array('I') if granularity != 'docs' else None
+        self.positions = array.array('I') if granularity == 'positions' else None
+        self.position_offsets = array.array('I', [0]) if granularity == 'positions' else None
+        self.char_offsets = None
+        self.num_docs = 0
+        self.num_postings = 0
         self.curr_index = 0
+        for posting_list in posting_lists if posting_lists else []:
+            for i, term_position in enumerate(posting_list.postings):
+                offset = posting_list.offsets[i] if posting_list.offsets else None
+                self.add_posting(posting_list.doc_id, term_position, offset)
+
+    @property
+    def granularity(self) -> str:
+        if self.positions is not None:
+            return 'positions'
+        return 'freqs' if self.term_freqs is not None else 'docs'
 
     def reset_pointer(self):
         self.curr_index = 0
@@ -25,38 +75,149 @@ class InvertedList:
             self,
             doc_id: int,
             term_position: int,
+            offset: typing.Tuple[int, int] = None,
     ):
-        if len(self.posting_lists) == 0:
-            self.posting_lists.append(PostingList(doc_id, [term_position]))
-            self.num_docs = 1
-        elif self.posting_lists[self.curr_index].doc_id == doc_id:
-            self.posting_lists[self.curr_index].append(term_position)
+        self._check_offset(offset)
+        if self.num_docs and self.doc_ids[-1] == doc_id:
+            # Add another occurrence to the last document
+            if self.term_freqs is None:
+                return
+            self.term_freqs[-1] += 1
+            if self.positions is not None:
+                self.position_offsets[-1] += 1
+                self.positions.append(term_position)
+        elif not self.num_docs or self.doc_ids[-1] < doc_id:
+            # Add a new document to the end
+            self.doc_ids.append(doc_id)
+            if self.term_freqs is not None:
+                self.term_freqs.append(1)
+            if self.positions is not None:
+                self.positions.append(term_position)
+                self.position_offsets.append(len(self.positions))
+            self.num_docs += 1
         else:
-            self.posting_lists.append(PostingList(doc_id, [term_position]))
-            self.curr_index += 1
+            self._insert_posting(doc_id, term_position, offset)
+            return
+        if offset is not None:
+            if self.char_offsets is None:
+                self.char_offsets = array.array('Q')
+            self.char_offsets.extend(offset)
+        self.num_postings += 1
+
+    def _check_offset(self, offset: typing.Optional[typing.Tuple[int, int]]):
+        """
+        Raise a ValueError unless adding a posting with `offset` keeps
+        character offsets stored for either every posting or none.
+        """
+        if offset is None and self.char_offsets is not None:
+            raise ValueError(f'Term {self.term_id} stores character offsets, but none were given')
+        if offset is not None and self.char_offsets is None and self.num_postings:
+            raise ValueError(f'Term {self.term_id} has postings without character offsets')
+
+    def _insert_posting(
+            self,
+            doc_id: int,
+            term_position: int,
+            offset: typing.Optional[typing.Tuple[int, int]],
+    ):
+        """Slow path of `add_posting()` for a `doc_id` that isn't the last one."""
+        index = bisect.bisect_left(self.doc_ids, doc_id)
+        if self.doc_ids[index] != doc_id:
+            self.doc_ids.insert(index, doc_id)
             self.num_docs += 1
+            if self.term_freqs is None:
+                self.num_postings += 1
+                return
+            self.term_freqs.insert(index, 0)
+            if self.positions is not None:
+                self.position_offsets.insert(index + 1, self.position_offsets[index])
+        elif self.term_freqs is None:
+            return
+        self.term_freqs[index] += 1
         self.num_postings += 1
+        if self.positions is None:
+            return
+        insert_at = self.position_offsets[index + 1]
+        self.positions.insert(insert_at, term_position)
+        if offset is not None:
+            if self.char_offsets is None:
+                self.char_offsets = array.array('Q')
+            self.char_offsets[2 * insert_at:2 * insert_at] = array.array('Q', offset)
+        for i in range(index + 1, len(self.position_offsets)):
+            self.position_offsets[i] += 1
+
+    def remove_document(self, doc_id: int) -> int:
+        """
+        Remove `doc_id` from the list. Returns the number of postings
+        that were removed. Resets the pointer.
+        """
+        self.reset_pointer()
+        index = self._find(doc_id)
+        if index is None:
+            return 0
+        num_removed = self.term_freqs[index] if self.term_freqs is not None else 1
+        del self.doc_ids[index]
+        if self.term_freqs is not None:
+            del self.term_freqs[index]
+        if self.positions is not None:
+            start, end = self.position_offsets[index], self.position_offsets[index + 1]
+            del self.positions[start:end]
+            if self.char_offsets is not None:
+                del self.char_offsets[2 * start:2 * end]
+            self.position_offsets[index + 1:] = \
+                array.array('I', (offset - (end - start) for offset in self.position_offsets[index + 2:]))
+        self.num_docs -= 1
+        self.num_postings -= num_removed
+        return num_removed
+
+    def remap_doc_ids(self, mapping: typing.Dict[int, int]):
+        """
+        Replace every doc_id with `mapping[doc_id]`. The mapping must
+        preserve the order of the doc_ids. Resets the pointer.
+        """
+        self.doc_ids = array.array('I', (mapping[doc_id] for doc_id in self.doc_ids))
+        self.reset_pointer()
+
+    def _find(self, doc_id: int) -> typing.Optional[int]:
+        """Return the index of `doc_id` in `doc_ids`, or None."""
+        index = bisect.bisect_left(self.doc_ids, doc_id)
+        return index if index < self.num_docs and self.doc_ids[index] == doc_id else None
+
+    def doc_bitmap(self) -> DocBitmap:
+        """Return the DocBitmap of documents that contain this term."""
+        return DocBitmap.from_doc_ids(self.doc_ids)
 
     def is_finished(self) -> bool:
         return self.curr_index >= self.num_docs
 
     def get_curr_doc_id(self) -> int:
-        return self.posting_lists[self.curr_index].doc_id if self.curr_index < self.num_docs else None
+        return self.doc_ids[self.curr_index] if self.curr_index < self.num_docs else None
 
     def has_document(self, doc_id: int) -> bool:
-        self.reset_pointer()
-        found = self.move_to(doc_id)
-        self.reset_pointer()
-        return found
+        return self._find(doc_id) is not None
+
+    def get_posting_list(self, doc_id: int) -> typing.Optional[PostingList]:
+        """
+        Return a PostingList with the positions (and character offsets) of
+        `doc_id`, or None if the document does not contain this term
+        or positions are not stored. Does not move the pointer.
+        """
+        index = self._find(doc_id) if self.positions is not None else None
+        if index is None:
+            return None
+        start, end = self.position_offsets[index], self.position_offsets[index + 1]
+        offsets = None
+        if self.char_offsets is not None:
+            flat = self.char_offsets[2 * start:2 * end]
+            offsets = list(zip(flat[::2], flat[1::2]))
+        return PostingList(doc_id, self.positions[start:end].tolist(), offsets)
 
     # iterate forward through the list until reaching doc_id >= the given doc_id
     # returns whether the doc_id was found in the list
     def move_to(self, doc_id):
-        while self.curr_index < self.num_docs and \
-                self.posting_lists[self.curr_index].doc_id < doc_id:
-            self.curr_index += 1
-        return self.curr_index < self.num_docs and \
-                self.posting_lists[self.curr_index].doc_id == doc_id
+        if self.curr_index < self.num_docs and self.doc_ids[self.curr_index] < doc_id:
+            self.curr_index = bisect.bisect_left(self.doc_ids, doc_id, self.curr_index)
+        return self.curr_index < self.num_docs and self.doc_ids[self.curr_index] == doc_id
 
     # iterate through the list until the next doc_id
     def move_to_next(self):
@@ -64,32 +225,61 @@ class InvertedList:
         return self.curr_index < self.num_docs
 
     def move_past(self, doc_id):
-        while self.curr_index < self.num_docs and \
-              self.posting_lists[self.curr_index].doc_id <= doc_id:
-            self.curr_index += 1
+        self.move_to(doc_id + 1)
 
     # get number of term occurrences in the current doc_id
     def get_term_freq(self):
-        return len(self.posting_lists[self.curr_index].postings) if self.curr_index < self.num_docs else 0
+        if self.curr_index >= self.num_docs:
+            return 0
+        return self.term_freqs[self.curr_index] if self.term_freqs is not None else 1
 
     def __repr__(self):
         return '{}: curr_index {} / {}, curr_id {}' .format(
-            self.term,
+            self.term_id,
             self.curr_index,
             self.num_docs - 1,
-            self.posting_lists[self.curr_index].doc_id if self.curr_index < self.num_docs else None,
+            self.doc_ids[self.curr_index] if self.curr_index < self.num_docs else None,
         )
 
     # Serializes to a dict which can be JSON-ified
     def to_json(self):
-        return {
-            'term': self.term,
-            'posting_list': [posting_list.to_json() for posting_list in self.posting_lists],
+        serialized = {
+            'term_id': self.term_id,
+            'doc_ids': self.doc_ids.tolist(),
         }
+        if self.term_freqs is not None:
+            serialized['term_freqs'] = self.term_freqs.tolist()
+        if self.positions is not None:
+            serialized['positions'] = self.positions.tolist()
+        if self.char_offsets is not None:
+            serialized['char_offsets'] = self.char_offsets.tolist()
+        return serialized
 
     @staticmethod
     def from_json(json_data):
-        return InvertedList(
-            term=json_data['term'],
-            posting_lists=[PostingList.from_json(p_list) for p_list in json_data['posting_list']],
-        )
+        if 'posting_list' in json_data:
+            # Older index files store a list of serialized PostingLists
+            return InvertedList(
+                term_id=json_data['term_id'],
+                posting_lists=[PostingList.from_json(p_list) for p_list in json_data['posting_list']],
+            )
+        if 'positions' in json_data:
+            granularity = 'positions'
+        else:
+            granularity = 'freqs' if 'term_freqs' in json_data else 'docs'
+        inverted_list = InvertedList(json_data['term_id'], granularity=granularity)
+        inverted_list.doc_ids = array.array('I', json_data['doc_ids'])
+        inverted_list.num_docs = len(inverted_list.doc_ids)
+        if granularity == 'docs':
+            inverted_list.num_postings = inverted_list.num_docs
+            return inverted_list
+        inverted_list.term_freqs = array.array('I', json_data['term_freqs'])
+        inverted_list.num_postings = sum(inverted_list.term_freqs)
+        if granularity == 'positions':
+            inverted_list.positions = array.array('I', json_data['positions'])
+            position_offsets = inverted_list.position_offsets
+            for term_freq in inverted_list.term_freqs:
+                position_offsets.append(position_offsets[-1] + term_freq)
+            if 'char_offsets' in json_data:
+                inverted_list.char_offsets = array.array('Q', json_data['char_offsets'])
+        return inverted_list
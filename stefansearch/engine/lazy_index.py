@@ -0,0 +1,59 @@
+import typing
+from stefansearch.engine.inverted_list import InvertedList
+from stefansearch.engine.dense_inverted_list import DenseInvertedList
+
+
+def decode_inverted_list(serialized: dict) -> typing.Union[InvertedList, DenseInvertedList]:
+    """Deserialize an InvertedList or DenseInvertedList."""
+    if 'doc_bits' in serialized:
+        return DenseInvertedList.from_json(serialized)
+    return InvertedList.from_json(serialized)
+
+
+class LazyIndex(list):
+    """
+    An inverted index (a list of InvertedLists indexed by term_id) whose
+    entries stay serialized until they are first accessed.
+
+    Accessing an entry by index deserializes it. Iterating deserializes
+    every entry, so iterate `list.__iter__(index)` to inspect the raw
+    entries instead.
+    """
+    def __getitem__(self, term_id: int):
+        entry = list.__getitem__(self, term_id)
+        if isinstance(entry, dict):
+            entry = decode_inverted_list(entry)
+            list.__setitem__(self, term_id, entry)
+        return entry
+
+    def __iter__(self):
+        for term_id in range(len(self)):
+            yield self[term_id]
+
+    def is_decoded(self, term_id: int) -> bool:
+        return not isinstance(list.__getitem__(self, term_id), dict)
+
+    def num_postings(self, term_id: int) -> int:
+        """Return the number of postings of an entry, without deserializing it if possible."""
+        entry = list.__getitem__(self, term_id)
+        if entry is None:
+            return 0
+        if isinstance(entry, dict) and 'term_freqs' in entry:
+            return sum(entry['term_freqs'])
+        if isinstance(entry, dict) and 'doc_ids' in entry:
+            # Granularity 'docs'
+            return len(entry['doc_ids'])
+        if isinstance(entry, dict) and 'doc_bits' in entry:
+            # Dense, with granularity 'docs'
+            return bin(int(entry['doc_bits'], 16)).count('1')
+        return self[term_id].num_postings
+
+    def num_decoded(self) -> int:
+        return sum(1 for entry in list.__iter__(self) if entry is not None and not isinstance(entry, dict))
+
+    def to_json(self) -> typing.List[dict]:
+        """Serialize every entry, reusing the entries that were never deserialized."""
+        return [
+            entry if isinstance(entry, dict) else entry.to_json()
+            for entry in list.__iter__(self) if entry is not None
+        ]
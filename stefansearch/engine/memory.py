@@ -0,0 +1,77 @@
+import dataclasses as dc
+import sys
+import types
+import typing
+
+
+# Objects whose referents are not part of the data structure being measured
+_OPAQUE_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, types.CodeType, types.FrameType,
+)
+
+
+def deep_sizeof(obj: typing.Any, seen: typing.Set[int] = None) -> int:
+    """
+    Return the size in bytes of `obj` and all objects reachable from it
+    through containers, instance `__dict__`s and `__slots__`.
+
+    Objects whose ids are in `seen` are skipped, and the ids of all
+    visited objects are added to it, so passing the same set to several
+    calls counts shared objects only once. Functions, methods, classes
+    and modules only count their own size (so e.g. the contents of an
+    `functools.lru_cache` aren't included).
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or isinstance(obj, _OPAQUE_TYPES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            # Bypass overridden `__iter__`s, e.g. that of the LazyIndex
+            stack.extend(list.__iter__(obj))
+        elif isinstance(obj, (tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, '__dict__'):
+            stack.append(vars(obj))
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get('__slots__', ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if slot != '__dict__' and hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return size
+
+
+@dc.dataclass
+class MemoryReport:
+    """
+    Memory used by a SearchEngine, as returned by `memory_report()`.
+
+    `components` maps each part of the engine to its size in bytes.
+    Objects shared by several components are only counted once.
+    `top_terms` holds the `(term, bytes)` of the terms with the largest
+    InvertedLists, largest first.
+    """
+    components: typing.Dict[str, int]
+    top_terms: typing.List[typing.Tuple[str, int]]
+    # Number of postings (term occurrences) in the index
+    num_postings: int
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.components.values())
+
+    @property
+    def bytes_per_posting(self) -> float:
+        """Size of the inverted index per posting."""
+        return self.components['index'] / self.num_postings if self.num_postings else 0.0
@@ -0,0 +1,79 @@
+import typing
+from stefansearch.engine.doc_bitmap import DocBitmap
+
+
+# A filter maps attribute names to the allowed value, or to a list of
+# allowed values. For example, `{'kind': 'play', 'title': ['hamlet', 'macbeth']}`
+# matches plays that are either Hamlet or Macbeth.
+Filter = typing.Dict[str, typing.Any]
+
+
+def _value_key(value: typing.Any) -> typing.Tuple[str, typing.Any]:
+    """
+    Key of a value in the MetadataIndex. Python considers `True == 1 == 1.0`,
+    but a boolean attribute should not match a number, so values are
+    tagged with their kind. Ints and floats are both numbers.
+    """
+    if isinstance(value, bool):
+        return 'bool', value
+    if isinstance(value, (int, float)):
+        return 'number', value
+    return 'str', value
+
+
+class MetadataIndex:
+    """
+    Index of per-document attributes.
+
+    Every `(attribute, value)` pair maps to the DocBitmap of documents
+    having that value (booleans, numbers and strings never match each
+    other), so that filters can be compiled into a single
+    bitmap by and-ing and or-ing bitmaps.
+    """
+    def __init__(self):
+        # Bitmaps by attribute, then by `_value_key()` of the value
+        self._bitmaps: typing.Dict[str, typing.Dict[typing.Tuple[str, typing.Any], DocBitmap]] = {}
+
+    def add_document(self, doc_id: int, metadata: typing.Dict[str, typing.Any]):
+        for attribute, value in metadata.items():
+            values = self._bitmaps.setdefault(attribute, {})
+            key = _value_key(value)
+            if key not in values:
+                values[key] = DocBitmap()
+            values[key].add(doc_id)
+
+    def remove_document(self, doc_id: int, metadata: typing.Dict[str, typing.Any]):
+        for attribute, value in metadata.items():
+            values = self._bitmaps.get(attribute, {})
+            key = _value_key(value)
+            if key in values:
+                values[key].remove(doc_id)
+                if not values[key]:
+                    del values[key]
+
+    def compile(self, doc_filter: Filter) -> DocBitmap:
+        """
+        Return the bitmap of documents matching `doc_filter`. Raises a
+        ValueError if a value isn't a str, int, float or bool, or a list
+        of them.
+        """
+        result = None
+        for attribute, allowed in doc_filter.items():
+            if not isinstance(allowed, (list, tuple, set, frozenset)):
+                allowed = [allowed]
+            for value in allowed:
+                if not isinstance(value, (str, int, float, bool)):
+                    raise ValueError(
+                        f'Filter value of "{attribute}" must be a str, int, float or bool, '
+                        f'or a list of them, not {type(value).__name__}'
+                    )
+            values = self._bitmaps.get(attribute, {})
+            matching = DocBitmap()
+            for value in allowed:
+                key = _value_key(value)
+                if key in values:
+                    matching = matching | values[key]
+            result = matching if result is None else result & matching
+        if result is None:
+            raise ValueError('Filter must specify at least one attribute')
+        return result
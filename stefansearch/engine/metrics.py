@@ -0,0 +1,195 @@
+import bisect
+import math
+import os
+import pathlib
+import time
+import typing
+
+
+# Default Histogram buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def percentile(values: typing.Sequence[float], percent: float) -> float:
+    """Return the `percent`th percentile of `values`, using the nearest-rank method."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class Counter:
+    """A value that only ever increases, e.g. the number of errors."""
+    type_name = 'counter'
+
+    def __init__(self, name: str, help: str = ''):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        if amount < 0:
+            raise ValueError('Counters can only be increased')
+        self.value += amount
+
+    def samples(self) -> typing.List[typing.Tuple[str, float]]:
+        return [(self.name, self.value)]
+
+
+class Gauge:
+    """
+    A value that can go up and down, e.g. the number of documents.
+
+    A Gauge either holds a value that is `set()`, or calls a function
+    (see `set_function()`) to read the current value whenever it is
+    exported.
+    """
+    type_name = 'gauge'
+
+    def __init__(self, name: str, help: str = ''):
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._function: typing.Optional[typing.Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = value
+        self._function = None
+
+    def set_function(self, function: typing.Callable[[], float]):
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return self._function() if self._function else self._value
+
+    def samples(self) -> typing.List[typing.Tuple[str, float]]:
+        return [(self.name, self.value)]
+
+
+class Histogram:
+    """
+    Counts observations, e.g. latencies, in buckets.
+
+    `buckets` are the (sorted) upper bounds of the buckets. A bucket for
+    +Inf is always added.
+    """
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help: str = '', buckets: typing.Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # Number of observations that fall in each bucket (not cumulative)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> '_Timer':
+        """Return a context manager that observes the time spent inside it, in seconds."""
+        return _Timer(self)
+
+    def samples(self) -> typing.List[typing.Tuple[str, float]]:
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self._counts):
+            cumulative += count
+            samples.append(('{}_bucket{{le="{}"}}'.format(self.name, _format_value(bound)), cumulative))
+        samples.append((self.name + '_sum', self.sum))
+        samples.append((self.name + '_count', self.count))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+Metric = typing.Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """
+    A set of named metrics that can be exported in the Prometheus text
+    format, e.g. to a file read by node_exporter's textfile collector.
+
+    `counter()`, `gauge()` and `histogram()` return the existing metric
+    of the given name, or register a new one.
+    """
+    def __init__(self):
+        self._metrics: typing.Dict[str, Metric] = {}
+
+    def counter(self, name: str, help: str = '') -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str = '') -> Gauge:
+        return self._get_or_create(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = '', buckets: typing.Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help, buckets)
+        return self._get_or_create(Histogram, name, help)
+
+    def _get_or_create(self, metric_type: typing.Type, name: str, help: str) -> Metric:
+        if name not in self._metrics:
+            self._metrics[name] = metric_type(name, help)
+        metric = self._metrics[name]
+        if not isinstance(metric, metric_type):
+            raise ValueError(f'Metric "{name}" is already registered as a {metric.type_name}')
+        return metric
+
+    def get(self, name: str) -> typing.Optional[Metric]:
+        return self._metrics.get(name)
+
+    def __iter__(self) -> typing.Iterator[Metric]:
+        return iter(self._metrics.values())
+
+    def to_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            if metric.help:
+                lines.append('# HELP {} {}'.format(metric.name, metric.help))
+            lines.append('# TYPE {} {}'.format(metric.name, metric.type_name))
+            for name, value in metric.samples():
+                lines.append('{} {}'.format(name, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def export(self, target: typing.Union[str, pathlib.Path, typing.Callable[[str], typing.Any]]):
+        """
+        Export the metrics in the Prometheus text format, either by calling
+        `target` with the text, or by writing it to the file at `target`.
+        The file is replaced atomically, so readers never see a partial file.
+        """
+        text = self.to_prometheus()
+        if callable(target):
+            target(text)
+            return
+        path = pathlib.Path(target)
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as out:
+            out.write(text)
+        os.replace(temp_path, path)
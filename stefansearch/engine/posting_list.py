@@ -5,34 +5,55 @@ class PostingList:
     """
     Stores the positions of "postings" of some term for a specific doc_id.
 
-    In practice this is used by the InvertedList to group all occurrences
-    of a term for a specific file.
+    The InvertedList stores postings in flat arrays, and creates a
+    PostingList on request to group all occurrences of its term in a
+    specific file. Older index files also serialize PostingLists.
+
+    If the engine stores character offsets, `offsets` holds a `(start, end)`
+    character span for each entry in `postings`. Otherwise it is None.
     TODO: ~~MAKE INTO DATACLASS~~ Maintain sorted order via bisect()
     """
+    __slots__ = ('doc_id', 'postings', 'offsets')
+
     def __init__(
             self,
             doc_id: int,
             postings: typing.List[int] = None,
+            offsets: typing.List[typing.Tuple[int, int]] = None,
     ):
         self.doc_id = doc_id
         self.postings = postings if postings else []
+        self.offsets = offsets
 
     def append(
             self,
             term_position: int,
+            offset: typing.Tuple[int, int] = None,
     ):
         self.postings.append(term_position)
+        if offset is not None:
+            if self.offsets is None:
+                self.offsets = []
+            self.offsets.append(offset)
 
     def to_json(self):
         """Serializes to a dict which can be JSON-ified"""
-        return {
+        serialized = {
             'doc_id': self.doc_id,
             'postings': self.postings,
         }
+        if self.offsets is not None:
+            serialized['offsets'] = [list(offset) for offset in self.offsets]
+        return serialized
 
     @staticmethod
     def from_json(json_data) -> 'PostingList':
-        return PostingList(json_data['doc_id'], postings=json_data['postings'])
+        offsets = json_data.get('offsets')
+        return PostingList(
+            json_data['doc_id'],
+            postings=json_data['postings'],
+            offsets=[tuple(offset) for offset in offsets] if offsets is not None else None,
+        )
 
     def __repr__(self):
         return str(self.postings)
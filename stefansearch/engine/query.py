@@ -7,3 +7,55 @@ class ProcessedQuery:
     query: str
     terms: typing.List[str]
     term_counts: typing.Dict[str, int]
+
+
+@dc.dataclass
+class QueryStats:
+    """
+    Execution statistics of a call to `SearchEngine.search()`.
+
+    `search()` adds to the fields, so the same instance can be used to
+    accumulate statistics over several queries. Times are in seconds.
+    """
+    # Tokenizing, stopping and stemming the query
+    analysis_secs: float = 0.0
+    # Looking up the InvertedLists of the query terms
+    lookup_secs: float = 0.0
+    # Moving through the InvertedLists (excluding scoring)
+    traversal_secs: float = 0.0
+    # Calculating document scores
+    scoring_secs: float = 0.0
+    # Re-scoring the top results with the Reranker (if any)
+    rerank_secs: float = 0.0
+    # Sorting the results and looking up their slugs
+    formatting_secs: float = 0.0
+    # Number of query terms with an InvertedList
+    posting_lists_opened: int = 0
+    # Number of (term, document) postings that were scored
+    postings_visited: int = 0
+    documents_scored: int = 0
+    documents_reranked: int = 0
+    # Number of pushes, pops and replacements on the heap of InvertedList
+    # cursors during doc-at-a-time traversal (0 with a deadline)
+    heap_operations: int = 0
+
+    @property
+    def total_secs(self) -> float:
+        return (
+            self.analysis_secs + self.lookup_secs + self.traversal_secs +
+            self.scoring_secs + self.rerank_secs + self.formatting_secs
+        )
+
+
+@dc.dataclass
+class WarmupStats:
+    """What a call to `SearchEngine.warmup()` did."""
+    # Number of hot terms whose InvertedLists were loaded
+    terms_warmed: int = 0
+    # Number of top queries that were re-run
+    queries_run: int = 0
+    # Memory used by the InvertedLists that had to be deserialized
+    bytes_loaded: int = 0
+    seconds: float = 0.0
+    # Whether the time or memory budget ran out before finishing
+    budget_exhausted: bool = False
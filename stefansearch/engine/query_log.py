@@ -0,0 +1,63 @@
+import collections
+import json
+import os
+import pathlib
+import typing
+
+
+class QueryLog:
+    """
+    Rolling log of the most recent `max_entries` queries, along with the
+    processed terms of each. Used to find the hot terms and queries to
+    warm up when an index is opened.
+
+    The log can be read while another thread records queries.
+    """
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: typing.Deque[typing.Tuple[str, typing.List[str]]] = \
+            collections.deque(maxlen=max_entries)
+
+    def record(self, query: str, terms: typing.List[str]):
+        self._entries.append((query, terms))
+
+    def top_terms(self, n: int = None) -> typing.List[typing.Tuple[str, int]]:
+        """Return the `n` most frequent terms (all if None) and their counts, most frequent first."""
+        # Count over a snapshot: searches may record queries meanwhile
+        counts = collections.Counter(term for _, terms in list(self._entries) for term in terms)
+        return counts.most_common(n)
+
+    def top_queries(self, n: int = None) -> typing.List[typing.Tuple[str, int]]:
+        """Return the `n` most frequent queries (all if None) and their counts, most frequent first."""
+        return collections.Counter(query for query, _ in list(self._entries)).most_common(n)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self, path: pathlib.Path):
+        """Write the log to `path`. The file is replaced atomically, so readers never see a partial file."""
+        path = pathlib.Path(path)
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf8') as out:
+            json.dump(self.to_json(), out)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path: pathlib.Path, max_entries: int = 10000) -> 'QueryLog':
+        """Read the log saved at `path`, or return an empty log if there is none."""
+        try:
+            with open(path, encoding='utf8') as f:
+                return QueryLog.from_json(json.load(f), max_entries)
+        except FileNotFoundError:
+            return QueryLog(max_entries)
+
+    def to_json(self):
+        """Serializes to a list which can be JSON-ified"""
+        return [[query, terms] for query, terms in list(self._entries)]
+
+    @staticmethod
+    def from_json(json_data, max_entries: int = 10000) -> 'QueryLog':
+        query_log = QueryLog(max_entries)
+        for query, terms in json_data:
+            query_log.record(query, terms)
+        return query_log
@@ -0,0 +1,155 @@
+import os
+import pathlib
+import threading
+import typing
+import stefansearch.engine.query as q
+from stefansearch.engine.metadata_index import Filter
+from stefansearch.engine.metrics import MetricsRegistry
+from stefansearch.engine.query_log import QueryLog
+from stefansearch.engine.search_engine import Explanation, SearchEngine, SearchResults
+
+
+def _file_signature(path: pathlib.Path) -> typing.Optional[typing.Tuple[int, int, int]]:
+    """
+    Identify the version of the file at `path` without reading it. Commits
+    replace the file, so its inode changes even if its size and
+    modification time happen to stay the same.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class ReloadingSearchEngine:
+    """
+    Read-only view of an index that another process commits to, which
+    picks up new commits without restarting.
+
+    `check_for_update()` compares the index file's inode, size and
+    modification time to those of the loaded version, which costs a single
+    `stat()`. If the file changed, the new version is loaded into a fresh
+    `SearchEngine` (created with `engine_kwargs`) and swapped in as a
+    whole. Searches that are already running finish on the old engine.
+
+    `start()` checks every `poll_interval` seconds in a background thread.
+
+    The index file is JSON and has to be parsed in full on every reload.
+    Pass `lazy_load=True` to skip deserializing the InvertedLists until
+    they are searched. If the engine keeps a query log, it is carried over
+    to the new engine, and if `warmup` is True, the new engine is warmed
+    up with it before it is swapped in.
+    """
+    def __init__(
+            self,
+            filepath: pathlib.Path,
+            poll_interval: float = 1.0,
+            warmup: bool = True,
+            **engine_kwargs,
+    ):
+        if isinstance(filepath, str):
+            filepath = pathlib.Path(filepath)
+        self._filepath = filepath
+        self.poll_interval = poll_interval
+        self._warmup = warmup
+        self._engine_kwargs = dict(engine_kwargs)
+        # Share one registry between the engines, so metrics survive reloads
+        metrics = self._engine_kwargs.setdefault('metrics', MetricsRegistry())
+        self._reloads = metrics.counter('stefansearch_reloads_total', 'Times a newer index was loaded')
+        self._reload_errors = metrics.counter('stefansearch_reload_errors_total', 'Failed attempts to load a newer index')
+        self._reload_lock = threading.Lock()
+        self._signature = _file_signature(filepath)
+        self._engine = SearchEngine(filepath, **self._engine_kwargs)
+        self._stop_event = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @property
+    def engine(self) -> SearchEngine:
+        """The currently-loaded engine. Don't modify it."""
+        return self._engine
+
+    @property
+    def filepath(self) -> pathlib.Path:
+        return self._filepath
+
+    @property
+    def generation(self) -> int:
+        return self._engine.generation
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self._engine_kwargs['metrics']
+
+    def check_for_update(self) -> bool:
+        """Load the index file if it changed since it was last loaded. Returns whether it did."""
+        with self._reload_lock:
+            signature = _file_signature(self._filepath)
+            if signature == self._signature:
+                return False
+            engine = SearchEngine(self._filepath, **self._engine_kwargs)
+            old_engine = self._engine
+            if engine.query_log is not None:
+                # A copy, as searches on the old engine keep recording to its log
+                old_log = old_engine.query_log
+                engine.query_log = QueryLog.from_json(old_log.to_json(), old_log.max_entries)
+                if self._warmup:
+                    engine.warmup()
+            # Swap. Searches that already hold the old engine keep using it.
+            self._engine = engine
+            self._signature = signature
+            self._reloads.inc()
+            return True
+
+    def start(self):
+        """Start checking for updates every `poll_interval` seconds in a background thread."""
+        if self._thread is not None:
+            raise ValueError('Already started')
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll, name='stefansearch-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread, waiting for a running reload to finish."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.check_for_update()
+            except Exception:
+                # Keep serving the loaded version, and try again next time
+                self._reload_errors.inc()
+
+    def __enter__(self) -> 'ReloadingSearchEngine':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def num_docs(self) -> int:
+        return self._engine.num_docs
+
+    def has_document(self, file_id: str) -> bool:
+        return self._engine.has_document(file_id)
+
+    def search(
+            self,
+            query: str,
+            filter: Filter = None,
+            stats: q.QueryStats = None,
+            deadline_ms: float = None,
+    ) -> SearchResults:
+        """Run `SearchEngine.search()` on the current version of the index."""
+        return self._engine.search(query, filter=filter, stats=stats, deadline_ms=deadline_ms)
+
+    def explain(self, query: str, slug: str) -> Explanation:
+        return self._engine.explain(query, slug)
+
+    def suggest(self, prefix: str, k: int = None) -> typing.List[str]:
+        return self._engine.suggest(prefix, k)
@@ -1,17 +1,37 @@
+import concurrent.futures
+import functools
+import heapq
 import json
+import os
 import pathlib
+import threading
+import time
 import typing
 import dataclasses as dc
 from queue import PriorityQueue
-from stefansearch.engine.inverted_list import InvertedList
+from stefansearch.engine.inverted_list import GRANULARITIES, InvertedList
+from stefansearch.engine.dense_inverted_list import DenseInvertedList
 import stefansearch.engine.query as q
 # import simplesearch.engine.tokenizer as t
 from stefansearch.engine.stopper import Stopper
 from stefansearch.scoring.scorer import Scorer, TermScoreInfo, DocScoreInfo
 from stefansearch.scoring.ql import QlScorer
-from stefansearch.engine._helper import DocInfo, IntermediateResult
+from stefansearch.scoring.reranker import Reranker, RerankInfo
+from stefansearch.engine._helper import IntermediateResult
+from stefansearch.engine.doc_bitmap import DocBitmap
+from stefansearch.engine.completion import CompletionTrie
+from stefansearch.engine.doc_table import DocTable
+from stefansearch.engine.directory_sync import FileRecord, SyncReport, hash_files
+from stefansearch.engine.lazy_index import LazyIndex, decode_inverted_list
+from stefansearch.engine.query_log import QueryLog
+from stefansearch.engine.text_store import TextStore
+from stefansearch.engine.metadata_index import MetadataIndex, Filter
+from stefansearch.engine.memory import MemoryReport, deep_sizeof
+from stefansearch.engine.metrics import MetricsRegistry
+from stefansearch.engine.term_dictionary import TermDictionary
 from stefansearch.stemming.stemmer import Stemmer
 from stefansearch.stemming.porter_stemmer import PorterStemmer
+from stefansearch.stemming.caching_stemmer import CacheStats
 from stefansearch.tokenizing.tokenizer import Tokenizer
 from stefansearch.tokenizing.alphanumeric_tokenizer import AlphanumericTokenizer
 # TODO: DISTINGUISH BETWEEN DOCID (USER PROVIDED) AND DOCNUM (SEQUENTIALLY GENERATED)
@@ -23,6 +43,76 @@ class SearchResult:
     score: float
 
 
+class SearchResults(list):
+    """
+    The list of SearchResults returned by `search()`. `partial` is True if
+    the search ran out of time and the results only cover some of the
+    matching documents.
+    """
+    partial: bool = False
+
+
+@dc.dataclass
+class Snippet:
+    """
+    An excerpt of a document's text with the query terms highlighted.
+
+    `highlights` holds the `(start, end)` spans of the matched terms,
+    relative to `text`. `start` is the position of `text` in the document.
+    """
+    slug: str
+    text: str
+    start: int
+    highlights: typing.List[typing.Tuple[int, int]]
+
+    def to_marked(self, open_tag: str = '<b>', close_tag: str = '</b>') -> str:
+        """Return `text` with every highlight wrapped in the given tags."""
+        marked = []
+        prev_end = 0
+        for start, end in self.highlights:
+            marked.append(self.text[prev_end:start])
+            marked.append(open_tag + self.text[start:end] + close_tag)
+            prev_end = end
+        marked.append(self.text[prev_end:])
+        return ''.join(marked)
+
+
+@dc.dataclass
+class Explanation:
+    """
+    How a document's score for a query was calculated.
+
+    `term_infos` holds the data the scorer received for each query term
+    that occurs in the index, and `term_scores` the score that the term
+    would contribute on its own.
+    """
+    slug: str
+    score: float
+    term_infos: typing.Dict[str, TermScoreInfo]
+    term_scores: typing.Dict[str, float]
+
+
+def _instrumented(operation: str):
+    """
+    Decorates a SearchEngine method to record its latency, and the number
+    of exceptions it raises, in the engine's metrics.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            seconds, errors = self._operation_metrics[operation]
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            seconds.observe(time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+
 class SearchEngine:
     """
     SearchEngine implementation.
@@ -30,14 +120,17 @@ class SearchEngine:
     Note: You must call `commit()` to persist changes!
     """
     _filepath: pathlib.Path
+    # Number of commits of the index file (0 = never committed)
+    _generation: int
     _stopwords: typing.List[str]
-    # Map term to corresponding InvertedList. This is the inverted index.
-    _index: typing.Dict[str, InvertedList]
-    # Map doc_id to some information about the document
-    _doc_data: typing.Dict[int, DocInfo]
-    # Map file_id to doc_id
-    _doc_id_from_file_id: typing.Dict[str, int]
-    _num_docs: int
+    # Map term to term_id
+    _term_dict: TermDictionary
+    # InvertedLists indexed by term_id. This is the inverted index.
+    # Terms that occur in many documents may use a DenseInvertedList.
+    # Terms that no longer occur in any document have None.
+    _index: typing.List[typing.Optional[typing.Union[InvertedList, DenseInvertedList]]]
+    # Per-document data, indexed by doc_id. Also maps file_id to doc_id.
+    _doc_table: DocTable
     _num_terms: int
     # Default to `AlphaNumericTokenizer`
     _tokenizer: Tokenizer
@@ -47,6 +140,35 @@ class SearchEngine:
     _stemmer: Stemmer
     # Default to `QlSCorer`
     _scorer: Scorer
+    # Re-scores the top `_rerank_depth` results of each search (None = off)
+    _reranker: typing.Optional[Reranker]
+    _rerank_depth: int
+    # What is stored per document and term (see `GRANULARITIES`)
+    _granularity: str
+    # Whether to record character offsets and store document text
+    _store_offsets: bool
+    # Map doc_id to stored document text (only used if `_store_offsets`)
+    _text_store: TextStore
+    # Bitmaps of documents by metadata attribute value
+    _metadata_index: MetadataIndex
+    # Fraction of documents above which a term is stored densely (None = never)
+    _dense_threshold: typing.Optional[float]
+    # Number of documents below which no term is stored densely
+    _dense_min_docs: int
+    # Maximum number of tokens to memoize the stop+stem result for
+    _analysis_cache_size: int
+    # Memoized version of `_analyze_token()`
+    _cached_analyze_token: typing.Callable[[str], typing.Optional[str]]
+    # Files indexed by `index_directory()`, by slug
+    _file_records: typing.Dict[str, FileRecord]
+    # Top completions of every term prefix, as of the last commit (None = disabled)
+    _completions: typing.Optional[CompletionTrie]
+    _completion_size: int
+    # Rolling log of recent queries (None = disabled)
+    _query_log: typing.Optional[QueryLog]
+    _metrics: MetricsRegistry
+    # (latency Histogram, error Counter) of each instrumented operation
+    _operation_metrics: typing.Dict[str, typing.Tuple]
 
     @property
     def filepath(self) -> pathlib.Path:
@@ -54,89 +176,444 @@ class SearchEngine:
 
     @property
     def num_docs(self) -> int:
-        return self._num_docs
+        return len(self._doc_table)
+
+    @property
+    def generation(self) -> int:
+        """Number of times the index was committed, as of when it was opened (or last committed)."""
+        return self._generation
+
+    @property
+    def granularity(self) -> str:
+        return self._granularity
 
     @property
     def num_terms(self) -> int:
         return self._num_terms
 
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self._metrics
+
+    @property
+    def query_log(self) -> typing.Optional[QueryLog]:
+        return self._query_log
+
+    @query_log.setter
+    def query_log(self, query_log: QueryLog):
+        """Replace the query log, e.g. with one carried over from another engine."""
+        if self._query_log is None:
+            raise ValueError('The engine was created without a query log (`query_log_size` is 0)')
+        self._query_log = query_log
+
+    @property
+    def query_log_path(self) -> pathlib.Path:
+        """Path of the sidecar file the query log is saved to."""
+        return self._filepath.with_suffix('.querylog.json')
+
     def __init__(
             self,
             filepath: pathlib.Path,
             tokenizer: Tokenizer = None,
             stopper: Stopper = None,
             stemmer: Stemmer = None,
-            scorer: Scorer = None
+            scorer: Scorer = None,
+            store_offsets: bool = False,
+            dense_threshold: float = None,
+            dense_min_docs: int = 1000,
+            analysis_cache_size: int = 65536,
+            metrics: MetricsRegistry = None,
+            query_log_size: int = 0,
+            lazy_load: bool = False,
+            reranker: Reranker = None,
+            rerank_depth: int = 100,
+            completion_size: int = None,
+            granularity: str = None,
     ):
+        """
+        If `store_offsets` is True, the character offsets of every term
+        occurrence are recorded along with the indexed text, which
+        allows creating snippets via `highlight()`. This requires a
+        tokenizer with `supports_spans` (otherwise a ValueError is
+        raised). The setting is persisted in the index file
+        and is turned on automatically when opening an index that was
+        created with it. It can only be turned on while the index is
+        empty.
+
+        If `dense_threshold` is set, terms that occur in at least that
+        fraction of the documents are converted to a `DenseInvertedList`
+        (a doc-id bitmap plus term frequencies) when the index is opened
+        and on every `commit()`, provided the index holds at least
+        `dense_min_docs` documents. Dense terms whose fraction falls below
+        half of `dense_threshold` are converted back. Dense terms do not
+        store positions (and don't get them back when converted back), so
+        this can't be combined with `store_offsets` or a `reranker`.
+
+        The result of stopping and stemming each token is memoized in an
+        LRU cache of `analysis_cache_size` entries (0 disables it). Call
+        `clear_analysis_cache()` after replacing the stopper or stemmer.
+
+        The engine records metrics (latencies, error counts, and gauges
+        such as the number of documents) in `metrics`, or in a new
+        `MetricsRegistry` if none is given. See `metrics.export()`.
+
+        If `query_log_size` is positive, the engine keeps a `QueryLog` of
+        the last `query_log_size` queries. It is saved to `query_log_path`
+        on every `commit()` (or by `save_query_log()`) and loaded on open.
+        `warmup()` uses it to prepare the engine for the queries it is
+        likely to receive.
+
+        If `lazy_load` is True, InvertedLists are only deserialized when
+        they are first used, which makes opening faster. This can't be
+        combined with `dense_threshold`.
+
+        If a `reranker` is given, searches run in two phases: all matching
+        documents are scored with `scorer`, then the top `rerank_depth`
+        are re-scored and re-sorted with the (more expensive) reranker,
+        which has access to the positions of the query terms. The
+        remaining results follow in their first-phase order.
+
+        `granularity` selects what the index stores about each document
+        that contains a term: 'docs' (only that it does), 'freqs' (also
+        the number of occurrences) or 'positions' (also where they are;
+        the default). Less granular indexes are smaller, but re-ranking
+        and `store_offsets` need positions, and the included scorers need
+        frequencies (see `Scorer.needs_term_freqs`). The granularity is
+        persisted in the index file and can only be changed while the
+        index is empty.
+
+        If `completion_size` is positive, a `CompletionTrie` holding the
+        `completion_size` most frequent terms of every prefix is built on
+        every `commit()` and persisted in the index, for `suggest()`. If
+        it is None, the size the index was committed with is kept (which
+        is 0, i.e. no completions, for a new index).
+        """
+        open_start = time.perf_counter()
         if isinstance(filepath, str):
             filepath = pathlib.Path(filepath)
         if filepath.suffix != '.json':
             raise ValueError('The provided filepath must be of type ".json"')
+        if dense_threshold is not None and not 0 < dense_threshold <= 1:
+            raise ValueError('`dense_threshold` must be in (0, 1]')
+        if lazy_load and dense_threshold is not None:
+            raise ValueError('`dense_threshold` cannot be used with `lazy_load`')
+        if reranker is not None and dense_threshold is not None:
+            raise ValueError('`dense_threshold` cannot be used with `reranker`')
         self._filepath = filepath
-        self._index = self._marshall_index()
-        self._doc_data = self._marshall_doc_data()
-        self._file_id_to_doc_id = \
-            {doc_data.slug: doc_id for doc_id, doc_data in self._doc_data.items()}
-        self._num_docs = len(self._doc_data)
-        self._num_terms = sum(inv_list.num_postings for inv_list in self._index.values())
+        json_data = self._read_index_file()
+        self._generation = json_data.get('generation', 0)
+        self._term_dict, self._index = self._marshall_index(json_data, lazy_load)
+        self._doc_table = self._marshall_doc_table(json_data)
+        self._store_offsets = json_data.get('store_offsets', False)
+        if store_offsets and not self._store_offsets:
+            if len(self._doc_table):
+                raise ValueError('The index was created without `store_offsets`')
+            self._store_offsets = True
+        if self._store_offsets and dense_threshold is not None:
+            raise ValueError('`dense_threshold` cannot be used with `store_offsets`')
+        self._granularity = json_data.get('granularity', 'positions')
+        if granularity is not None and granularity != self._granularity:
+            if granularity not in GRANULARITIES:
+                raise ValueError(f'`granularity` must be one of {GRANULARITIES}')
+            if len(self._doc_table):
+                raise ValueError(f'The index was created with granularity "{self._granularity}"')
+            self._granularity = granularity
+        if self._store_offsets and self._granularity != 'positions':
+            raise ValueError('`store_offsets` requires granularity "positions"')
+        self._dense_threshold = dense_threshold
+        self._dense_min_docs = dense_min_docs
+        self._text_store = TextStore.from_json(json_data.get('doc_text', {}))
+        self._file_records = {
+            slug: FileRecord.from_json(record) for slug, record in json_data.get('files', {}).items()
+        }
+        self._metadata_index = MetadataIndex()
+        self._index_all_metadata()
+        if lazy_load or self._granularity == 'docs':
+            # Every occurrence of a term in a document is a posting
+            self._num_terms = sum(self._doc_table.lengths)
+        else:
+            self._num_terms = sum(inv_list.num_postings for inv_list in self._index if inv_list)
         self._tokenizer = tokenizer if tokenizer else AlphanumericTokenizer()
+        if self._store_offsets and not self._tokenizer.supports_spans:
+            raise ValueError(
+                f'`store_offsets` requires a tokenizer with `supports_spans`, '
+                f'which {type(self._tokenizer).__name__} does not have'
+            )
         self._stopper = stopper
         self._stemmer = stemmer if stemmer else PorterStemmer()
         self._scorer = scorer if scorer else QlScorer()
+        self._reranker = reranker
+        self._rerank_depth = rerank_depth
+        self._analysis_cache_size = analysis_cache_size
+        self.clear_analysis_cache()
+        self._apply_dense_threshold()
+        completions = json_data.get('completions')
+        if completion_size is None:
+            completion_size = completions['k'] if completions else 0
+        self._completion_size = completion_size
+        self._completions = None
+        if completion_size > 0:
+            if completions and completions['k'] == completion_size:
+                self._completions = CompletionTrie.from_json(completions)
+            else:
+                self._build_completions()
+        self._query_log = QueryLog.load(self.query_log_path, query_log_size) if query_log_size > 0 else None
+        self._metrics = metrics if metrics is not None else MetricsRegistry()
+        self._register_metrics()
+        self._metrics.histogram('stefansearch_open_seconds', 'Time to open the index').observe(
+            time.perf_counter() - open_start
+        )
 
-    def _marshall_index(self) -> typing.Dict[str, InvertedList]:
-        """Marshals inverted index from `filepath`."""
-        try:
-            with open(self._filepath, encoding='utf8') as f:
-                json_data = json.load(f)
-            # Iterate through the list of serialized InvertedLists.
-            # Deserialize each one and add it to the index dict under its term.
-            index = {}
-            for serialized_inv_list in json_data['index']:
-                inv_list = InvertedList.from_json(serialized_inv_list)
-                index[inv_list.term] = inv_list
-            return index
-        except FileNotFoundError:
-            # File not found: return empty
-            return {}
+    def _register_metrics(self):
+        operations = {
+            'index': 'index a document',
+            'remove': 'remove a document',
+            'commit': 'commit the index',
+            'search': 'run a search',
+        }
+        self._operation_metrics = {}
+        for operation, description in operations.items():
+            self._operation_metrics[operation] = (
+                self._metrics.histogram(f'stefansearch_{operation}_seconds', f'Time to {description}'),
+                self._metrics.counter(f'stefansearch_{operation}_errors_total', f'Failed attempts to {description}'),
+            )
+        gauges = {
+            'stefansearch_num_docs': ('Number of indexed documents', lambda: self.num_docs),
+            'stefansearch_num_terms': ('Number of term occurrences in the index', lambda: self.num_terms),
+            'stefansearch_vocabulary_size': (
+                'Number of distinct terms in the index',
+                # Don't deserialize the entries of a LazyIndex
+                lambda: sum(1 for inverted_list in list.__iter__(self._index) if inverted_list),
+            ),
+            'stefansearch_index_bytes': (
+                'Size of the index file',
+                lambda: self._filepath.stat().st_size if self._filepath.exists() else 0,
+            ),
+        }
+        for name, (description, function) in gauges.items():
+            self._metrics.gauge(name, description).set_function(function)
 
-    def _marshall_doc_data(self) -> typing.Dict[int, DocInfo]:
-        """Marshals doc_data from `filepath`."""
+    def _read_index_file(self) -> dict:
+        """Reads the serialized index at `filepath`. Returns an empty dict if there is none."""
         try:
             with open(self._filepath, encoding='utf8') as f:
-                json_data = json.load(f)
-            # Read in doc_data, and make sure to convert the doc_id keys to 'int'
-            doc_data = {}
-            for doc_id, doc_info in json_data['doc_data'].items():
-                doc_data[int(doc_id)] = DocInfo(doc_info['slug'], doc_info['num_terms'])
-            return doc_data
+                return json.load(f)
         except FileNotFoundError:
             # File not found: return empty
             return {}
 
+    @staticmethod
+    def _marshall_index(
+            json_data: dict,
+            lazy: bool = False,
+    ) -> typing.Tuple[TermDictionary, typing.List[typing.Union[InvertedList, DenseInvertedList, None]]]:
+        """
+        Marshals the term dictionary and inverted index from the serialized
+        index. If `lazy`, the index is a LazyIndex.
+        """
+        term_dict = TermDictionary.from_json(json_data.get('terms', []))
+        index = LazyIndex([None] * len(term_dict)) if lazy else [None] * len(term_dict)
+        # Iterate through the list of serialized InvertedLists.
+        # Deserialize each one and add it to the index under its term_id.
+        for serialized_inv_list in json_data.get('index', []):
+            if 'term' in serialized_inv_list:
+                # Older index files key InvertedLists by the term itself
+                serialized_inv_list['term_id'] = term_dict.add(serialized_inv_list['term'])
+                index.append(None)
+            if lazy:
+                index[serialized_inv_list['term_id']] = serialized_inv_list
+            else:
+                inv_list = decode_inverted_list(serialized_inv_list)
+                index[inv_list.term_id] = inv_list
+        return term_dict, index
+
+    def _apply_dense_threshold(self):
+        """
+        Convert the InvertedLists of terms above `_dense_threshold` to
+        DenseInvertedLists, and DenseInvertedLists of terms that fell well
+        below it back. The gap keeps terms near the threshold from being
+        converted back and forth.
+        """
+        if self._dense_threshold is None:
+            return
+        num_docs = len(self._doc_table)
+        min_docs = self._dense_threshold * num_docs
+        for term_id, inv_list in enumerate(self._index):
+            if isinstance(inv_list, InvertedList):
+                if num_docs >= self._dense_min_docs and inv_list.num_docs >= min_docs:
+                    self._index[term_id] = DenseInvertedList.from_inverted_list(inv_list)
+            elif isinstance(inv_list, DenseInvertedList) and inv_list.num_docs < min_docs / 2:
+                self._index[term_id] = inv_list.to_inverted_list()
+
+    @staticmethod
+    def _marshall_doc_table(json_data: dict) -> DocTable:
+        """Marshals the DocTable from the serialized index."""
+        if 'doc_table' in json_data:
+            return DocTable.from_json(json_data['doc_table'])
+        # Older index files store a `doc_data` dict instead
+        return DocTable.from_doc_data_json(json_data.get('doc_data', {}))
+
+    def _index_all_metadata(self):
+        """(Re)build the MetadataIndex from the DocTable."""
+        self._metadata_index = MetadataIndex()
+        for doc_id in self._doc_table.doc_ids():
+            metadata = self._doc_table.get_metadata(doc_id)
+            if metadata:
+                self._metadata_index.add_document(doc_id, metadata)
+
+    @_instrumented('commit')
     def commit(self):
         """
         Persist current state to `self.filepath`.
 
         Serialization is currently done in JSON. This is obviously not very
         performant, but is good enough for now.
+
+        The file is written to a temporary file that then replaces
+        `filepath`, so processes reading the index (see
+        `ReloadingSearchEngine`) never see a partially-written one.
+        Every commit increments `generation`.
         """
-        # TODO: THIS COULD BE CLEANER
-        doc_data = {
-            key: {
-                'slug': doc_data.slug,
-                'num_terms': doc_data.num_terms,
-            } for key, doc_data in self._doc_data.items()
+        self._apply_dense_threshold()
+        self._term_dict.freeze()
+        self._doc_table.freeze()
+        if isinstance(self._index, LazyIndex):
+            index = self._index.to_json()
+        else:
+            index = [inverted_index.to_json() for inverted_index in self._index if inverted_index]
+        serialized = {
+            'generation': self._generation + 1,
+            'doc_table': self._doc_table.to_json(),
+            'terms': self._term_dict.to_json(),
+            'index': index,
         }
-        index = [inverted_index.to_json() for inverted_index in self._index.values()]
-        serialized = {'doc_data': doc_data, 'index': index}
+        if self._store_offsets:
+            serialized['store_offsets'] = True
+            serialized['doc_text'] = self._text_store.to_json()
+        if self._file_records:
+            serialized['files'] = {slug: record.to_json() for slug, record in self._file_records.items()}
+        if self._granularity != 'positions':
+            serialized['granularity'] = self._granularity
+        if self._completion_size > 0:
+            self._build_completions()
+            serialized['completions'] = self._completions.to_json()
         # Dump json
-        with open(self.filepath, 'w+', encoding='utf8') as outfile:
+        temp_path = self._filepath.with_name(self._filepath.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf8') as outfile:
             json.dump(serialized, outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temp_path, self._filepath)
+        self._generation += 1
+        if self._query_log is not None:
+            self.save_query_log()
+
+    def _build_completions(self):
+        """Rebuild the CompletionTrie, ranking terms by their number of postings."""
+        def terms():
+            for term_id in range(len(self._index)):
+                if isinstance(self._index, LazyIndex):
+                    num_postings = self._index.num_postings(term_id)
+                else:
+                    inv_list = self._index[term_id]
+                    num_postings = inv_list.num_postings if inv_list else 0
+                if num_postings:
+                    yield term_id, self._term_dict.get_term(term_id), num_postings
+        self._completions = CompletionTrie.build(terms(), self._completion_size)
+
+    def suggest(self, prefix: str, k: int = None) -> typing.List[str]:
+        """
+        Return the `k` (at most `completion_size`) terms that start with
+        `prefix` and have the most postings, most frequent first.
+
+        Suggestions are indexed terms, i.e. the output of the stopper
+        and stemmer, and `prefix` is matched against them as-is. They
+        reflect the index as of the last `commit()` (or open).
+        """
+        if self._completions is None:
+            raise ValueError('Completions are disabled (completion_size=0)')
+        return [self._term_dict.get_term(term_id) for term_id in self._completions.suggest(prefix, k)]
+
+    def save_query_log(self):
+        """Save the query log to `query_log_path`."""
+        if self._query_log is None:
+            raise ValueError('The query log is disabled (query_log_size=0)')
+        self._query_log.save(self.query_log_path)
+
+    def warmup(
+            self,
+            num_terms: int = 1000,
+            num_queries: int = 100,
+            budget_seconds: float = None,
+            budget_bytes: int = None,
+    ) -> q.WarmupStats:
+        """
+        Prepare the engine for the queries recorded in the query log:
+        load the InvertedLists of the `num_terms` most frequent query
+        terms (hottest first), then re-run the `num_queries` most frequent
+        queries to fill the analysis and lookup caches.
+
+        Warming stops early once `budget_seconds` have passed or the
+        InvertedLists it had to deserialize (with `lazy_load`) use more
+        than `budget_bytes`. Re-run queries are not recorded in the log.
+        """
+        if self._query_log is None:
+            raise ValueError('warmup() requires a query log (query_log_size > 0)')
+        start = time.perf_counter()
+        stats = q.WarmupStats()
+
+        def budget_left() -> bool:
+            if budget_seconds is not None and time.perf_counter() - start >= budget_seconds:
+                return False
+            return budget_bytes is None or stats.bytes_loaded < budget_bytes
+
+        lazy = isinstance(self._index, LazyIndex)
+        for term, _ in self._query_log.top_terms(num_terms):
+            if not budget_left():
+                stats.budget_exhausted = True
+                break
+            term_id = self._term_dict.get_id(term)
+            if term_id is None or term_id >= len(self._index):
+                continue
+            was_decoded = not lazy or self._index.is_decoded(term_id)
+            inverted_list = self._index[term_id]
+            if inverted_list is not None:
+                stats.terms_warmed += 1
+                if not was_decoded:
+                    stats.bytes_loaded += deep_sizeof(inverted_list)
+
+        if not stats.budget_exhausted:
+            query_log, self._query_log = self._query_log, None
+            try:
+                for query, _ in query_log.top_queries(num_queries):
+                    if not budget_left():
+                        stats.budget_exhausted = True
+                        break
+                    self.search(query)
+                    stats.queries_run += 1
+            finally:
+                self._query_log = query_log
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def start_warmup(self, **kwargs) -> 'concurrent.futures.Future[q.WarmupStats]':
+        """
+        Run `warmup()` with the given arguments in a background thread.
+        The engine must not be used until the returned Future completes.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(self.warmup(**kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        threading.Thread(target=run, name='stefansearch-warmup', daemon=True).start()
+        return future
 
     def has_document(self, file_id: str) -> bool:
         """Return whether a document has already been indexed under the given `file_id`."""
-        return file_id in self._file_id_to_doc_id
+        return self._doc_table.get_doc_id(file_id) is not None
 
     def index_file(
             self,
@@ -144,46 +621,181 @@ class SearchEngine:
             file_id: str,
             encoding: str = None,
             allow_overwrite: bool = False,
+            metadata: typing.Dict[str, typing.Any] = None,
+            chunk_size: int = 1 << 20,
     ):
         """
         Reads the file at the specified path and registers it in the
         index under the provided `file_id`.
+
+        The file is streamed in chunks of `chunk_size` characters, so it
+        never needs to be held in memory as a whole.
         TODO: TEST WITH DIFFERENT ENCODINGS + ERROR HANDLING
         """
         with open(filepath, encoding=encoding) as f:
-            self.index_string(f.read(), file_id, allow_overwrite=allow_overwrite)
+            chunks = iter(lambda: f.read(chunk_size), '')
+            self.index_chunks(chunks, file_id, allow_overwrite=allow_overwrite, metadata=metadata)
+
+    def index_directory(
+            self,
+            root: pathlib.Path,
+            pattern: str = '*',
+            encoding: str = None,
+            make_slug: typing.Callable[[pathlib.Path], str] = None,
+            hash_workers: int = None,
+    ) -> SyncReport:
+        """
+        Synchronize the index with the files under `root` that match the
+        glob `pattern` (searched recursively, like `Path.rglob()`):
+        - New files are indexed
+        - Files whose content changed are re-indexed
+        - Files that were indexed from `root` by an earlier call, but
+          no longer exist or match, are removed
+
+        The size, modification time and SHA-256 of every indexed file are
+        recorded in the index. Files whose size and modification time are
+        unchanged are skipped without being read, and the remaining files
+        are hashed in `hash_workers` parallel threads, so a re-sync costs
+        time proportional to what changed.
+
+        Files that can't be decoded with `encoding` are skipped and listed
+        in `SyncReport.skipped`; if an earlier version of such a file was
+        indexed, it is kept.
+
+        Documents are indexed under `make_slug(path)`, which defaults to
+        the absolute path. Call `commit()` to persist the changes.
+        """
+        if isinstance(root, str):
+            root = pathlib.Path(root)
+        make_slug = make_slug if make_slug else lambda path: str(path.absolute())
+        root_id = str(root.absolute())
+        report = SyncReport()
+
+        # Find new and possibly-changed files
+        seen_slugs = set()
+        to_hash: typing.List[typing.Tuple[str, pathlib.Path, os.stat_result]] = []
+        for path in sorted(root.rglob(pattern)):
+            if not path.is_file():
+                continue
+            slug = make_slug(path)
+            seen_slugs.add(slug)
+            stat = path.stat()
+            record = self._file_records.get(slug)
+            if record and record.size == stat.st_size and record.mtime_ns == stat.st_mtime_ns \
+                    and self.has_document(slug):
+                report.unchanged += 1
+            else:
+                to_hash.append((slug, path, stat))
+
+        hashes = hash_files([path for _, path, _ in to_hash], hash_workers)
+        report.hashed = len(hashes)
+        for (slug, path, stat), sha256 in zip(to_hash, hashes):
+            record = self._file_records.get(slug)
+            if record and record.sha256 == sha256 and self.has_document(slug):
+                # Only the modification time changed
+                report.unchanged += 1
+            else:
+                is_update = self.has_document(slug)
+                try:
+                    self.index_file(path, slug, encoding=encoding, allow_overwrite=True)
+                except UnicodeDecodeError:
+                    # Keep any earlier version, and retry on the next sync
+                    report.skipped.append(slug)
+                    continue
+                (report.updated if is_update else report.added).append(slug)
+            self._file_records[slug] = FileRecord(str(path), root_id, stat.st_size, stat.st_mtime_ns, sha256)
+
+        # Remove files that are gone
+        for slug, record in list(self._file_records.items()):
+            if record.root == root_id and slug not in seen_slugs:
+                if self.has_document(slug):
+                    self.remove_document(slug)
+                self._file_records.pop(slug, None)
+                report.removed.append(slug)
+        return report
 
     def index_string(
             self,
             string: str,
             file_id: str,
             allow_overwrite: bool = False,
+            metadata: typing.Dict[str, typing.Any] = None,
     ):
-        """Indexes the given string, storing it under the specified `file_id`."""
+        """
+        Indexes the given string, storing it under the specified `file_id`.
+
+        `metadata` maps attribute names to values (which must be hashable
+        and JSON-serializable). They can be used to restrict searches via
+        the `filter` argument of `search()`.
+        """
+        self.index_chunks((string,), file_id, allow_overwrite=allow_overwrite, metadata=metadata)
+
+    @_instrumented('index')
+    def index_chunks(
+            self,
+            chunks: typing.Iterable[str],
+            file_id: str,
+            allow_overwrite: bool = False,
+            metadata: typing.Dict[str, typing.Any] = None,
+    ):
+        """
+        Indexes the text formed by concatenating `chunks` (e.g., a
+        generator of text read from a stream) and stores it under the
+        specified `file_id`. Tokens may span chunk boundaries.
+
+        Tokens are added to the index as the chunks are consumed, so
+        memory use is bounded by the chunk size, provided the tokenizer
+        overrides `tokenize_chunks()` (as the included tokenizers do). If
+        the engine stores offsets, the compressed text is kept in memory.
+
+        If consuming `chunks` raises an exception, the partially-indexed
+        document is removed again before the exception propagates. With
+        `allow_overwrite`, the previous version of the document is only
+        replaced once the new one is indexed, so it is kept in that case.
+
+        `metadata` values must be strings, numbers or booleans.
+        """
         # TODO: file_id should be the first argument
+        for attribute, value in (metadata or {}).items():
+            if not isinstance(value, (str, int, float, bool)):
+                raise ValueError(
+                    f'Metadata value of "{attribute}" must be a str, int, float or bool, not {type(value).__name__}'
+                )
         # Handle case where document with given file_id is already indexed
-        if self.has_document(file_id):
-            if allow_overwrite:
-                self.remove_document(file_id)
-            else:
-                raise ValueError('Document already indexed but allow_overwrite=False')
+        if self.has_document(file_id) and not allow_overwrite:
+            raise ValueError('Document already indexed but allow_overwrite=False')
 
-        doc_id = self._num_docs + 1
+        doc_id = self._doc_table.next_doc_id
         num_tokens = 0
-        for token in self._process_text(string):
-            # If token not in index, create an InvertedList for it
-            if token not in self._index:
-                self._index[token] = InvertedList(token)
-            # Register this document as having an occurrence of the
-            # token at the current word-position
-            self._index[token].add_posting(doc_id, num_tokens)
-            num_tokens += 1
-        # Update number of terms in the index and add entry to doc_data
+        if self._store_offsets:
+            tokens = self._process_chunk_spans(self._text_store.put_chunks(doc_id, chunks))
+        else:
+            tokens = ((token, None) for token in self._process_chunks(chunks))
+        try:
+            for token, offset in tokens:
+                term_id = self._term_dict.add(token)
+                # If token not in index, create an InvertedList for it
+                if term_id == len(self._index):
+                    self._index.append(InvertedList(term_id, granularity=self._granularity))
+                elif self._index[term_id] is None:
+                    self._index[term_id] = InvertedList(term_id, granularity=self._granularity)
+                # Register this document as having an occurrence of the
+                # token at the current word-position
+                self._index[term_id].add_posting(doc_id, num_tokens, offset)
+                num_tokens += 1
+        except BaseException:
+            self._remove_postings(doc_id)
+            self._text_store.remove(doc_id)
+            raise
+        if self.has_document(file_id):
+            self.remove_document(file_id)
+        # Update number of terms in the index and add entry to the DocTable
         self._num_terms += num_tokens
-        self._doc_data[doc_id] = DocInfo(file_id, num_tokens)
-        self._file_id_to_doc_id[file_id] = doc_id
-        self._num_docs += 1
+        self._doc_table.add(file_id, num_tokens, dict(metadata) if metadata else None)
+        if metadata:
+            self._metadata_index.add_document(doc_id, metadata)
 
+    @_instrumented('remove')
     def remove_document(self, file_id: str):
         """
         Removes document with specified `file_id` from index.
@@ -194,72 +806,414 @@ class SearchEngine:
         #  some serious improvements
         if not self.has_document(file_id):
             raise ValueError(f'No document with specified file_id "{file_id}"')
-        doc_id = self._file_id_to_doc_id[file_id]
-        # Note: create list(keys) to allow deletion during iteration
-        for term in list(self._index.keys()):
-            inverted_list = self._index[term]
-            if inverted_list.has_document(doc_id):
-                inverted_list.move_to(doc_id)
-                posting_list = inverted_list.posting_lists[inverted_list.curr_index]
-                inverted_list.num_docs -= 1
-                inverted_list.num_postings -= len(posting_list.postings)
-                del inverted_list.posting_lists[inverted_list.curr_index]
-                if inverted_list.num_docs == 0:
-                    del self._index[term]
-                else:
-                    inverted_list.reset_pointer()
-                    self._index[term] = inverted_list
-                self._num_terms -= len(posting_list.postings)
+        doc_id = self._doc_table.get_doc_id(file_id)
+        # Every token of the document was a posting (which granularity
+        # 'docs' doesn't count separately)
+        self._num_terms -= self._doc_table.lengths[doc_id]
+        self._remove_postings(doc_id)
         # Remove document from index
-        del self._doc_data[doc_id]
-        self._num_docs -= 1
+        metadata = self._doc_table.get_metadata(doc_id)
+        if metadata:
+            self._metadata_index.remove_document(doc_id, metadata)
+        self._doc_table.remove(doc_id)
+        self._text_store.remove(doc_id)
+        self._file_records.pop(file_id, None)
+
+    def compact(self):
+        """
+        Renumber the doc_ids of all documents so that they are dense
+        again. Removing documents leaves holes in the doc_id space,
+        because doc_ids are never reused.
+        """
+        mapping = self._doc_table.compact()
+        for inverted_list in self._index:
+            if inverted_list:
+                inverted_list.remap_doc_ids(mapping)
+        self._text_store.remap_doc_ids(mapping)
+        self._index_all_metadata()
+
+    def _remove_postings(self, doc_id: int) -> int:
+        """Remove all postings of `doc_id` from the index. Returns the number removed."""
+        total_removed = 0
+        for term_id, inverted_list in enumerate(self._index):
+            if inverted_list is None:
+                continue
+            num_removed = inverted_list.remove_document(doc_id)
+            if num_removed:
+                if inverted_list.num_docs == 0:
+                    self._index[term_id] = None
+                total_removed += num_removed
+        return total_removed
+
+    @_instrumented('search')
+    def search(
+            self,
+            query: str,
+            filter: Filter = None,
+            stats: q.QueryStats = None,
+            deadline_ms: float = None,
+    ) -> SearchResults:
+        """
+        Search for documents matching `query`.
+
+        `filter` optionally restricts the search to documents whose
+        metadata matches it, e.g. `{'play': 'hamlet'}`. See `Filter`.
+        Documents that don't match are skipped during traversal and are
+        never scored.
 
+        If `stats` is provided, the time spent in each phase of the search
+        and counts of the work done are added to it. Nothing is measured
+        otherwise.
 
-    def search(self, query: str) -> typing.List[SearchResult]:
+        If `deadline_ms` is given, the search stops scoring documents once
+        that many milliseconds have passed since it started, and returns
+        the results found so far with `partial` set. To make partial
+        results as good as possible, documents are then visited rarest
+        term first: all documents containing the rarest query term, then
+        the remaining ones containing the next-rarest term, and so on.
+        Every visited document is scored with all query terms, so scores
+        are the same as without a deadline. Partial results are not
+        re-ranked. (With a deadline, `stats` counts the time spent
+        scoring as traversal time.)
+        """
+        self._check_granularity(rerank=self._reranker is not None)
+        search_start = time.perf_counter()
+        deadline = search_start + deadline_ms / 1000 if deadline_ms is not None else None
+        if stats is not None:
+            phase_start = search_start
         results: PriorityQueue[IntermediateResult] = PriorityQueue()
         processed_query = self._process_query(query)
+        if self._query_log is not None:
+            self._query_log.record(query, processed_query.terms)
+        allowed_docs = self._metadata_index.compile(filter) if filter else None
+        if stats is not None:
+            phase_end = time.perf_counter()
+            stats.analysis_secs += phase_end - phase_start
+            phase_start = phase_end
 
-        # Retrieve InvertedLists corresponding to query terms
-        inverted_lists = \
-            [self._index[term] for term in processed_query.terms if term in self._index]
+        # Retrieve InvertedLists corresponding to query terms, along with
+        # the number of times each term occurs in the query
+        inverted_lists = []
+        query_freqs = []
+        for term in processed_query.terms:
+            inverted_list = self._get_inverted_list(term)
+            if inverted_list:
+                inverted_lists.append(inverted_list)
+                query_freqs.append(processed_query.term_counts[term])
         # Reset InvertedList pointers
         for inverted_list in inverted_lists:
             inverted_list.reset_pointer()
+        if stats is not None:
+            phase_end = time.perf_counter()
+            stats.lookup_secs += phase_end - phase_start
+            stats.posting_lists_opened += len(inverted_lists)
+            phase_start = phase_end
+            scoring_secs = 0.0
 
-        # Iterate over documents that contain at least one of the searched-for terms
-        while True:
-            remaining = [ilist for ilist in inverted_lists if not ilist.is_finished()]
-            if not remaining:
-                break
-            # Get the next-smallest doc_id in the selected InvertedLists
-            next_doc_id = min([ilist.get_curr_doc_id() for ilist in remaining])
-            # Now group on `next_doc_id`
-            score_infos: typing.List[TermScoreInfo] = []
-            for ilist in inverted_lists:
-                # Collect data required for scoring
-                score_infos.append(TermScoreInfo(
-                    ilist.term,
-                    qf=processed_query.term_counts[ilist.term],
-                    df=ilist.get_term_freq() if ilist.get_curr_doc_id() == next_doc_id else 0,
-                    cf=ilist.num_postings,
-                    nd=ilist.num_docs,
-                    nc=self._num_docs,
-                    dl=self._doc_data[next_doc_id].num_terms,
-                    dc=self.num_terms,
-                    avdl=self._num_terms / self._num_docs,
-                ))
-                ilist.move_to(next_doc_id + 1)
+        partial = False
+        if deadline is not None:
+            scores, partial = self._traverse_rarest_first(
+                inverted_lists, query_freqs, allowed_docs, deadline, stats,
+            )
+            # Insert in doc_id order, like `_traverse_doc_at_a_time()`, so that ties are ordered the same way
+            for doc_id in sorted(scores):
+                results.put(IntermediateResult(doc_id, scores[doc_id], self._scorer.to_sortable(scores[doc_id])))
+        else:
+            # Iterate over documents that contain at least one of the searched-for terms
+            scoring_secs = self._traverse_doc_at_a_time(inverted_lists, query_freqs, allowed_docs, results, stats)
+        if stats is None:
+            reranked = self._rerank(results, inverted_lists) if self._reranker and not partial else []
+            return self._format_results(results, reranked, partial)
+        phase_end = time.perf_counter()
+        stats.traversal_secs += phase_end - phase_start - scoring_secs
+        stats.scoring_secs += scoring_secs
+        stats.documents_scored += results.qsize()
+        reranked = []
+        if self._reranker and not partial:
+            reranked = self._rerank(results, inverted_lists)
+            stats.documents_reranked += len(reranked)
+            phase_start, phase_end = phase_end, time.perf_counter()
+            stats.rerank_secs += phase_end - phase_start
+        formatted_results = self._format_results(results, reranked, partial)
+        stats.formatting_secs += time.perf_counter() - phase_end
+        return formatted_results
+
+    def _check_granularity(self, rerank: bool):
+        """Raise a ValueError if the index doesn't store the data needed to search."""
+        if self._granularity == 'docs' and self._scorer.needs_term_freqs:
+            raise ValueError(
+                f'{type(self._scorer).__name__} requires term frequencies, '
+                'but the index was created with granularity "docs"'
+            )
+        if rerank and self._granularity != 'positions':
+            raise ValueError(
+                f'Re-ranking requires term positions, but the index was created with granularity "{self._granularity}"'
+            )
+
+    def _traverse_doc_at_a_time(
+            self,
+            inverted_lists: typing.List[typing.Union[InvertedList, DenseInvertedList]],
+            query_freqs: typing.List[int],
+            allowed_docs: typing.Optional[DocBitmap],
+            results: PriorityQueue,
+            stats: typing.Optional[q.QueryStats],
+    ) -> float:
+        """
+        Score every document that contains at least one of the query terms
+        (and passes `allowed_docs`), in doc_id order, and insert it into
+        `results`.
+
+        The cursors of the InvertedLists are kept in a heap keyed by their
+        current doc_id, so finding the next document and advancing the
+        cursors only touches the lists that contain it.
+
+        Returns the time spent in the scorer if `stats` is given, else 0.
+        """
+        num_docs = len(self._doc_table)
+        doc_lengths = self._doc_table.lengths
+        num_terms = self.num_terms
+        avg_doc_length = num_terms / num_docs if num_docs else 0.0
+        scoring_secs = 0.0
+        # The per-term fields of TermScoreInfo that don't depend on the document
+        term_fields = [
+            (ilist.term_id, query_freq, ilist.num_postings, ilist.num_docs)
+            for ilist, query_freq in zip(inverted_lists, query_freqs)
+        ]
+        # Frequency of each term in the current document
+        doc_freqs = [0] * len(inverted_lists)
+        # (current doc_id, index in `inverted_lists`) of every unfinished cursor
+        heap = [(ilist.get_curr_doc_id(), i) for i, ilist in enumerate(inverted_lists) if not ilist.is_finished()]
+        heapq.heapify(heap)
+        heap_operations = 0
+        while heap:
+            doc_id = heap[0][0]
+            if allowed_docs is not None:
+                # Skip ahead to the next document that passes the filter
+                allowed_doc_id = allowed_docs.next_doc(doc_id)
+                if allowed_doc_id is None:
+                    break
+                if allowed_doc_id != doc_id:
+                    while heap and heap[0][0] < allowed_doc_id:
+                        i = heap[0][1]
+                        ilist = inverted_lists[i]
+                        ilist.move_to(allowed_doc_id)
+                        if ilist.is_finished():
+                            heapq.heappop(heap)
+                        else:
+                            heapq.heapreplace(heap, (ilist.get_curr_doc_id(), i))
+                        heap_operations += 1
+                    continue
+            # Take the cursors positioned on `doc_id` off the heap
+            matched = []
+            while heap and heap[0][0] == doc_id:
+                i = heapq.heappop(heap)[1]
+                doc_freqs[i] = inverted_lists[i].get_term_freq()
+                matched.append(i)
+            heap_operations += len(matched)
+            doc_length = doc_lengths[doc_id]
+            score_infos = [
+                TermScoreInfo(
+                    term_id,
+                    qf=query_freq,
+                    df=doc_freq,
+                    cf=num_postings,
+                    nd=term_num_docs,
+                    nc=num_docs,
+                    dl=doc_length,
+                    dc=num_terms,
+                    avdl=avg_doc_length,
+                )
+                for (term_id, query_freq, num_postings, term_num_docs), doc_freq in zip(term_fields, doc_freqs)
+            ]
             # Calculate score and insert into `results`
-            score = self._scorer.calc_score(DocScoreInfo(score_infos))
-            results.put(IntermediateResult(next_doc_id, score, self._scorer.to_sortable(score)))
-        return self._format_results(results)
+            if stats is None:
+                score = self._scorer.calc_score(DocScoreInfo(score_infos))
+            else:
+                scoring_start = time.perf_counter()
+                score = self._scorer.calc_score(DocScoreInfo(score_infos))
+                scoring_secs += time.perf_counter() - scoring_start
+                stats.postings_visited += len(matched)
+            results.put(IntermediateResult(doc_id, score, self._scorer.to_sortable(score)))
+            # Advance the matched cursors and put them back on the heap
+            for i in matched:
+                doc_freqs[i] = 0
+                ilist = inverted_lists[i]
+                if ilist.move_to_next():
+                    heapq.heappush(heap, (ilist.get_curr_doc_id(), i))
+                    heap_operations += 1
+        if stats is not None:
+            stats.heap_operations += heap_operations
+        return scoring_secs
+
+    def _traverse_rarest_first(
+            self,
+            inverted_lists: typing.List[typing.Union[InvertedList, DenseInvertedList]],
+            query_freqs: typing.List[int],
+            allowed_docs: typing.Optional[DocBitmap],
+            deadline: float,
+            stats: typing.Optional[q.QueryStats],
+    ) -> typing.Tuple[typing.Dict[int, float], bool]:
+        """
+        Score the documents matching a query, visiting the documents of the
+        rarest term first, until `deadline` (a `time.perf_counter()` value).
+        Returns the score of each visited doc_id, and whether the deadline
+        was hit.
+        """
+        num_docs = len(self._doc_table)
+        doc_lengths = self._doc_table.lengths
+        avg_doc_length = self._num_terms / num_docs if num_docs else 0.0
+        scores: typing.Dict[int, float] = {}
+        for driver in sorted(inverted_lists, key=lambda ilist: ilist.num_docs):
+            # Documents increase within a pass, so the cursors only move forward
+            for ilist in inverted_lists:
+                ilist.reset_pointer()
+            while not driver.is_finished():
+                if time.perf_counter() >= deadline:
+                    return scores, True
+                doc_id = driver.get_curr_doc_id()
+                # Documents in `scores` contain a rarer term and were already scored
+                if doc_id not in scores and (allowed_docs is None or doc_id in allowed_docs):
+                    score_infos: typing.List[TermScoreInfo] = []
+                    for ilist, query_freq in zip(inverted_lists, query_freqs):
+                        found = ilist.move_to(doc_id)
+                        score_infos.append(TermScoreInfo(
+                            ilist.term_id,
+                            qf=query_freq,
+                            df=ilist.get_term_freq() if found else 0,
+                            cf=ilist.num_postings,
+                            nd=ilist.num_docs,
+                            nc=num_docs,
+                            dl=doc_lengths[doc_id],
+                            dc=self.num_terms,
+                            avdl=avg_doc_length,
+                        ))
+                    scores[doc_id] = self._scorer.calc_score(DocScoreInfo(score_infos))
+                    if stats is not None:
+                        stats.postings_visited += sum(1 for info in score_infos if info.df)
+                driver.move_to(doc_id + 1)
+        return scores, False
+
+    def _rerank(
+            self,
+            results: 'PriorityQueue[IntermediateResult]',
+            inverted_lists: typing.List[typing.Union[InvertedList, DenseInvertedList]],
+    ) -> typing.List[IntermediateResult]:
+        """
+        Remove the top `_rerank_depth` results from `results`, and return
+        them re-scored by the Reranker, in order.
+        """
+        if any(isinstance(ilist, DenseInvertedList) for ilist in inverted_lists):
+            raise ValueError('Re-ranking requires term positions, which DenseInvertedLists do not store')
+        reranked = []
+        while len(reranked) < self._rerank_depth and not results.empty():
+            result = results.get()
+            positions = []
+            for ilist in inverted_lists:
+                posting_list = ilist.get_posting_list(result.doc_id)
+                positions.append(posting_list.postings if posting_list else [])
+            score = self._reranker.calc_score(
+                RerankInfo(result.score, positions, self._doc_table.lengths[result.doc_id])
+            )
+            reranked.append(IntermediateResult(result.doc_id, score, self._scorer.to_sortable(score)))
+        # Stable, so ties keep their first-phase order
+        reranked.sort(key=lambda result: result.sortable_score)
+        return reranked
+
+    def explain(self, query: str, slug: str) -> Explanation:
+        """
+        Explain the score that the document `slug` receives for `query`,
+        term by term. The score equals the one `search()` calculates,
+        even if the document doesn't contain any of the query terms.
+        """
+        if not self.has_document(slug):
+            raise ValueError(f'No document with specified file_id "{slug}"')
+        self._check_granularity(rerank=False)
+        doc_id = self._doc_table.get_doc_id(slug)
+        processed_query = self._process_query(query)
+        num_docs = len(self._doc_table)
+        avg_doc_length = self._num_terms / num_docs if num_docs else 0.0
+        term_infos: typing.Dict[str, TermScoreInfo] = {}
+        term_scores: typing.Dict[str, float] = {}
+        for term in processed_query.terms:
+            ilist = self._get_inverted_list(term)
+            if not ilist:
+                continue
+            ilist.reset_pointer()
+            found = ilist.move_to(doc_id)
+            info = TermScoreInfo(
+                ilist.term_id,
+                qf=processed_query.term_counts[term],
+                df=ilist.get_term_freq() if found else 0,
+                cf=ilist.num_postings,
+                nd=ilist.num_docs,
+                nc=num_docs,
+                dl=self._doc_table.lengths[doc_id],
+                dc=self.num_terms,
+                avdl=avg_doc_length,
+            )
+            ilist.reset_pointer()
+            term_infos[term] = info
+            term_scores[term] = self._scorer.calc_score(DocScoreInfo([info]))
+        score = self._scorer.calc_score(DocScoreInfo(list(term_infos.values())))
+        return Explanation(slug, score, term_infos, term_scores)
+
+    def _get_inverted_list(
+            self,
+            term: str,
+    ) -> typing.Optional[typing.Union[InvertedList, DenseInvertedList]]:
+        """Return the InvertedList of `term`, or None if no document contains it."""
+        term_id = self._term_dict.get_id(term)
+        return self._index[term_id] if term_id is not None else None
+
+    def _analyze_token(self, token: str) -> typing.Optional[str]:
+        """Stops and stems a single token. Returns None if `token` is a stopword."""
+        if self._stopper and self._stopper.is_stopword(token):
+            return None
+        return self._stemmer.get_stem(token)
+
+    def clear_analysis_cache(self):
+        """Reset the memoized results of `_analyze_token()`."""
+        if self._analysis_cache_size > 0:
+            self._cached_analyze_token = \
+                functools.lru_cache(maxsize=self._analysis_cache_size)(self._analyze_token)
+        else:
+            self._cached_analyze_token = self._analyze_token
+
+    def analysis_cache_stats(self) -> typing.Optional[CacheStats]:
+        """Return usage statistics of the analysis cache, or None if it is disabled."""
+        if self._analysis_cache_size > 0:
+            return CacheStats.from_cache_info(self._cached_analyze_token.cache_info())
+        return None
 
     def _process_text(self, text: str) -> typing.Generator[str, None, None]:
         """A generator that tokenizes, stops, and stems the provided `text`"""
+        analyze = self._cached_analyze_token
         for token in self._tokenizer.tokenize_string(text):
-            if self._stopper and self._stopper.is_stopword(token):
-                continue
-            yield self._stemmer.get_stem(token)
+            term = analyze(token)
+            if term is not None:
+                yield term
+
+    def _process_chunks(self, chunks: typing.Iterable[str]) -> typing.Generator[str, None, None]:
+        """Like `_process_text()`, for the text formed by concatenating `chunks`."""
+        analyze = self._cached_analyze_token
+        for token in self._tokenizer.tokenize_chunks(chunks):
+            term = analyze(token)
+            if term is not None:
+                yield term
+
+    def _process_chunk_spans(
+            self,
+            chunks: typing.Iterable[str],
+    ) -> typing.Generator[typing.Tuple[str, typing.Tuple[int, int]], None, None]:
+        """
+        Like `_process_chunks()`, but yields `(term, (start, end))` tuples
+        where `(start, end)` is the character span of the original token.
+        """
+        analyze = self._cached_analyze_token
+        for token, start, end in self._tokenizer.tokenize_chunk_spans(chunks):
+            term = analyze(token)
+            if term is not None:
+                yield term, (start, end)
 
     def _process_query(self, query: str) -> q.ProcessedQuery:
         term_counts = {}
@@ -273,23 +1227,117 @@ class SearchEngine:
     def _format_results(
             self,
             results: 'PriorityQueue[IntermediateResult]',
-    ) -> typing.List[SearchResult]:
+            head: typing.List[IntermediateResult] = (),
+            partial: bool = False,
+    ) -> SearchResults:
         """
         Given a PriorityQueue of `IntermediateResult`, create and return
-        list of `FinalResult` (which are user-processable).
+        list of `FinalResult` (which are user-processable). The (already
+        sorted) results in `head` come first.
         """
-        formatted_results: typing.List[SearchResult] = []
+        formatted_results = SearchResults(
+            SearchResult(self._doc_table.get_slug(result.doc_id), result.score) for result in head
+        )
+        formatted_results.partial = partial
         while not results.empty():
             next_result = results.get()
             formatted_results.append(SearchResult(
-                self._doc_data[next_result.doc_id].slug,
+                self._doc_table.get_slug(next_result.doc_id),
                 next_result.score,
             ))
         return formatted_results
 
+    def highlight(
+            self,
+            result: SearchResult,
+            query: str,
+            snippet_length: int = 200,
+    ) -> Snippet:
+        """
+        Build a snippet of the document referenced by `result`, choosing
+        the window of `snippet_length` characters that contains the most
+        occurrences of the terms in `query`.
+
+        The snippet is built from the stored character offsets and text,
+        so the engine must have been created with `store_offsets=True`.
+        """
+        if not self._store_offsets:
+            raise ValueError('highlight() requires an engine created with store_offsets=True')
+        if not self.has_document(result.slug):
+            raise ValueError(f'No document with specified file_id "{result.slug}"')
+        doc_id = self._doc_table.get_doc_id(result.slug)
+        text = self._text_store.get(doc_id)
+        if text is None:
+            raise ValueError(f'No text was stored for document "{result.slug}"')
+
+        # Collect spans of all query-term occurrences in the document
+        spans: typing.List[typing.Tuple[int, int]] = []
+        for term in self._process_query(query).terms:
+            inverted_list = self._get_inverted_list(term)
+            if inverted_list:
+                posting_list = inverted_list.get_posting_list(doc_id)
+                if posting_list and posting_list.offsets:
+                    spans.extend(posting_list.offsets)
+        spans.sort()
+
+        # Slide a window over the spans and keep the one that fully
+        # contains the most of them. Windows start a little before their
+        # first span to give it some context.
+        lead = snippet_length // 4
+        best_start, best_count = 0, 0
+        last = 0
+        for first in range(len(spans)):
+            window_start = max(0, spans[first][0] - lead)
+            window_end = window_start + snippet_length
+            last = max(last, first)
+            while last < len(spans) and spans[last][1] <= window_end:
+                last += 1
+            if last - first > best_count:
+                best_start, best_count = window_start, last - first
+        snippet_end = min(len(text), best_start + snippet_length)
+        highlights = [
+            (start - best_start, end - best_start) for start, end in spans
+            if start >= best_start and end <= snippet_end
+        ]
+        return Snippet(result.slug, text[best_start:snippet_end], best_start, highlights)
+
+    def memory_report(self, top_n: int = 10) -> MemoryReport:
+        """
+        Measure the memory used by each component of the engine, and find
+        the `top_n` terms whose InvertedLists use the most memory. This
+        walks every object in the engine, so it is slow on large indexes.
+
+        LRU caches (e.g. the analysis cache) are not included. With
+        `lazy_load`, InvertedLists that haven't been used yet are measured
+        in their serialized form.
+        """
+        seen: typing.Set[int] = set()
+        components = {
+            'term_dict': deep_sizeof(self._term_dict, seen),
+            'index': deep_sizeof(self._index, seen),
+            'doc_table': deep_sizeof(self._doc_table, seen),
+            'text_store': deep_sizeof(self._text_store, seen),
+            'metadata_index': deep_sizeof(self._metadata_index, seen),
+        }
+        # Don't deserialize the entries of a LazyIndex
+        top_lists = heapq.nlargest(
+            top_n,
+            ((deep_sizeof(entry), term_id) for term_id, entry in enumerate(list.__iter__(self._index)) if entry),
+        )
+        return MemoryReport(
+            components,
+            [(self._term_dict.get_term(term_id), size) for size, term_id in top_lists],
+            self._num_terms,
+        )
+
     def clear_all_data(self):
         """Reset the search engine. Danger!"""
-        self._index = {}
-        self._doc_data = {}
-        self._num_docs = 0
+        self._term_dict = TermDictionary()
+        self._index = []
+        self._doc_table = DocTable()
+        self._text_store = TextStore()
+        self._metadata_index = MetadataIndex()
+        self._file_records = {}
         self._num_terms = 0
+        if self._completions is not None:
+            self._completions = CompletionTrie(self._completion_size)
@@ -0,0 +1,61 @@
+import typing
+from stefansearch.engine.front_coding import StringTable
+
+
+class TermDictionary:
+    """
+    Assigns dense integer ids to terms.
+
+    Ids are handed out sequentially starting at zero, in the order in which
+    terms are first added, and are never reused. This allows the index to
+    store InvertedLists in a list indexed by term id, so term strings only
+    need to be used when processing text.
+
+    The terms are stored in a front-coded `StringTable`. Call `freeze()`
+    (done on every commit) to move newly-added terms into the compact
+    front-coded store. Lookups of frozen terms go through an LRU cache of
+    `lookup_cache_size` entries.
+    """
+    def __init__(self, lookup_cache_size: int = 65536):
+        self._table = StringTable(lookup_cache_size=lookup_cache_size)
+        self._next_id = 0
+
+    def add(self, term: str) -> int:
+        """Return the id of `term`, assigning it a new id if it doesn't have one yet."""
+        term_id = self._table.get_id(term)
+        if term_id is None:
+            term_id = self._next_id
+            self._table.add(term, term_id)
+            self._next_id += 1
+        return term_id
+
+    def get_id(self, term: str) -> typing.Optional[int]:
+        """Return the id of `term`, or None if it has never been added."""
+        return self._table.get_id(term)
+
+    def get_term(self, term_id: int) -> str:
+        return self._table.get_string(term_id)
+
+    def freeze(self):
+        """Move all terms into the front-coded store."""
+        self._table.freeze()
+
+    def __len__(self) -> int:
+        return self._next_id
+
+    def to_json(self):
+        """Serializes to a dict which can be JSON-ified. Implies `freeze()`."""
+        return {'next_id': self._next_id, 'table': self._table.to_json()}
+
+    @staticmethod
+    def from_json(json_data, lookup_cache_size: int = 65536) -> 'TermDictionary':
+        term_dict = TermDictionary(lookup_cache_size)
+        if isinstance(json_data, list):
+            # Older index files store the list of terms, ordered by id
+            for term in json_data:
+                term_dict.add(term)
+            term_dict.freeze()
+        else:
+            term_dict._table = StringTable.from_json(json_data['table'], lookup_cache_size)
+            term_dict._next_id = json_data['next_id']
+        return term_dict
@@ -0,0 +1,68 @@
+import base64
+import typing
+import zlib
+
+
+class TextStore:
+    """
+    Stores the original text of indexed documents, keyed by doc_id.
+
+    Texts are kept zlib-compressed in memory and are only decompressed
+    when requested. This is used to build snippets from stored character
+    offsets without having to re-read the source files.
+    """
+    def __init__(self, compression_level: int = 6):
+        self._compression_level = compression_level
+        self._texts: typing.Dict[int, bytes] = {}
+
+    def put(self, doc_id: int, text: str):
+        self._texts[doc_id] = zlib.compress(text.encode('utf8'), self._compression_level)
+
+    def put_chunks(
+            self,
+            doc_id: int,
+            chunks: typing.Iterable[str],
+    ) -> typing.Generator[str, None, None]:
+        """
+        Pass `chunks` through while compressing them. The concatenated
+        text is stored under `doc_id` once the generator is exhausted.
+        """
+        compressor = zlib.compressobj(self._compression_level)
+        compressed = []
+        for chunk in chunks:
+            compressed.append(compressor.compress(chunk.encode('utf8')))
+            yield chunk
+        compressed.append(compressor.flush())
+        self._texts[doc_id] = b''.join(compressed)
+
+    def get(self, doc_id: int) -> typing.Optional[str]:
+        """Return the text stored for `doc_id`, or None if there isn't any."""
+        compressed = self._texts.get(doc_id)
+        return zlib.decompress(compressed).decode('utf8') if compressed is not None else None
+
+    def remove(self, doc_id: int):
+        self._texts.pop(doc_id, None)
+
+    def remap_doc_ids(self, mapping: typing.Dict[int, int]):
+        """Re-key the stored texts by `mapping[doc_id]`."""
+        self._texts = {mapping[doc_id]: compressed for doc_id, compressed in self._texts.items()}
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._texts
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def to_json(self):
+        """Serializes to a dict which can be JSON-ified"""
+        return {
+            str(doc_id): base64.b64encode(compressed).decode('ascii')
+            for doc_id, compressed in self._texts.items()
+        }
+
+    @staticmethod
+    def from_json(json_data) -> 'TextStore':
+        store = TextStore()
+        for doc_id, encoded in json_data.items():
+            store._texts[int(doc_id)] = base64.b64decode(encoded)
+        return store
@@ -0,0 +1,81 @@
+import abc
+import heapq
+import math
+import typing
+import dataclasses as dc
+
+
+@dc.dataclass
+class RerankInfo:
+    """Data used to re-rank a single candidate document."""
+    # Score that the document received from the (first-phase) Scorer
+    score: float
+    # Positions of each query term in the document, in query order.
+    # Empty for terms that don't occur in the document.
+    positions: typing.List[typing.List[int]]
+    # Number of terms in the document
+    dl: int
+
+
+class Reranker(abc.ABC):
+    """
+    Base class used to implement the second phase of a two-phase search,
+    which re-scores the top candidates of the first phase with a more
+    expensive ranking function.
+
+    Re-ranked scores are sorted with the first-phase Scorer's
+    `to_sortable()`, so they must use the same scale.
+    """
+    @abc.abstractmethod
+    def calc_score(self, info: RerankInfo) -> float:
+        """Calculate and return the new score of a candidate."""
+        pass
+
+
+def minimal_span(positions: typing.List[typing.List[int]]) -> typing.Optional[int]:
+    """
+    Return the length of the shortest window of positions that contains
+    at least one position from every (sorted, non-empty) list, or None
+    if `positions` is empty.
+    """
+    if not positions:
+        return None
+    # Heap of (position, list index, index in list) holding the current
+    # position of every list
+    heap = [(term_positions[0], i, 0) for i, term_positions in enumerate(positions)]
+    heapq.heapify(heap)
+    window_end = max(entry[0] for entry in heap)
+    best = window_end - heap[0][0] + 1
+    while True:
+        _, i, index = heapq.heappop(heap)
+        if index + 1 == len(positions[i]):
+            return best
+        next_position = positions[i][index + 1]
+        heapq.heappush(heap, (next_position, i, index + 1))
+        window_end = max(window_end, next_position)
+        best = min(best, window_end - heap[0][0] + 1)
+
+
+class MinimalSpanReranker(Reranker):
+    def __init__(self, weight: float = 1.0, alpha: float = 0.3):
+        """
+        Term proximity re-ranking based on the minimal span: the length of
+        the shortest passage that contains every query term found in the
+        document (see Tao & Zhai, "An Exploration of Proximity Measures
+        in Information Retrieval", 2007).
+
+        Adds `weight * log(alpha + exp(-span))` to the score, so documents
+        in which the query terms appear close together rank higher. If
+        fewer than two query terms occur in the document, the span is
+        taken to be the length of the document.
+        """
+        self.weight = weight
+        self.alpha = alpha
+
+    def calc_score(self, info: RerankInfo) -> float:
+        if len(info.positions) < 2:
+            # Proximity is meaningless for single-term queries
+            return info.score
+        present = [term_positions for term_positions in info.positions if term_positions]
+        span = minimal_span(present) if len(present) >= 2 else info.dl
+        return info.score + self.weight * math.log(self.alpha + math.exp(-span))
@@ -9,8 +9,8 @@ class TermScoreInfo:
     Data used to calculate a score for a single term of a query.
     TODO: IMPROVE VARIABLE NAMES
     """
-    # The actual term being scored
-    term: str
+    # Id of the term being scored (see `TermDictionary`)
+    term_id: int
     # Frequency of the term in the query
     qf: int
     # Frequency of the term in the document
@@ -40,7 +40,13 @@ class Scorer(abc.ABC):
     Base class used to implement a scorer that scores documents.
 
     A `Scorer` implementation must implement the `calc_score()` function.
+
+    Scorers that only use whether a document contains a term (and not
+    `TermScoreInfo.df`) can set `needs_term_freqs` to False, which allows
+    them to search indexes with granularity 'docs'.
     """
+    needs_term_freqs: bool = True
+
     @abc.abstractmethod
     def calc_score(self, info: DocScoreInfo) -> float:
         """Calculate and return score for a `DocScoreInfo` instance."""
@@ -0,0 +1,257 @@
+"""
+A small HTTP server that exposes a SearchEngine as a JSON API, built on
+asyncio and the standard library.
+
+Endpoints:
+- `GET /search?q=QUERY[&filter=JSON]` (or `POST /search` with a JSON body
+  `{"query": ..., "filter": ...}`): returns `{"results": [{"slug", "score"}]}`
+- `POST /documents` with a JSON body `{"slug", "text", ["metadata"],
+  ["allow_overwrite"]}`: indexes a document
+- `DELETE /documents?slug=SLUG`: removes a document
+- `POST /commit`: persists the index
+- `GET /health`
+
+Run it with `python -m stefansearch.server INDEX_PATH`.
+"""
+import asyncio
+import concurrent.futures
+import dataclasses as dc
+import json
+import pathlib
+import threading
+import typing
+import urllib.parse
+import click
+from stefansearch.engine.search_engine import SearchEngine
+
+
+_REASONS = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _check_type(value: typing.Any, expected: typing.Union[type, typing.Tuple[type, ...]], message: str):
+    """Raise a 400 HttpError with `message` unless `value` is an instance of `expected`."""
+    if not isinstance(value, expected):
+        raise HttpError(400, message)
+
+
+class SearchServer:
+    """
+    Serves a SearchEngine over HTTP.
+
+    Engine calls are CPU-bound, so they run on `executor` (by default a
+    single worker thread) to keep the event loop responsive. The engine
+    is not thread-safe, so calls are also serialized by a lock: only one
+    runs at a time, however many workers the executor has. The executor
+    must be thread-based (e.g. not a ProcessPoolExecutor), as the calls
+    share the engine.
+
+    Identical searches that arrive while one is already running share
+    its result instead of running again. At most `max_pending` engine
+    calls may be queued or running; further requests are rejected with
+    503 until the queue drains.
+    """
+    def __init__(
+            self,
+            engine: SearchEngine,
+            executor: concurrent.futures.Executor = None,
+            max_pending: int = 64,
+            max_body_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.engine = engine
+        self.max_pending = max_pending
+        self.max_body_bytes = max_body_bytes
+        self._executor = executor if executor else concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._engine_lock = threading.Lock()
+        self._num_pending = 0
+        # Futures of the searches that are running, by (query, filter)
+        self._in_flight: typing.Dict[typing.Tuple[str, str], asyncio.Future] = {}
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+
+    @property
+    def port(self) -> typing.Optional[int]:
+        """The port the server listens on (useful after starting on port 0)."""
+        return self._server.sockets[0].getsockname()[1] if self._server else None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _run(self, function: typing.Callable, *args, **kwargs):
+        """Run an engine call on the executor, applying backpressure."""
+        if self._num_pending >= self.max_pending:
+            raise HttpError(503, 'Too many pending requests')
+        self._num_pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._call_locked, function, args, kwargs,
+            )
+        finally:
+            self._num_pending -= 1
+
+    def _call_locked(self, function: typing.Callable, args, kwargs):
+        with self._engine_lock:
+            return function(*args, **kwargs)
+
+    async def search(self, query: str, filter: dict = None) -> typing.List[dict]:
+        """Run a search, or join an identical one that is already running."""
+        key = (query, json.dumps(filter, sort_keys=True))
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(self.engine.search, query, filter=filter))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        results = await asyncio.shield(future)
+        return [dc.asdict(result) for result in results]
+
+    def _remove_document(self, slug: str):
+        if not self.engine.has_document(slug):
+            raise HttpError(404, 'No document with slug "{}"'.format(slug))
+        self.engine.remove_document(slug)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                status, payload = await self._handle_request(reader)
+            except HttpError as e:
+                status, payload = e.status, {'error': e.message}
+            except ValueError as e:
+                status, payload = 400, {'error': str(e)}
+            except Exception as e:
+                status, payload = 500, {'error': repr(e)}
+            body = json.dumps(payload).encode('utf8')
+            headers = [
+                'HTTP/1.1 {} {}'.format(status, _REASONS.get(status, '')),
+                'Content-Type: application/json',
+                'Content-Length: {}'.format(len(body)),
+                'Connection: close',
+            ]
+            if status == 503:
+                headers.append('Retry-After: 1')
+            writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader: asyncio.StreamReader) -> typing.Tuple[int, typing.Any]:
+        request_line = (await reader.readline()).decode('latin-1').rstrip('\r\n')
+        parts = request_line.split(' ')
+        if len(parts) != 3:
+            raise HttpError(400, 'Malformed request line')
+        method, target, _ = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > self.max_body_bytes:
+            raise HttpError(413, 'Request body too large')
+        body = json.loads(await reader.readexactly(length)) if length else {}
+        url = urllib.parse.urlsplit(target)
+        params = {name: values[0] for name, values in urllib.parse.parse_qs(url.query).items()}
+        return await self._dispatch(method, url.path, params, body)
+
+    async def _dispatch(
+            self,
+            method: str,
+            path: str,
+            params: typing.Dict[str, str],
+            body: typing.Any,
+    ) -> typing.Tuple[int, typing.Any]:
+        _check_type(body, dict, 'The request body must be a JSON object')
+        if path == '/search':
+            if method == 'GET':
+                if 'q' not in params:
+                    raise HttpError(400, 'Missing parameter "q"')
+                filter = json.loads(params['filter']) if 'filter' in params else None
+                _check_type(filter, (dict, type(None)), 'Parameter "filter" must be a JSON object')
+                return 200, {'results': await self.search(params['q'], filter)}
+            if method == 'POST':
+                if 'query' not in body:
+                    raise HttpError(400, 'Missing field "query"')
+                _check_type(body['query'], str, 'Field "query" must be a string')
+                _check_type(body.get('filter'), (dict, type(None)), 'Field "filter" must be a JSON object')
+                return 200, {'results': await self.search(body['query'], body.get('filter'))}
+        elif path == '/documents':
+            if method == 'POST':
+                if 'slug' not in body or 'text' not in body:
+                    raise HttpError(400, 'Missing field "slug" or "text"')
+                _check_type(body['slug'], str, 'Field "slug" must be a string')
+                _check_type(body['text'], str, 'Field "text" must be a string')
+                _check_type(body.get('metadata'), (dict, type(None)), 'Field "metadata" must be a JSON object')
+                _check_type(body.get('allow_overwrite', False), bool, 'Field "allow_overwrite" must be a boolean')
+                await self._run(
+                    self.engine.index_string,
+                    body['text'],
+                    body['slug'],
+                    allow_overwrite=body.get('allow_overwrite', False),
+                    metadata=body.get('metadata'),
+                )
+                return 201, {'slug': body['slug']}
+            if method == 'DELETE':
+                if 'slug' not in params:
+                    raise HttpError(400, 'Missing parameter "slug"')
+                await self._run(self._remove_document, params['slug'])
+                return 200, {'slug': params['slug']}
+        elif path == '/commit':
+            if method == 'POST':
+                await self._run(self.engine.commit)
+                return 200, {}
+        elif path == '/health':
+            if method == 'GET':
+                return 200, {'num_docs': self.engine.num_docs, 'pending': self._num_pending}
+        else:
+            raise HttpError(404, 'Not found')
+        raise HttpError(405, 'Method not allowed')
+
+
+def run_server(
+        engine: SearchEngine,
+        host: str = '127.0.0.1',
+        port: int = 8080,
+        max_pending: int = 64,
+):
+    """Serve `engine` until interrupted."""
+    async def serve():
+        server = SearchServer(engine, max_pending=max_pending)
+        await server.start(host, port)
+        click.echo(f'Serving {engine.filepath} on http://{host}:{server.port}')
+        await server.serve_forever()
+    asyncio.run(serve())
+
+
+@click.command()
+@click.argument('index_path', type=click.Path(dir_okay=False, path_type=pathlib.Path))
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=8080, show_default=True)
+@click.option('--max-pending', default=64, show_default=True, help='Maximum number of queued engine calls')
+def main(index_path: pathlib.Path, host: str, port: int, max_pending: int):
+    """Serve the index at INDEX_PATH over HTTP."""
+    run_server(SearchEngine(index_path), host, port, max_pending)
+
+
+if __name__ == '__main__':
+    main()
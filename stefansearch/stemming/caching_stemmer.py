@@ -0,0 +1,44 @@
+import dataclasses as dc
+import functools
+from stefansearch.stemming.stemmer import Stemmer
+
+
+@dc.dataclass
+class CacheStats:
+    """Usage statistics of a bounded memoization cache."""
+    hits: int
+    misses: int
+    max_size: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @staticmethod
+    def from_cache_info(cache_info) -> 'CacheStats':
+        """Create from the `cache_info()` of a `functools.lru_cache`."""
+        return CacheStats(cache_info.hits, cache_info.misses, cache_info.maxsize, cache_info.currsize)
+
+
+class CachingStemmer(Stemmer):
+    """
+    Wraps any `Stemmer` and memoizes its results in a bounded LRU cache.
+
+    Natural-language vocabulary follows a Zipfian distribution, so a
+    cache of a few thousand entries will answer the vast majority of
+    calls to `get_stem()`.
+    """
+    def __init__(self, stemmer: Stemmer, max_size: int = 65536):
+        self.stemmer = stemmer
+        self._cached_get_stem = functools.lru_cache(maxsize=max_size)(stemmer.get_stem)
+
+    def get_stem(self, token: str) -> str:
+        return self._cached_get_stem(token)
+
+    def cache_stats(self) -> CacheStats:
+        return CacheStats.from_cache_info(self._cached_get_stem.cache_info())
+
+    def clear_cache(self):
+        self._cached_get_stem.cache_clear()
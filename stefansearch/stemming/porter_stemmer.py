@@ -18,7 +18,7 @@ class PorterStemmer(Stemmer):
             return term
         # Attempt sses, ied/ies, and s rules in order.
         # Use the first one that removes a suffix.
-        for rule in [PorterStemmer._p1a_sses, PorterStemmer._p1a_ied_ies, PorterStemmer._p1a_s]:
+        for rule in _RULES_1A:
             len_suffix, stemmed_word = rule(term)
             if len_suffix > 0:
                 return stemmed_word
@@ -75,7 +75,7 @@ class PorterStemmer(Stemmer):
         longest_suffix_rmvd = 0
         # Attempt eed/eedly, ed/edly/ing/ingly rules and track the
         # longest suffix removed
-        for rule in [PorterStemmer._p1b_eed_eedly, PorterStemmer._p1b_ed_edly_ing_ingly]:
+        for rule in _RULES_2A:
             len_suffix, stemmed_term = rule(term)
             if len_suffix > longest_suffix_rmvd:
                 longest_suffix_rmvd = len_suffix
@@ -158,3 +158,9 @@ class PorterStemmer(Stemmer):
                 return index
             index += 1
         return -1
+
+
+# Rules applied by `_porter_1a()` and `_porter_2a()`, in order.
+# Built once here rather than on every call.
+_RULES_1A = (PorterStemmer._p1a_sses, PorterStemmer._p1a_ied_ies, PorterStemmer._p1a_s)
+_RULES_2A = (PorterStemmer._p1b_eed_eedly, PorterStemmer._p1b_ed_edly_ing_ingly)
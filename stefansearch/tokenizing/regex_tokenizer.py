@@ -0,0 +1,80 @@
+import typing
+from stefansearch.tokenizing.tokenizer import Tokenizer
+
+
+class RegexTokenizer(Tokenizer):
+    """
+    Base class for tokenizers that extract tokens as the matches of a
+    compiled regular expression.
+
+    Subclasses set `_TOKEN_PATTERN`, which must match a maximal run of
+    token characters (i.e., a token can't be extended by appending
+    more text to it without the match growing).
+
+    Can optionally be configured to return lowercased-tokens via
+    the `lowercase` argument.
+    """
+    _TOKEN_PATTERN: typing.Pattern
+    supports_spans = True
+
+    def __init__(self, lowercase: bool = False):
+        self._make_lower = lowercase
+
+    def tokenize_string(self, string: str) -> typing.Generator[str, None, None]:
+        return self._tokenize_range(string, 0, len(string))
+
+    def _tokenize_range(self, string: str, start: int, end: int) -> typing.Generator[str, None, None]:
+        """Tokenize `string[start:end]` without copying it."""
+        # `findall()` does the whole scan in C, which is much faster than
+        # iterating over `finditer()` matches
+        tokens = self._TOKEN_PATTERN.findall(string, start, end)
+        if self._make_lower:
+            yield from map(str.lower, tokens)
+        else:
+            yield from tokens
+
+    def tokenize_spans(
+            self,
+            string: str,
+    ) -> typing.Generator[typing.Tuple[str, int, int], None, None]:
+        """
+        Return a generator that yields `(token, start, end)` tuples from
+        `string`, where `string[start:end]` is the text the token was
+        created from.
+        """
+        for match in self._TOKEN_PATTERN.finditer(string):
+            token = match.group()
+            yield token.lower() if self._make_lower else token, match.start(), match.end()
+
+    def tokenize_chunks(
+            self,
+            chunks: typing.Iterable[str],
+    ) -> typing.Generator[str, None, None]:
+        carry = ''
+        for chunk in chunks:
+            buffer = carry + chunk
+            # Hold back a token that runs up to the end of the buffer:
+            # it may continue in the next chunk
+            cut = self._find_cut(buffer)
+            yield from self._tokenize_range(buffer, 0, cut)
+            carry = buffer[cut:]
+        yield from self.tokenize_string(carry)
+
+    def _find_cut(self, buffer: str) -> int:
+        """
+        Return the start of the token that ends at the end of `buffer`,
+        or `len(buffer)` if there is none.
+        """
+        # Only the end of the buffer needs to be examined, so search
+        # backwards in steps of increasing size
+        step = 64
+        while True:
+            start = max(0, len(buffer) - step)
+            last_match = None
+            for last_match in self._TOKEN_PATTERN.finditer(buffer, start):
+                pass
+            if last_match is None or last_match.end() != len(buffer):
+                return len(buffer)
+            if last_match.start() > start or start == 0:
+                return last_match.start()
+            step *= 4
@@ -3,7 +3,16 @@ import abc
 
 
 class Tokenizer(abc.ABC):
-    """Base class used to implement a Tokenizer that splits text into tokens."""
+    """
+    Base class used to implement a Tokenizer that splits text into tokens.
+
+    Tokenizers that can report where each token came from set
+    `supports_spans` to True and implement `tokenize_spans()`. This is
+    only required when the `SearchEngine` is configured to store
+    character offsets.
+    """
+    supports_spans: bool = False
+
     @abc.abstractmethod
     def tokenize_string(
             self,
@@ -11,3 +20,45 @@ class Tokenizer(abc.ABC):
     ) -> typing.Generator[str, None, None]:
         """Return a generator that yields tokens from `string`."""
         pass
+
+    def tokenize_chunks(
+            self,
+            chunks: typing.Iterable[str],
+    ) -> typing.Generator[str, None, None]:
+        """
+        Return a generator that yields the tokens of the text formed by
+        concatenating `chunks`. Tokens may span chunk boundaries.
+
+        The default implementation simply joins the chunks. Override it
+        to tokenize with bounded memory.
+        """
+        yield from self.tokenize_string(''.join(chunks))
+
+    def tokenize_chunk_spans(
+            self,
+            chunks: typing.Iterable[str],
+    ) -> typing.Generator[typing.Tuple[str, int, int], None, None]:
+        """
+        Like `tokenize_spans()`, for the text formed by concatenating
+        `chunks`. Offsets are relative to the start of the whole text.
+        Requires `supports_spans`.
+
+        The default implementation calls `tokenize_spans()` on each chunk,
+        holding back a token that reaches the end of a chunk until the
+        next chunk shows whether it continues. This is correct for any
+        tokenizer whose tokens are maximal runs of token characters.
+        """
+        carry = ''
+        carry_start = 0
+        for chunk in chunks:
+            buffer = carry + chunk
+            spans = list(self.tokenize_spans(buffer))
+            cut = len(buffer)
+            if spans and spans[-1][2] == len(buffer):
+                cut = spans.pop()[1]
+            for token, start, end in spans:
+                yield token, carry_start + start, carry_start + end
+            carry = buffer[cut:]
+            carry_start += cut
+        for token, start, end in self.tokenize_spans(carry):
+            yield token, carry_start + start, carry_start + end
@@ -0,0 +1,17 @@
+import re
+from stefansearch.tokenizing.regex_tokenizer import RegexTokenizer
+
+
+class UnicodeTokenizer(RegexTokenizer):
+    """
+    A tokenizer that splits on non-alphanumeric characters, where
+    "alphanumeric" follows the Unicode definition. For example, "café"
+    and "Straße" are single tokens, whereas `AlphanumericTokenizer`
+    would split them at the non-ASCII characters.
+
+    Can optionally be configured to return lowercased-tokens via
+    the `lowercase` argument.
+    """
+    # `\w` matches Unicode letters, digits and the underscore.
+    # Exclude the underscore to match the behavior of `AlphanumericTokenizer`.
+    _TOKEN_PATTERN = re.compile(r'[^\W_]+')
@@ -0,0 +1,134 @@
+import json
+import pathlib
+from click.testing import CliRunner
+from stefansearch.cli import main
+from stefansearch.engine.search_engine import SearchEngine
+"""Test cases for the `stefansearch` command-line tool."""
+
+
+def make_index(tmp_path: pathlib.Path) -> pathlib.Path:
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / 'a.txt').write_text('APPLE BANANA APPLE', encoding='utf8')
+    (docs / 'b.txt').write_text('BANANA CARROT', encoding='utf8')
+    (docs / 'c.md').write_text('APPLE', encoding='utf8')
+    index_path = tmp_path / 'index.json'
+    result = CliRunner().invoke(main, ['index', str(index_path), str(docs), '--pattern', '*.txt'])
+    assert result.exit_code == 0, result.output
+    assert '2 added' in result.output
+    return index_path
+
+
+def test_index(tmp_path):
+    index_path = make_index(tmp_path)
+    engine = SearchEngine(index_path)
+    assert engine.num_docs == 2
+    assert engine.has_document(str((tmp_path / 'docs' / 'a.txt').absolute()))
+    # Re-running only syncs the changes
+    result = CliRunner().invoke(main, ['index', str(index_path), str(tmp_path / 'docs'), '--pattern', '*.txt'])
+    assert '0 added, 0 updated, 0 removed, 2 unchanged' in result.output
+
+
+def test_keeps_completions(tmp_path):
+    index_path = make_index(tmp_path)
+    docs = str(tmp_path / 'docs')
+    result = CliRunner().invoke(main, ['index', str(index_path), docs, '--completion-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert SearchEngine(index_path).suggest('A') == ['APPLE']
+    (tmp_path / 'docs' / 'd.txt').write_text('AVOCADO', encoding='utf8')
+    for args in (['index', str(index_path), docs], ['compact', str(index_path)]):
+        result = CliRunner().invoke(main, args)
+        assert result.exit_code == 0, result.output
+        assert SearchEngine(index_path).suggest('A') == ['APPLE', 'AVOCADO']
+
+
+def test_query(tmp_path):
+    index_path = make_index(tmp_path)
+    result = CliRunner().invoke(main, ['query', str(index_path), '--json', '--scorer', 'bm25'], input='APPLE\n\nBANANA\n')
+    assert result.exit_code == 0, result.output
+    lines = [json.loads(line) for line in result.output.splitlines()]
+    assert [line['query'] for line in lines] == ['APPLE', 'BANANA']
+    assert lines[0]['results'][0]['slug'].endswith('a.txt')
+    assert lines[1]['num_results'] == 2
+
+    result = CliRunner().invoke(main, ['query', str(index_path), '--top', '1'], input='BANANA\n')
+    assert result.exit_code == 0, result.output
+    assert '1 queries: p50' in result.output
+
+
+def test_docs_index_errors(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / 'a.txt').write_text('APPLE BANANA', encoding='utf8')
+    index_path = tmp_path / 'index.json'
+    result = CliRunner().invoke(main, ['index', str(index_path), str(docs), '--granularity', 'docs'])
+    assert result.exit_code == 0, result.output
+    # The included scorers need term frequencies, which a 'docs' index doesn't store
+    for command in ('query', 'profile', 'serve'):
+        result = CliRunner().invoke(main, [command, str(index_path)], input='APPLE\n')
+        assert result.exit_code == 1, result.output
+        assert isinstance(result.exception, SystemExit)
+        assert 'Error: --scorer ql requires term frequencies' in result.output
+
+
+def test_index_errors(tmp_path):
+    index_path = make_index(tmp_path)
+    docs = tmp_path / 'docs'
+    (docs / 'bad.txt').write_bytes(b'DATE \xff')
+    result = CliRunner().invoke(main, ['index', str(index_path), str(docs)])
+    assert result.exit_code == 0, result.output
+    assert f'Skipped {(docs / "bad.txt").absolute()}: not valid utf8' in result.output
+    assert '1 added, 0 updated, 0 removed, 2 unchanged, 1 skipped' in result.output
+    assert SearchEngine(index_path).num_docs == 3
+    # An index's granularity can't be changed
+    result = CliRunner().invoke(main, ['index', str(index_path), str(docs), '--granularity', 'docs'])
+    assert result.exit_code == 1, result.output
+    assert isinstance(result.exception, SystemExit)
+    assert f'Error: {index_path}: The index was created with granularity "positions"' in result.output
+
+
+def test_invalid_index_errors(tmp_path):
+    corrupt_path = tmp_path / 'corrupt.json'
+    corrupt_path.write_text('{"doc_table": ', encoding='utf8')
+    wrong_suffix_path = tmp_path / 'index.txt'
+    wrong_suffix_path.write_text('{}', encoding='utf8')
+    for command in ('stats', 'compact', 'query'):
+        for index_path in (corrupt_path, wrong_suffix_path):
+            result = CliRunner().invoke(main, [command, str(index_path)], input='APPLE\n')
+            assert result.exit_code == 1, result.output
+            assert isinstance(result.exception, SystemExit)
+            assert f'Error: {index_path}: ' in result.output
+
+
+def test_stats(tmp_path):
+    index_path = make_index(tmp_path)
+    result = CliRunner().invoke(main, ['stats', str(index_path)])
+    assert result.exit_code == 0, result.output
+    assert 'Documents:       2' in result.output
+    assert 'Terms:           3' in result.output
+    assert 'Postings:        5' in result.output
+
+
+def test_compact(tmp_path):
+    index_path = make_index(tmp_path)
+    engine = SearchEngine(index_path)
+    engine.remove_document(str((tmp_path / 'docs' / 'a.txt').absolute()))
+    engine.commit()
+    output = tmp_path / 'compacted.json'
+    result = CliRunner().invoke(main, ['compact', str(index_path), '--output', str(output)])
+    assert result.exit_code == 0, result.output
+    compacted = SearchEngine(output)
+    assert compacted.num_docs == 1
+    assert [result.slug for result in compacted.search('CARROT')] == [str((tmp_path / 'docs' / 'b.txt').absolute())]
+
+
+def test_profile(tmp_path):
+    index_path = make_index(tmp_path)
+    profile_path = tmp_path / 'query.prof'
+    result = CliRunner().invoke(
+        main, ['profile', str(index_path), '--repeat', '3', '--output', str(profile_path)], input='APPLE\nBANANA CARROT\n',
+    )
+    assert result.exit_code == 0, result.output
+    assert 'Ran 6 queries' in result.output
+    assert 'search' in result.output
+    assert profile_path.exists()
@@ -0,0 +1,82 @@
+import pytest
+from stefansearch.engine.completion import CompletionTrie
+from stefansearch.engine.search_engine import SearchEngine
+from util import create_engine
+"""Test cases for query autocompletion."""
+
+
+TERMS = [(0, 'CAT', 5), (1, 'CAR', 9), (2, 'CART', 2), (3, 'DOG', 7), (4, 'CA', 2)]
+
+
+def test_trie_suggest():
+    trie = CompletionTrie.build(TERMS, k=3)
+    assert trie.suggest('CA') == [1, 0, 4]
+    assert trie.suggest('CA', k=1) == [1]
+    assert trie.suggest('CART') == [2]
+    assert trie.suggest('') == [1, 3, 0]
+    assert trie.suggest('X') == []
+    assert trie.suggest('CARTS') == []
+
+
+def test_trie_json():
+    trie = CompletionTrie.build(TERMS, k=2)
+    loaded = CompletionTrie.from_json(trie.to_json())
+    assert len(loaded) == len(trie)
+    for prefix in ['', 'C', 'CA', 'CAR', 'CART', 'D', 'DOG']:
+        assert loaded.suggest(prefix) == trie.suggest(prefix)
+
+
+@pytest.fixture
+def engine() -> SearchEngine:
+    engine = create_engine(completion_size=2)
+    engine.index_string('APPLE APPLE APPLE APRICOT', '1')
+    engine.index_string('APRICOT APRICOT BANANA AVOCADO', '2')
+    engine.commit()
+    return engine
+
+
+def test_suggest(engine: SearchEngine):
+    # APRICOT and APPLE have 3 postings each; ties are ordered by term
+    assert engine.suggest('AP') == ['APPLE', 'APRICOT']
+    assert engine.suggest('A', k=1) == ['APPLE']
+    assert engine.suggest('AV') == ['AVOCADO']
+    assert engine.suggest('Z') == []
+
+
+def test_suggest_after_commit(engine: SearchEngine):
+    engine.remove_document('1')
+    # Suggestions are only updated on commit
+    assert engine.suggest('APP') == ['APPLE']
+    engine.commit()
+    assert engine.suggest('APP') == []
+    assert engine.suggest('A') == ['APRICOT', 'AVOCADO']
+
+
+@pytest.mark.parametrize('lazy_load', [False, True])
+def test_suggest_persistence(engine: SearchEngine, lazy_load: bool):
+    loaded = SearchEngine(engine.filepath, completion_size=2, lazy_load=lazy_load)
+    assert loaded.suggest('A') == engine.suggest('A')
+    loaded.commit()
+    if lazy_load:
+        # Rebuilding did not deserialize any InvertedList
+        assert loaded._index.num_decoded() == 0
+    # A different size rebuilds the trie on open
+    assert SearchEngine(engine.filepath, completion_size=1).suggest('A') == ['APPLE']
+
+
+def test_suggest_stored_size(engine: SearchEngine):
+    # Without `completion_size`, the stored completions are kept
+    loaded = SearchEngine(engine.filepath)
+    assert loaded.suggest('A') == engine.suggest('A')
+    loaded.index_string('AVOCADO AVOCADO AVOCADO AVOCADO', '3')
+    loaded.commit()
+    assert SearchEngine(loaded.filepath).suggest('A') == ['AVOCADO', 'APPLE']
+    # 0 drops them
+    SearchEngine(loaded.filepath, completion_size=0).commit()
+    with pytest.raises(ValueError):
+        SearchEngine(loaded.filepath).suggest('A')
+
+
+def test_suggest_disabled():
+    with pytest.raises(ValueError):
+        create_engine().suggest('A')
@@ -0,0 +1,55 @@
+import random
+import pytest
+from stefansearch.engine.query import QueryStats
+from stefansearch.scoring.bm25 import Bm25Scorer
+from util import create_engine
+"""Test cases for deadline-bounded search."""
+
+
+WORDS = ['APPLE', 'BANANA', 'CARROT', 'DATE', 'ELDERBERRY', 'FIG']
+
+
+@pytest.fixture(scope='module', params=['ql', 'bm25'])
+def engine(request):
+    engine = create_engine(scorer=Bm25Scorer() if request.param == 'bm25' else None)
+    rng = random.Random(0)
+    for i in range(300):
+        # Make earlier words more common
+        words = [rng.choice(WORDS[:rng.randint(1, len(WORDS))]) for _ in range(rng.randint(1, 20))]
+        engine.index_string(' '.join(words), str(i), metadata={'even': i % 2 == 0})
+    return engine
+
+
+@pytest.mark.parametrize('query', ['APPLE', 'APPLE FIG', 'BANANA DATE ELDERBERRY FIG', 'FIG FIG GRAPE'])
+def test_generous_deadline(engine, query):
+    """With enough time, results are identical to an unbounded search."""
+    expected = engine.search(query)
+    results = engine.search(query, deadline_ms=10_000)
+    assert results == expected
+    assert not results.partial
+    assert not expected.partial
+    filtered = engine.search(query, filter={'even': True}, deadline_ms=10_000)
+    assert filtered == engine.search(query, filter={'even': True})
+
+
+def test_expired_deadline(engine):
+    results = engine.search('APPLE FIG', deadline_ms=0)
+    assert results.partial
+    assert results == []
+
+
+def test_partial_results_are_rarest_first(engine, monkeypatch):
+    # Let the clock run out after a fixed number of documents
+    times = iter(range(1000))
+    monkeypatch.setattr('stefansearch.engine.search_engine.time.perf_counter', lambda: next(times) / 1000)
+    stats = QueryStats()
+    results = engine.search('APPLE FIG', deadline_ms=20, stats=stats)
+    monkeypatch.undo()
+    assert results.partial
+    assert 0 < len(results) < 20
+    full = {res.slug: res.score for res in engine.search('APPLE FIG')}
+    fig_docs = {res.slug for res in engine.search('FIG')}
+    for res in results:
+        # Scores are exact, and the documents of the rarer term come first
+        assert res.score == full[res.slug]
+        assert res.slug in fig_docs
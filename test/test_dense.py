@@ -0,0 +1,105 @@
+import random
+import pytest
+from stefansearch.engine.dense_inverted_list import DenseInvertedList
+from stefansearch.engine.inverted_list import InvertedList
+from stefansearch.engine.search_engine import SearchEngine
+from util import create_engine
+"""Test cases for the dense representation of high-frequency terms."""
+
+
+def make_documents(num_docs: int):
+    rng = random.Random(4472)
+    words = ['the', 'and', 'to', 'romeo', 'juliet', 'verona', 'night', 'sun', 'star', 'moon']
+    weights = [50, 40, 30, 3, 3, 1, 5, 2, 2, 2]
+    return [' '.join(rng.choices(words, weights, k=rng.randint(3, 30))) for _ in range(num_docs)]
+
+
+@pytest.fixture
+def documents():
+    return make_documents(200)
+
+
+def index_all(engine: SearchEngine, documents):
+    for i, document in enumerate(documents):
+        engine.index_string(document, str(i))
+
+
+def test_conversion(documents):
+    engine = create_engine(dense_threshold=0.5, dense_min_docs=100)
+    index_all(engine, documents)
+    engine.commit()
+    assert isinstance(engine._get_inverted_list('the'), DenseInvertedList)
+    assert isinstance(engine._get_inverted_list('verona'), InvertedList)
+    assert engine._get_inverted_list('the').num_postings == sum(doc.split().count('the') for doc in documents)
+
+
+def test_same_results(documents):
+    sparse_engine = create_engine()
+    dense_engine = create_engine(dense_threshold=0.5, dense_min_docs=100)
+    index_all(sparse_engine, documents)
+    index_all(dense_engine, documents)
+    dense_engine.commit()
+    for query in ['the sun and the moon', 'romeo and juliet', 'to', 'verona night']:
+        assert sparse_engine.search(query) == dense_engine.search(query)
+
+
+def test_remove_and_add(documents):
+    sparse_engine = create_engine()
+    dense_engine = create_engine(dense_threshold=0.5, dense_min_docs=100)
+    index_all(sparse_engine, documents)
+    index_all(dense_engine, documents)
+    dense_engine.commit()
+    for engine in (sparse_engine, dense_engine):
+        engine.remove_document('10')
+        engine.index_string('the night and the star', 'new')
+    assert sparse_engine.num_terms == dense_engine.num_terms
+    assert sparse_engine.search('the star') == dense_engine.search('the star')
+
+
+def test_serialization(documents):
+    engine = create_engine(dense_threshold=0.5, dense_min_docs=100)
+    index_all(engine, documents)
+    engine.commit()
+    marshalled_engine = SearchEngine(engine.filepath)
+    assert isinstance(marshalled_engine._get_inverted_list('the'), DenseInvertedList)
+    assert marshalled_engine.search('the moon') == engine.search('the moon')
+
+
+def test_offsets_not_supported():
+    with pytest.raises(ValueError):
+        create_engine(dense_threshold=0.5, store_offsets=True)
+
+
+def test_min_docs():
+    engine = create_engine(dense_threshold=0.5, dense_min_docs=100)
+    engine.index_string('zebra', 'zebra')
+    engine.commit()
+    # Every term of a tiny index is above the threshold
+    assert isinstance(engine._get_inverted_list('zebra'), InvertedList)
+    index_all(engine, make_documents(200))
+    engine.commit()
+    assert isinstance(engine._get_inverted_list('the'), DenseInvertedList)
+    assert isinstance(engine._get_inverted_list('zebra'), InvertedList)
+    assert engine._get_inverted_list('zebra').get_posting_list(0).postings == [0]
+
+
+def test_convert_back(documents):
+    sparse_engine = create_engine()
+    dense_engine = create_engine(dense_threshold=0.5, dense_min_docs=100)
+    for engine in (sparse_engine, dense_engine):
+        index_all(engine, documents)
+        engine.commit()
+    assert isinstance(dense_engine._get_inverted_list('the'), DenseInvertedList)
+    for engine in (sparse_engine, dense_engine):
+        for i in range(1000):
+            engine.index_string('sun', f'sun-{i}')
+        engine.commit()
+    # 'the' now occurs in less than a quarter of the documents
+    the_list = dense_engine._get_inverted_list('the')
+    assert isinstance(the_list, InvertedList)
+    assert the_list.num_postings == sparse_engine._get_inverted_list('the').num_postings
+    dense_engine.index_string('the end', 'end')
+    sparse_engine.index_string('the end', 'end')
+    assert dense_engine.search('the moon') == sparse_engine.search('the moon')
+    dense_engine.commit()
+    assert SearchEngine(dense_engine.filepath).search('the end') == sparse_engine.search('the end')
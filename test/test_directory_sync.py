@@ -0,0 +1,119 @@
+import os
+import pathlib
+from stefansearch.engine.directory_sync import hash_file, hash_files
+from stefansearch.engine.search_engine import SearchEngine
+from util import create_engine
+"""Test cases for incremental directory syncing."""
+
+
+def make_files(root: pathlib.Path, files: dict):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf8')
+
+
+def slugs(engine: SearchEngine, query: str):
+    return sorted(result.slug for result in engine.search(query))
+
+
+def test_hash_files(tmp_path):
+    make_files(tmp_path, {'a.txt': 'APPLE', 'b.txt': 'BANANA', 'c.txt': 'APPLE'})
+    paths = [tmp_path / name for name in ['a.txt', 'b.txt', 'c.txt']]
+    hashes = hash_files(paths, max_workers=2)
+    assert hashes == [hash_file(path) for path in paths]
+    assert hashes[0] == hashes[2] != hashes[1]
+
+
+def test_sync(tmp_path):
+    make_files(tmp_path, {'a.txt': 'APPLE BANANA', 'sub/b.txt': 'CARROT', 'c.md': 'APPLE'})
+    engine = create_engine()
+    report = engine.index_directory(tmp_path, '*.txt', make_slug=lambda path: path.name)
+    assert sorted(report.added) == ['a.txt', 'b.txt']
+    assert report.hashed == 2
+    assert slugs(engine, 'APPLE') == ['a.txt']
+
+    # Nothing changed: no file is read
+    report = engine.index_directory(tmp_path, '*.txt', make_slug=lambda path: path.name)
+    assert (report.added, report.updated, report.removed) == ([], [], [])
+    assert report.unchanged == 2 and report.hashed == 0
+
+    # Modify one file, delete the other and add a third
+    make_files(tmp_path, {'a.txt': 'DATE', 'd.txt': 'CARROT'})
+    (tmp_path / 'sub' / 'b.txt').unlink()
+    report = engine.index_directory(tmp_path, '*.txt', make_slug=lambda path: path.name)
+    assert report.added == ['d.txt']
+    assert report.updated == ['a.txt']
+    assert report.removed == ['b.txt']
+    assert slugs(engine, 'APPLE') == []
+    assert slugs(engine, 'DATE') == ['a.txt']
+    assert slugs(engine, 'CARROT') == ['d.txt']
+
+
+def test_sync_touched(tmp_path):
+    make_files(tmp_path, {'a.txt': 'APPLE'})
+    engine = create_engine()
+    engine.index_directory(tmp_path)
+    stat = (tmp_path / 'a.txt').stat()
+    os.utime(tmp_path / 'a.txt', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    # The file is hashed, but not re-indexed
+    report = engine.index_directory(tmp_path)
+    assert report.hashed == 1 and report.unchanged == 1
+    assert report.updated == []
+    # The new modification time was recorded
+    assert engine.index_directory(tmp_path).hashed == 0
+
+
+def test_sync_other_documents(tmp_path):
+    make_files(tmp_path, {'a.txt': 'APPLE'})
+    engine = create_engine()
+    engine.index_string('APPLE', 'other')
+    engine.index_directory(tmp_path, make_slug=lambda path: path.name)
+    (tmp_path / 'a.txt').unlink()
+    # Only documents from the synced directory are removed
+    report = engine.index_directory(tmp_path, make_slug=lambda path: path.name)
+    assert report.removed == ['a.txt']
+    assert slugs(engine, 'APPLE') == ['other']
+
+
+def test_sync_remove_document(tmp_path):
+    make_files(tmp_path, {'a.txt': 'APPLE'})
+    engine = create_engine()
+    engine.index_directory(tmp_path, make_slug=lambda path: path.name)
+    engine.remove_document('a.txt')
+    # The record was dropped with the document, so the file is indexed again
+    report = engine.index_directory(tmp_path, make_slug=lambda path: path.name)
+    assert report.added == ['a.txt']
+    assert slugs(engine, 'APPLE') == ['a.txt']
+
+
+def test_sync_persistence(tmp_path):
+    docs = tmp_path / 'docs'
+    make_files(docs, {'a.txt': 'APPLE', 'b.txt': 'BANANA'})
+    engine = create_engine()
+    engine.index_directory(docs)
+    engine.commit()
+
+    engine = SearchEngine(engine.filepath)
+    report = engine.index_directory(docs)
+    assert report.unchanged == 2 and report.hashed == 0
+    (docs / 'b.txt').unlink()
+    assert engine.index_directory(docs).removed == [str((docs / 'b.txt').absolute())]
+
+
+def test_sync_undecodable(tmp_path):
+    make_files(tmp_path, {'a.txt': 'APPLE', 'b.txt': 'BANANA'})
+    engine = create_engine()
+    engine.index_directory(tmp_path, make_slug=lambda path: path.name)
+    (tmp_path / 'b.txt').write_bytes(b'CARROT \xff')
+    (tmp_path / 'c.txt').write_bytes(b'DATE \xff')
+    report = engine.index_directory(tmp_path, make_slug=lambda path: path.name)
+    assert report.skipped == ['b.txt', 'c.txt']
+    assert (report.added, report.updated, report.removed) == ([], [], [])
+    # The earlier version of b.txt is kept
+    assert slugs(engine, 'BANANA') == ['b.txt']
+    assert not engine.has_document('c.txt')
+    # Skipped files are retried
+    make_files(tmp_path, {'b.txt': 'CARROT'})
+    report = engine.index_directory(tmp_path, make_slug=lambda path: path.name)
+    assert report.updated == ['b.txt'] and report.skipped == ['c.txt']
@@ -0,0 +1,69 @@
+from stefansearch.engine.doc_table import DocTable
+from stefansearch.engine.search_engine import SearchEngine
+from util import create_engine
+"""Test cases for the DocTable and doc_id allocation."""
+
+
+def test_allocation():
+    table = DocTable()
+    assert table.add('a', 3) == 0
+    assert table.add('b', 5, {'kind': 'play'}) == 1
+    table.remove(0)
+    # doc_ids are never reused
+    assert table.add('c', 7) == 2
+    assert len(table) == 2
+    assert list(table.doc_ids()) == [1, 2]
+    assert table.get_doc_id('a') is None
+    assert table.get_doc_id('c') == 2
+    assert table.get_slug(1) == 'b'
+    assert table.get_metadata(1) == {'kind': 'play'}
+    assert list(table.lengths) == [0, 5, 7]
+
+
+def test_compact():
+    table = DocTable()
+    for slug in ['a', 'b', 'c', 'd']:
+        table.add(slug, len(slug))
+    table.remove(0)
+    table.remove(2)
+    assert table.compact() == {1: 0, 3: 1}
+    assert table.next_doc_id == 2
+    assert [table.get_slug(doc_id) for doc_id in table.doc_ids()] == ['b', 'd']
+    assert table.get_doc_id('d') == 1
+
+
+def test_serialization():
+    table = DocTable()
+    for slug in ['a', 'b', 'c']:
+        table.add(slug, len(slug), {'slug': slug})
+    table.remove(1)
+    marshalled = DocTable.from_json(table.to_json())
+    assert marshalled.to_json() == table.to_json()
+    assert marshalled.next_doc_id == 3
+    assert marshalled.get_doc_id('c') == 2
+
+
+def test_no_doc_id_collision():
+    engine = create_engine()
+    engine.index_string('APPLE BANANA', '1')
+    engine.index_string('CARROT', '2')
+    engine.index_string('APPLE', '3')
+    engine.remove_document('1')
+    engine.index_string('APPLE DATE', '4')
+    assert sorted(res.slug for res in engine.search('APPLE')) == ['3', '4']
+    assert [res.slug for res in engine.search('CARROT')] == ['2']
+
+
+def test_engine_compact():
+    engine = create_engine(store_offsets=True)
+    for i in range(10):
+        engine.index_string('APPLE ' * i + 'BANANA', str(i), metadata={'even': i % 2 == 0})
+    for i in range(0, 10, 3):
+        engine.remove_document(str(i))
+    results = engine.search('APPLE BANANA')
+    engine.compact()
+    assert engine._doc_table.next_doc_id == engine.num_docs
+    assert engine.search('APPLE BANANA') == results
+    assert [res.slug for res in engine.search('APPLE', filter={'even': True})] == ['8', '4', '2']
+    engine.commit()
+    assert SearchEngine(engine.filepath).search('APPLE BANANA') == results
@@ -0,0 +1,110 @@
+import pytest
+from stefansearch.engine.doc_bitmap import DocBitmap
+from stefansearch.engine.search_engine import SearchEngine
+from util import create_engine
+"""Test cases for metadata filters."""
+
+
+@pytest.fixture
+def test_engine() -> SearchEngine:
+    engine = create_engine()
+    engine.index_string('to be or not to be', 'hamlet-1', metadata={'play': 'hamlet', 'act': 3})
+    engine.index_string('something is rotten in denmark', 'hamlet-2', metadata={'play': 'hamlet', 'act': 1})
+    engine.index_string('out damned spot out I say', 'macbeth-1', metadata={'play': 'macbeth', 'act': 5})
+    engine.index_string('to be king hereafter', 'macbeth-2', metadata={'play': 'macbeth', 'act': 1})
+    engine.index_string('to be or not', 'sonnet-1')
+    return engine
+
+
+def test_bitmap():
+    bitmap = DocBitmap.from_doc_ids([1, 5, 64, 200])
+    assert list(bitmap) == [1, 5, 64, 200]
+    assert len(bitmap) == 4
+    assert bitmap.next_doc(0) == 1
+    assert bitmap.next_doc(6) == 64
+    assert bitmap.next_doc(201) is None
+    assert DocBitmap.from_json(bitmap.to_json()) == bitmap
+
+
+def test_bitmap_words():
+    bitmap = DocBitmap.from_doc_ids([0, 63, 64, 1000])
+    assert [bitmap.next_doc(doc_id) for doc_id in (0, 1, 64, 65, 1000, 1001)] == [0, 63, 64, 1000, 1000, None]
+    bitmap.remove(64)
+    bitmap.remove(5000)
+    assert list(bitmap) == [0, 63, 1000]
+    assert 63 in bitmap and 64 not in bitmap and 5000 not in bitmap
+    other = DocBitmap.from_doc_ids([63, 70])
+    assert list(bitmap & other) == [63]
+    assert list(bitmap | other) == [0, 63, 70, 1000]
+    assert list(bitmap - other) == [0, 1000]
+    assert list(other - bitmap) == [70]
+    # Trailing empty words don't matter
+    bitmap.remove(1000)
+    assert bitmap == DocBitmap.from_doc_ids([0, 63])
+    assert bitmap.to_json() == '8000000000000001'
+    assert not DocBitmap.from_json('0')
+
+
+def test_no_filter(test_engine):
+    slugs = {res.slug for res in test_engine.search('to be')}
+    assert slugs == {'hamlet-1', 'macbeth-2', 'sonnet-1'}
+
+
+def test_filter(test_engine):
+    slugs = {res.slug for res in test_engine.search('to be', filter={'play': 'macbeth'})}
+    assert slugs == {'macbeth-2'}
+
+
+def test_filter_any_of(test_engine):
+    res = test_engine.search('to be', filter={'play': ['hamlet', 'macbeth'], 'act': [1, 3]})
+    assert {r.slug for r in res} == {'hamlet-1', 'macbeth-2'}
+
+
+def test_filter_no_match(test_engine):
+    assert test_engine.search('to be', filter={'play': 'lear'}) == []
+
+
+def test_filter_after_remove(test_engine):
+    test_engine.remove_document('macbeth-2')
+    assert test_engine.search('to be', filter={'play': 'macbeth'}) == []
+
+
+def test_filter_types():
+    engine = create_engine()
+    engine.index_string('to be', 'bool', metadata={'n': True})
+    engine.index_string('to be', 'int', metadata={'n': 1})
+    engine.index_string('to be', 'float', metadata={'n': 1.0})
+    engine.index_string('to be', 'str', metadata={'n': '1'})
+    assert {res.slug for res in engine.search('to be', filter={'n': True})} == {'bool'}
+    assert {res.slug for res in engine.search('to be', filter={'n': 1})} == {'int', 'float'}
+    assert {res.slug for res in engine.search('to be', filter={'n': [False, '1']})} == {'str'}
+    engine.remove_document('int')
+    assert {res.slug for res in engine.search('to be', filter={'n': 1.0})} == {'float'}
+    assert {res.slug for res in engine.search('to be', filter={'n': True})} == {'bool'}
+
+
+def test_filter_serialization(test_engine):
+    test_engine.commit()
+    marshalled_engine = SearchEngine(test_engine.filepath)
+    res = marshalled_engine.search('to be', filter={'play': 'hamlet'})
+    assert [r.slug for r in res] == ['hamlet-1']
+
+
+@pytest.mark.parametrize('value', [[[1]], {'a': 1}, ['hamlet', None], None])
+def test_invalid_filter(test_engine, value):
+    with pytest.raises(ValueError, match='must be'):
+        test_engine.search('to be', filter={'play': value})
+
+
+@pytest.mark.parametrize('value', [('a', 'b'), ['a'], {'a': 1}, None])
+def test_invalid_metadata(value):
+    engine = create_engine()
+    engine.index_string('to be', 'valid', metadata={'play': 'hamlet'})
+    with pytest.raises(ValueError):
+        engine.index_string('or not to be', 'invalid', metadata={'play': value})
+    # Nothing of the rejected document was indexed
+    assert not engine.has_document('invalid')
+    assert engine.num_docs == 1
+    assert [result.slug for result in engine.search('to be')] == ['valid']
+    engine.commit()
+    assert SearchEngine(engine.filepath).num_docs == 1
@@ -0,0 +1,81 @@
+from stefansearch.engine.front_coding import FrontCodedStrings, StringTable
+from stefansearch.engine.search_engine import SearchEngine
+from stefansearch.engine.term_dictionary import TermDictionary
+from util import create_engine
+"""Test cases for front-coded string storage."""
+
+
+WORDS = sorted({
+    'apple', 'applesauce', 'application', 'apply', 'banana', 'band', 'bandana',
+    'can', 'candle', 'candy', 'cane', 'zebra', 'zeta', 'über', 'übermensch',
+    'a' * 200, 'a' * 201,
+})
+
+
+def test_front_coded_strings():
+    for block_size in [1, 2, 4, 16]:
+        strings = FrontCodedStrings(WORDS, block_size)
+        assert len(strings) == len(WORDS)
+        assert list(strings) == WORDS
+        for rank, word in enumerate(WORDS):
+            assert strings.get(rank) == word
+            assert strings.rank_of(word) == rank
+        assert strings.rank_of('') is None
+        assert strings.rank_of('appl') is None
+        assert strings.rank_of('zzz') is None
+        assert list(FrontCodedStrings.from_json(strings.to_json())) == WORDS
+
+
+def test_string_table():
+    table = StringTable(block_size=4, lookup_cache_size=16)
+    for string_id, word in enumerate(WORDS):
+        table.add(word, string_id)
+    table.freeze()
+    table.remove('banana')
+    table.add('date', 100)
+    assert len(table) == len(WORDS)
+    assert table.get_id('banana') is None
+    assert table.get_id('candy') == WORDS.index('candy')
+    assert table.get_id('date') == 100
+    assert table.get_string(100) == 'date'
+    assert table.get_string(WORDS.index('banana')) is None
+    marshalled = StringTable.from_json(table.to_json())
+    assert sorted(marshalled.items()) == sorted(table.items())
+    assert marshalled.get_string(WORDS.index('zeta')) == 'zeta'
+
+
+def test_term_dictionary():
+    term_dict = TermDictionary()
+    assert [term_dict.add(word) for word in ['b', 'a', 'b', 'c']] == [0, 1, 0, 2]
+    term_dict.freeze()
+    assert term_dict.add('d') == 3
+    marshalled = TermDictionary.from_json(term_dict.to_json())
+    assert len(marshalled) == 4
+    assert [marshalled.get_term(term_id) for term_id in range(4)] == ['b', 'a', 'c', 'd']
+    assert marshalled.get_id('c') == 2
+    # Older index files store a list of terms
+    assert TermDictionary.from_json(['x', 'y']).get_id('y') == 1
+
+
+def test_engine_reopen():
+    engine = create_engine()
+    engine.index_string('APPLE APPLESAUCE', 'docs/fruit/apple.txt')
+    engine.index_string('APPLESAUCE', 'docs/fruit/applesauce.txt')
+    engine.commit()
+    # Terms and slugs added after a commit are looked up alongside frozen ones
+    engine.index_string('APPLE APPLICATION', 'docs/software/application.txt')
+    results = engine.search('APPLE APPLESAUCE APPLICATION')
+    assert len(results) == 3
+    engine.commit()
+    assert SearchEngine(engine.filepath).search('APPLE APPLESAUCE APPLICATION') == results
+
+
+def test_surrogate_escaped_slug():
+    # How Python represents the file name b'caf\xe9.txt' on a UTF-8 system
+    slug = 'caf\udce9.txt'
+    words = sorted(WORDS + [slug, 'caf\udce9s.txt'])
+    assert list(FrontCodedStrings(words, 4)) == words
+    engine = create_engine()
+    engine.index_string('APPLE', slug)
+    engine.commit()
+    assert [result.slug for result in SearchEngine(engine.filepath).search('APPLE')] == [slug]
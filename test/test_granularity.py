@@ -0,0 +1,145 @@
+import pytest
+from stefansearch.engine.inverted_list import InvertedList
+from stefansearch.engine.search_engine import SearchEngine
+from stefansearch.scoring.bm25 import Bm25Scorer
+from stefansearch.scoring.reranker import MinimalSpanReranker
+from stefansearch.scoring.scorer import DocScoreInfo, Scorer
+from util import create_engine
+"""Test cases for indexes that store less than full positions."""
+
+
+class MatchCountScorer(Scorer):
+    """Scores a document by the number of query terms it contains."""
+    needs_term_freqs = False
+
+    def calc_score(self, info: DocScoreInfo) -> float:
+        return sum(1 for term in info.terms if term.df)
+
+    def to_sortable(self, score: float) -> float:
+        return -score
+
+
+DOCUMENTS = [
+    'APPLE BANANA APPLE CARROT',
+    'BANANA DATE',
+    'APPLE APPLE APPLE ELDERBERRY',
+    'CARROT DATE FIG',
+]
+
+
+def make_list(granularity: str) -> InvertedList:
+    inverted_list = InvertedList(0, granularity=granularity)
+    for doc_id, term_position in [(1, 0), (7, 1), (1, 4), (3, 2), (7, 5), (7, 9)]:
+        inverted_list.add_posting(doc_id, term_position)
+    return inverted_list
+
+
+def test_freqs_list():
+    inverted_list = make_list('freqs')
+    assert inverted_list.granularity == 'freqs'
+    assert inverted_list.positions is None
+    assert list(inverted_list.doc_ids) == [1, 3, 7]
+    assert list(inverted_list.term_freqs) == [2, 1, 3]
+    assert inverted_list.num_postings == 6
+    assert inverted_list.get_posting_list(7) is None
+    assert inverted_list.remove_document(7) == 3
+    assert inverted_list.num_postings == 3
+    loaded = InvertedList.from_json(inverted_list.to_json())
+    assert loaded.granularity == 'freqs'
+    assert loaded.to_json() == inverted_list.to_json()
+
+
+def test_docs_list():
+    inverted_list = make_list('docs')
+    assert inverted_list.granularity == 'docs'
+    assert list(inverted_list.doc_ids) == [1, 3, 7]
+    assert inverted_list.num_postings == 3
+    assert inverted_list.get_term_freq() == 1
+    assert inverted_list.remove_document(1) == 1
+    assert inverted_list.num_postings == 2
+    loaded = InvertedList.from_json(inverted_list.to_json())
+    assert loaded.granularity == 'docs'
+    assert loaded.to_json() == {'term_id': 0, 'doc_ids': [3, 7]}
+
+
+def index_all(engine: SearchEngine):
+    for i, text in enumerate(DOCUMENTS):
+        engine.index_string(text, str(i))
+    engine.commit()
+
+
+@pytest.mark.parametrize('lazy_load', [False, True])
+def test_freqs_same_results(lazy_load: bool):
+    full = create_engine(scorer=Bm25Scorer())
+    freqs = create_engine(scorer=Bm25Scorer(), granularity='freqs')
+    for engine in (full, freqs):
+        index_all(engine)
+        engine.remove_document('3')
+        engine.commit()
+    assert freqs.filepath.stat().st_size < full.filepath.stat().st_size
+    freqs = SearchEngine(freqs.filepath, scorer=Bm25Scorer(), lazy_load=lazy_load)
+    assert freqs.granularity == 'freqs'
+    assert freqs.num_terms == full.num_terms
+    for query in ['APPLE', 'BANANA DATE', 'APPLE CARROT FIG']:
+        assert freqs.search(query) == full.search(query)
+
+
+def test_docs():
+    engine = create_engine(scorer=MatchCountScorer(), granularity='docs')
+    index_all(engine)
+    results = engine.search('APPLE CARROT')
+    assert [(result.slug, result.score) for result in results] == [('0', 2), ('2', 1), ('3', 1)]
+    engine.remove_document('0')
+    engine.commit()
+    assert engine.num_terms == 9
+    engine = SearchEngine(engine.filepath, scorer=MatchCountScorer())
+    assert engine.granularity == 'docs'
+    assert engine.num_terms == 9
+
+
+def test_docs_requires_scorer():
+    engine = create_engine(granularity='docs')
+    index_all(engine)
+    with pytest.raises(ValueError, match='term frequencies'):
+        engine.search('APPLE')
+    with pytest.raises(ValueError, match='term frequencies'):
+        engine.explain('APPLE', '0')
+
+
+def test_rerank_requires_positions():
+    engine = create_engine(granularity='freqs', reranker=MinimalSpanReranker())
+    index_all(engine)
+    with pytest.raises(ValueError, match='positions'):
+        engine.search('APPLE BANANA')
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        create_engine(granularity='words')
+    with pytest.raises(ValueError):
+        create_engine(granularity='freqs', store_offsets=True)
+    engine = create_engine(granularity='freqs')
+    index_all(engine)
+    # The granularity can't change once documents are indexed
+    with pytest.raises(ValueError):
+        SearchEngine(engine.filepath, granularity='positions')
+    assert SearchEngine(engine.filepath, granularity='freqs').granularity == 'freqs'
+
+
+def test_docs_dense_same_stats():
+    dense = create_engine(scorer=MatchCountScorer(), granularity='docs', dense_threshold=0.5, dense_min_docs=1)
+    sparse = create_engine(scorer=MatchCountScorer(), granularity='docs')
+    for engine in (dense, sparse):
+        index_all(engine)
+        # APPLE is dense by now; repeated occurrences must still count once per document
+        engine.index_string('APPLE APPLE APPLE APPLE BANANA', '4')
+    assert type(dense._get_inverted_list('APPLE')).__name__ == 'DenseInvertedList'
+    for engine in (dense, sparse):
+        engine.commit()
+    reopened = SearchEngine(dense.filepath, scorer=MatchCountScorer(), dense_threshold=0.5, dense_min_docs=1)
+    for engine in (dense, reopened):
+        for term in ['APPLE', 'BANANA', 'CARROT']:
+            dense_list, sparse_list = engine._get_inverted_list(term), sparse._get_inverted_list(term)
+            assert (dense_list.num_docs, dense_list.num_postings) == (sparse_list.num_docs, sparse_list.num_postings)
+        assert engine.explain('APPLE BANANA', '4') == sparse.explain('APPLE BANANA', '4')
+        assert engine.search('APPLE BANANA') == sparse.search('APPLE BANANA')
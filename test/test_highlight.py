@@ -0,0 +1,106 @@
+import re
+import pytest
+from stefansearch.engine.search_engine import SearchEngine, SearchResult
+from stefansearch.tokenizing.alphanumeric_tokenizer import AlphanumericTokenizer
+from stefansearch.tokenizing.tokenizer import Tokenizer
+from util import create_engine
+"""Test cases for stored character offsets and snippet highlighting."""
+
+
+DOCUMENT_1 = 'Two households, both alike in dignity, in fair Verona, where we lay our scene'
+DOCUMENT_2 = 'But soft, what light through yonder window breaks? It is the east, and Juliet is the sun.'
+
+
+@pytest.fixture
+def test_engine() -> SearchEngine:
+    engine = create_engine(tokenizer=AlphanumericTokenizer(lowercase=True), store_offsets=True)
+    engine.index_string(DOCUMENT_1, '1')
+    engine.index_string(DOCUMENT_2, '2')
+    return engine
+
+
+def test_tokenize_spans():
+    tokenizer = AlphanumericTokenizer()
+    spans = list(tokenizer.tokenize_spans('Hi, there  friend'))
+    assert spans == [('Hi', 0, 2), ('there', 4, 9), ('friend', 11, 17)]
+
+
+def test_offsets_recorded(test_engine):
+    doc_id = test_engine._doc_table.get_doc_id('2')
+    posting_list = test_engine._get_inverted_list('window').get_posting_list(doc_id)
+    assert posting_list.offsets == [(DOCUMENT_2.index('window'), DOCUMENT_2.index('window') + 6)]
+
+
+def test_highlight(test_engine):
+    res = test_engine.search('Juliet window')
+    assert res[0].slug == '2'
+    snippet = test_engine.highlight(res[0], 'Juliet window')
+    assert [snippet.text[start:end] for start, end in snippet.highlights] == ['window', 'Juliet']
+    assert '<b>Juliet</b>' in snippet.to_marked()
+
+
+def test_highlight_window(test_engine):
+    snippet = test_engine.highlight(SearchResult('2', 0), 'sun', snippet_length=20)
+    assert len(snippet.text) <= 20
+    assert snippet.text[snippet.highlights[0][0]:snippet.highlights[0][1]] == 'sun'
+
+
+def test_highlight_serialization(test_engine):
+    test_engine.commit()
+    marshalled_engine = SearchEngine(test_engine.filepath, tokenizer=AlphanumericTokenizer(lowercase=True))
+    snippet = marshalled_engine.highlight(SearchResult('1', 0), 'Verona')
+    assert snippet.text == DOCUMENT_1
+    assert snippet.text[slice(*snippet.highlights[0])] == 'Verona'
+
+
+def test_highlight_requires_offsets():
+    engine = create_engine()
+    engine.index_string(DOCUMENT_1, '1')
+    with pytest.raises(ValueError):
+        engine.highlight(SearchResult('1', 0), 'Verona')
+
+
+def test_offsets_require_spans():
+    class WhitespaceTokenizer(Tokenizer):
+        def tokenize_string(self, string):
+            yield from string.split()
+
+    with pytest.raises(ValueError, match='supports_spans'):
+        create_engine(tokenizer=WhitespaceTokenizer(), store_offsets=True)
+    engine = create_engine(store_offsets=True)
+    engine.index_string(DOCUMENT_1, '1')
+    engine.commit()
+    # Also applies when store_offsets is turned on by the index file
+    with pytest.raises(ValueError, match='supports_spans'):
+        SearchEngine(engine.filepath, tokenizer=WhitespaceTokenizer())
+    create_engine(tokenizer=WhitespaceTokenizer()).index_string(DOCUMENT_1, '1')
+
+
+def test_offsets_require_empty_index():
+    engine = create_engine()
+    engine.index_string(DOCUMENT_1, '1')
+    engine.commit()
+    with pytest.raises(ValueError, match='store_offsets'):
+        SearchEngine(engine.filepath, store_offsets=True)
+    engine.remove_document('1')
+    engine.commit()
+    engine = SearchEngine(engine.filepath, store_offsets=True)
+    engine.index_string(DOCUMENT_2, '2')
+    assert engine.highlight(engine.search('light')[0], 'light').highlights
+
+
+def test_custom_span_tokenizer():
+    class WhitespaceTokenizer(Tokenizer):
+        supports_spans = True
+
+        def tokenize_string(self, string):
+            yield from string.split()
+
+        def tokenize_spans(self, string):
+            for match in re.finditer(r'\S+', string):
+                yield match.group(), match.start(), match.end()
+
+    engine = create_engine(tokenizer=WhitespaceTokenizer(), store_offsets=True)
+    engine.index_string(DOCUMENT_2, '2')
+    snippet = engine.highlight(engine.search('light')[0], 'light')
+    assert [snippet.text[start:end] for start, end in snippet.highlights] == ['light']
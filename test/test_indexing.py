@@ -46,3 +46,25 @@ def test_remove(test_engine):
     test_engine.remove_document('2')
     assert test_engine.num_docs == 0
     assert test_engine.num_terms == 0
+
+
+def test_term_ids(test_engine):
+    test_engine.index_string(DOCUMENT_1, '1')
+    test_engine.index_string(DOCUMENT_3, '3')
+    term_id = test_engine._term_dict.get_id('CARROT')
+    assert test_engine._term_dict.get_term(term_id) == 'CARROT'
+    assert test_engine._index[term_id].term_id == term_id
+    assert test_engine._index[term_id].num_docs == 2
+
+
+def test_legacy_format(tmp_path):
+    # Index files used to key InvertedLists by their term
+    filepath = tmp_path / 'legacy.json'
+    filepath.write_text(
+        '{"doc_data": {"1": {"slug": "1", "num_terms": 2}}, "index": ['
+        '{"term": "APPLE", "posting_list": [{"doc_id": 1, "postings": [0]}]}, '
+        '{"term": "FIG", "posting_list": [{"doc_id": 1, "postings": [1]}]}]}'
+    )
+    engine = SearchEngine(filepath)
+    assert engine.num_terms == 2
+    assert engine.search('FIG')[0].slug == '1'
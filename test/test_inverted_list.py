@@ -0,0 +1,112 @@
+import pytest
+from stefansearch.engine.inverted_list import InvertedList
+from stefansearch.engine.posting_list import PostingList
+"""Test cases for the array-backed InvertedList."""
+
+
+def make_list() -> InvertedList:
+    inverted_list = InvertedList(0)
+    for doc_id, term_position in [(1, 0), (1, 4), (3, 2), (7, 1), (7, 5), (7, 9)]:
+        inverted_list.add_posting(doc_id, term_position)
+    return inverted_list
+
+
+def test_add():
+    inverted_list = make_list()
+    assert inverted_list.num_docs == 3
+    assert inverted_list.num_postings == 6
+    assert list(inverted_list.doc_ids) == [1, 3, 7]
+    assert list(inverted_list.term_freqs) == [2, 1, 3]
+    assert inverted_list.get_posting_list(7).postings == [1, 5, 9]
+    assert inverted_list.get_posting_list(2) is None
+
+
+def test_insert_out_of_order():
+    inverted_list = make_list()
+    inverted_list.add_posting(5, 3)
+    inverted_list.add_posting(3, 8)
+    assert list(inverted_list.doc_ids) == [1, 3, 5, 7]
+    assert inverted_list.get_posting_list(3).postings == [2, 8]
+    assert inverted_list.get_posting_list(5).postings == [3]
+    assert inverted_list.get_posting_list(7).postings == [1, 5, 9]
+    assert inverted_list.num_postings == 8
+
+
+def test_insert_out_of_order_with_offsets():
+    inverted_list = InvertedList(0)
+    inverted_list.add_posting(1, 0, (0, 4))
+    inverted_list.add_posting(7, 1, (5, 9))
+    inverted_list.add_posting(3, 2, (10, 14))
+    inverted_list.add_posting(3, 8, (20, 24))
+    assert list(inverted_list.doc_ids) == [1, 3, 7]
+    assert inverted_list.get_posting_list(3).offsets == [(10, 14), (20, 24)]
+    assert inverted_list.get_posting_list(7).offsets == [(5, 9)]
+
+
+def test_mixed_offsets():
+    inverted_list = make_list()
+    with pytest.raises(ValueError):
+        inverted_list.add_posting(9, 0, (0, 4))
+    with pytest.raises(ValueError):
+        inverted_list.add_posting(3, 0, (0, 4))
+    inverted_list = InvertedList(0)
+    inverted_list.add_posting(1, 0, (0, 4))
+    with pytest.raises(ValueError):
+        inverted_list.add_posting(2, 0)
+    assert inverted_list.num_postings == 1
+
+
+def test_cursor():
+    inverted_list = make_list()
+    assert inverted_list.get_curr_doc_id() == 1
+    assert inverted_list.get_term_freq() == 2
+    assert not inverted_list.move_to(2)
+    assert inverted_list.get_curr_doc_id() == 3
+    assert inverted_list.move_to(7)
+    assert inverted_list.get_term_freq() == 3
+    inverted_list.move_past(7)
+    assert inverted_list.is_finished()
+    assert inverted_list.get_curr_doc_id() is None
+    assert inverted_list.get_term_freq() == 0
+
+
+def test_remove():
+    inverted_list = make_list()
+    assert inverted_list.remove_document(3) == 1
+    assert inverted_list.remove_document(4) == 0
+    assert list(inverted_list.doc_ids) == [1, 7]
+    assert inverted_list.num_postings == 5
+    assert inverted_list.get_posting_list(7).postings == [1, 5, 9]
+
+
+def test_offsets():
+    inverted_list = InvertedList(0)
+    inverted_list.add_posting(1, 0, (0, 5))
+    inverted_list.add_posting(2, 3, (17, 22))
+    inverted_list.add_posting(2, 6, (30, 35))
+    inverted_list.remove_document(1)
+    assert inverted_list.get_posting_list(2).offsets == [(17, 22), (30, 35)]
+
+
+def test_serialization():
+    inverted_list = make_list()
+    marshalled = InvertedList.from_json(inverted_list.to_json())
+    assert marshalled.to_json() == inverted_list.to_json()
+    assert marshalled.num_postings == 6
+    assert marshalled.get_posting_list(1).postings == [0, 4]
+
+
+def test_from_posting_lists():
+    inverted_list = InvertedList(0, [PostingList(2, [1, 3]), PostingList(4, [0])])
+    assert list(inverted_list.doc_ids) == [2, 4]
+    assert list(inverted_list.term_freqs) == [2, 1]
+
+
+def test_large_offsets():
+    # Offsets in files larger than 4 GiB
+    inverted_list = InvertedList(0)
+    inverted_list.add_posting(1, 0, (2 ** 32, 2 ** 32 + 5))
+    inverted_list.add_posting(0, 0, (2 ** 33, 2 ** 33 + 5))
+    assert inverted_list.get_posting_list(1).offsets == [(2 ** 32, 2 ** 32 + 5)]
+    restored = InvertedList.from_json(inverted_list.to_json())
+    assert restored.get_posting_list(0).offsets == [(2 ** 33, 2 ** 33 + 5)]
@@ -0,0 +1,38 @@
+import array
+from stefansearch.engine.memory import deep_sizeof
+from util import create_engine
+"""Test cases for memory introspection."""
+
+
+class Slotted:
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = values
+
+
+def test_deep_sizeof():
+    values = array.array('I', range(1000))
+    assert deep_sizeof(Slotted(values)) > values.itemsize * 1000
+    nested = {'a': [values, values]}
+    assert deep_sizeof(nested) < deep_sizeof(values) + deep_sizeof({'a': [0, 0]})
+    seen = set()
+    deep_sizeof(values, seen)
+    assert deep_sizeof(Slotted(values), seen) < 100
+
+
+def test_memory_report():
+    engine = create_engine(store_offsets=True)
+    engine.index_string('APPLE ' * 1000 + 'BANANA CARROT', '1', metadata={'kind': 'fruit'})
+    engine.index_string('BANANA CARROT', '2')
+    report = engine.memory_report(top_n=2)
+    assert set(report.components) == {'term_dict', 'index', 'doc_table', 'text_store', 'metadata_index'}
+    assert all(size > 0 for size in report.components.values())
+    assert report.total_bytes == sum(report.components.values())
+    assert report.num_postings == 1004
+    # Positions and character offsets of 1000 occurrences: at least 12 bytes each
+    assert report.components['index'] > 12000
+    assert report.bytes_per_posting == report.components['index'] / 1004
+    assert len(report.top_terms) == 2
+    assert report.top_terms[0][0] == 'APPLE'
+    assert report.top_terms[0][1] > report.top_terms[1][1]
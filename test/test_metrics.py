@@ -0,0 +1,80 @@
+import pytest
+from stefansearch.engine.metrics import MetricsRegistry, percentile
+from stefansearch.engine.search_engine import SearchEngine
+from util import create_engine
+"""Test cases for the metrics registry and the engine's metrics."""
+
+
+def test_percentile():
+    assert percentile([3.0, 1.0, 2.0, 4.0], 50) == 2.0
+    assert percentile([3.0, 1.0, 2.0, 4.0], 99) == 4.0
+    assert percentile([5.0], 50) == 5.0
+
+
+def test_prometheus_format():
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Number of requests').inc(3)
+    registry.gauge('temperature').set(21.5)
+    histogram = registry.histogram('latency_seconds', buckets=[0.1, 1.0])
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+    assert registry.to_prometheus() == (
+        '# HELP requests_total Number of requests\n'
+        '# TYPE requests_total counter\n'
+        'requests_total 3\n'
+        '# TYPE temperature gauge\n'
+        'temperature 21.5\n'
+        '# TYPE latency_seconds histogram\n'
+        'latency_seconds_bucket{le="0.1"} 2\n'
+        'latency_seconds_bucket{le="1.0"} 3\n'
+        'latency_seconds_bucket{le="+Inf"} 4\n'
+        'latency_seconds_sum 2.65\n'
+        'latency_seconds_count 4\n'
+    )
+
+
+def test_registry():
+    registry = MetricsRegistry()
+    assert registry.counter('a') is registry.counter('a')
+    with pytest.raises(ValueError):
+        registry.gauge('a')
+    with pytest.raises(ValueError):
+        registry.counter('a').inc(-1)
+    gauge = registry.gauge('b')
+    gauge.set_function(lambda: 7)
+    assert gauge.value == 7
+    with registry.histogram('c').time():
+        pass
+    assert registry.histogram('c').count == 1
+
+
+def test_engine_metrics(tmp_path):
+    engine = create_engine()
+    engine.index_string('APPLE BANANA', '1')
+    engine.index_string('BANANA CARROT', '2')
+    with pytest.raises(ValueError):
+        engine.index_string('DATE', '1')
+    engine.remove_document('2')
+    engine.search('BANANA')
+    engine.commit()
+    metrics = engine.metrics
+    assert metrics.get('stefansearch_index_seconds').count == 2
+    assert metrics.get('stefansearch_index_errors_total').value == 1
+    assert metrics.get('stefansearch_remove_seconds').count == 1
+    assert metrics.get('stefansearch_search_seconds').count == 1
+    assert metrics.get('stefansearch_commit_seconds').count == 1
+    assert metrics.get('stefansearch_open_seconds').count == 1
+    assert metrics.get('stefansearch_num_docs').value == 1
+    assert metrics.get('stefansearch_num_terms').value == 2
+    assert metrics.get('stefansearch_vocabulary_size').value == 2
+    assert metrics.get('stefansearch_index_bytes').value == engine.filepath.stat().st_size
+
+    # Engines can share a registry
+    SearchEngine(engine.filepath, metrics=metrics)
+    assert metrics.get('stefansearch_open_seconds').count == 2
+
+    metrics.export(tmp_path / 'metrics.prom')
+    exported = []
+    metrics.export(exported.append)
+    assert (tmp_path / 'metrics.prom').read_text() == exported[0] == metrics.to_prometheus()
+    assert 'stefansearch_num_docs 1\n' in exported[0]
@@ -0,0 +1,63 @@
+import pytest
+from stefansearch.engine.query import QueryStats
+from stefansearch.scoring.bm25 import Bm25Scorer
+from util import create_engine
+"""Test cases for query statistics and `explain()`."""
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine()
+    engine.index_string('APPLE BANANA APPLE', '1')
+    engine.index_string('BANANA CARROT', '2')
+    engine.index_string('CARROT DATE', '3')
+    return engine
+
+
+def test_stats(engine):
+    stats = QueryStats()
+    results = engine.search('APPLE BANANA ELDERBERRY', stats=stats)
+    assert results == engine.search('APPLE BANANA ELDERBERRY')
+    assert stats.posting_lists_opened == 2
+    assert stats.documents_scored == 2
+    # '1' contains both terms, '2' contains only BANANA
+    assert stats.postings_visited == 3
+    # Both cursors are popped at '1', BANANA is pushed back and popped at '2'
+    assert stats.heap_operations == 4
+    assert stats.total_secs > 0
+    # Statistics accumulate
+    engine.search('CARROT', stats=stats)
+    assert stats.posting_lists_opened == 3
+    assert stats.documents_scored == 4
+
+
+def test_stats_with_filter():
+    engine = create_engine()
+    for i in range(10):
+        engine.index_string('APPLE', str(i), metadata={'even': i % 2 == 0})
+    stats = QueryStats()
+    assert len(engine.search('APPLE', filter={'even': True}, stats=stats)) == 5
+    assert stats.documents_scored == 5
+    assert stats.postings_visited == 5
+    # A pop and a push per even document, and moving past each odd one but the last
+    assert stats.heap_operations == 14
+
+
+@pytest.mark.parametrize('scorer', [None, Bm25Scorer()], ids=['ql', 'bm25'])
+def test_explain(scorer):
+    engine = create_engine(scorer=scorer)
+    engine.index_string('APPLE BANANA APPLE', '1')
+    engine.index_string('BANANA CARROT', '2')
+    engine.index_string('CARROT DATE', '3')
+    scores = {res.slug: res.score for res in engine.search('APPLE CARROT ELDERBERRY')}
+    for slug, score in scores.items():
+        explanation = engine.explain('APPLE CARROT ELDERBERRY', slug)
+        assert explanation.score == score
+        assert list(explanation.term_infos) == ['APPLE', 'CARROT']
+        assert sum(explanation.term_scores.values()) == pytest.approx(score)
+    explanation = engine.explain('APPLE CARROT', '1')
+    assert explanation.term_infos['APPLE'].df == 2
+    assert explanation.term_infos['CARROT'].df == 0
+    assert explanation.term_infos['CARROT'].nd == 2
+    with pytest.raises(ValueError):
+        engine.explain('APPLE', '4')
@@ -0,0 +1,105 @@
+import threading
+import time
+import pytest
+from stefansearch.engine.reloading import ReloadingSearchEngine
+from stefansearch.engine.search_engine import SearchEngine
+from util import create_engine
+"""Test cases for atomic commits and reloading readers."""
+
+
+@pytest.fixture
+def writer() -> SearchEngine:
+    writer = create_engine()
+    writer.index_string('APPLE BANANA', '1')
+    writer.commit()
+    return writer
+
+
+def slugs(engine, query: str):
+    return [result.slug for result in engine.search(query)]
+
+
+def test_generation(writer: SearchEngine):
+    assert writer.generation == 1
+    writer.commit()
+    assert writer.generation == 2
+    assert SearchEngine(writer.filepath).generation == 2
+    # No temporary file is left behind
+    assert [path.name for path in writer.filepath.parent.glob(writer.filepath.name + '*')] == [writer.filepath.name]
+
+
+def test_check_for_update(writer: SearchEngine):
+    reader = ReloadingSearchEngine(writer.filepath)
+    assert not reader.check_for_update()
+    old_engine = reader.engine
+
+    writer.index_string('APPLE CARROT', '2')
+    writer.commit()
+    assert reader.check_for_update()
+    assert reader.generation == 2
+    assert slugs(reader, 'CARROT') == ['2']
+    # The old engine is untouched, for searches that were already running on it
+    assert slugs(old_engine, 'CARROT') == []
+    assert not reader.check_for_update()
+    assert reader.metrics.get('stefansearch_reloads_total').value == 1
+
+
+def test_query_log_carried_over(writer: SearchEngine):
+    reader = ReloadingSearchEngine(writer.filepath, query_log_size=10)
+    reader.search('APPLE')
+    writer.commit()
+    assert reader.check_for_update()
+    assert reader.engine.query_log.top_queries() == [('APPLE', 1)]
+
+
+def test_reload_while_searching(writer: SearchEngine):
+    reader = ReloadingSearchEngine(writer.filepath, query_log_size=100000)
+    # Large enough that the searches record queries while warmup reads the log
+    for i in range(100000):
+        reader.engine.query_log.record(f'APPLE {i % 100}', ['APPLE', str(i % 100)])
+    done = threading.Event()
+
+    def search():
+        while not done.is_set():
+            reader.search('APPLE BANANA')
+    thread = threading.Thread(target=search)
+    thread.start()
+    try:
+        for i in range(5):
+            writer.index_string('CARROT', f'doc-{i}')
+            writer.commit()
+            assert reader.check_for_update()
+    finally:
+        done.set()
+        thread.join()
+    assert reader.num_docs == 6
+    assert reader.metrics.get('stefansearch_reload_errors_total').value == 0
+
+
+def test_background_reload(writer: SearchEngine):
+    with ReloadingSearchEngine(writer.filepath, poll_interval=0.01, lazy_load=True) as reader:
+        writer.index_string('CARROT', '2')
+        writer.commit()
+        deadline = time.monotonic() + 5
+        while reader.generation < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert slugs(reader, 'CARROT') == ['2']
+
+
+def test_concurrent_commits(writer: SearchEngine):
+    """Readers never see a partially-written index."""
+    reader = ReloadingSearchEngine(writer.filepath)
+    done = threading.Event()
+
+    def write():
+        for i in range(20):
+            writer.index_string('CARROT ' * 500, f'doc-{i}')
+            writer.commit()
+        done.set()
+    thread = threading.Thread(target=write)
+    thread.start()
+    while not done.is_set():
+        reader.check_for_update()
+    thread.join()
+    reader.check_for_update()
+    assert reader.num_docs == 21
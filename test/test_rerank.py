@@ -0,0 +1,69 @@
+import pytest
+from stefansearch.engine.query import QueryStats
+from stefansearch.scoring.bm25 import Bm25Scorer
+from stefansearch.scoring.reranker import MinimalSpanReranker, Reranker, RerankInfo, minimal_span
+from util import create_engine
+"""Test cases for two-phase search with a Reranker."""
+
+
+class ReverseReranker(Reranker):
+    """Reverses the first-phase order."""
+    def calc_score(self, info: RerankInfo) -> float:
+        return -info.score
+
+
+def test_minimal_span():
+    assert minimal_span([]) is None
+    assert minimal_span([[5]]) == 1
+    assert minimal_span([[1, 10], [4, 12], [8]]) == 5
+    assert minimal_span([[0, 20], [19]]) == 2
+
+
+def test_minimal_span_reranker():
+    reranker = MinimalSpanReranker()
+    near = reranker.calc_score(RerankInfo(1.0, [[3], [4]], 100))
+    far = reranker.calc_score(RerankInfo(1.0, [[3], [40]], 100))
+    missing = reranker.calc_score(RerankInfo(1.0, [[3], []], 100))
+    assert near > far > missing
+    assert reranker.calc_score(RerankInfo(1.0, [[3, 5]], 100)) == 1.0
+
+
+@pytest.mark.parametrize('scorer', [None, Bm25Scorer()], ids=['ql', 'bm25'])
+def test_proximity_rerank(scorer):
+    texts = {
+        'far': 'APPLE ' + 'FILLER ' * 20 + 'BANANA',
+        'near': 'FILLER ' * 10 + 'APPLE BANANA ' + 'FILLER ' * 10,
+        'one': 'APPLE ' + 'FILLER ' * 21,
+    }
+    plain = create_engine(scorer=scorer)
+    reranking = create_engine(scorer=scorer, reranker=MinimalSpanReranker())
+    for engine in [plain, reranking]:
+        for slug, text in texts.items():
+            engine.index_string(text, slug)
+        # Documents without the query terms, so that they are rare
+        for i in range(10):
+            engine.index_string('FILLER ' * 22, 'filler-{}'.format(i))
+    # The documents have the same length, so the first phase can't tell
+    # 'far' and 'near' apart
+    plain_scores = {res.slug: res.score for res in plain.search('APPLE BANANA')}
+    assert plain_scores['far'] == plain_scores['near']
+    results = reranking.search('APPLE BANANA')
+    assert [res.slug for res in results] == ['near', 'far', 'one']
+    assert results[0].score > results[1].score
+
+
+def test_rerank_depth():
+    engine = create_engine(reranker=ReverseReranker(), rerank_depth=2)
+    for i in range(4):
+        engine.index_string('APPLE ' * (i + 1) + 'FILLER ' * (10 - i), str(i))
+    assert [res.slug for res in engine.search('APPLE')] == ['2', '3', '1', '0']
+    stats = QueryStats()
+    engine.search('APPLE', stats=stats)
+    assert stats.documents_reranked == 2
+    assert stats.rerank_secs > 0
+
+
+def test_rerank_requires_positions():
+    # Dense terms don't store positions
+    with pytest.raises(ValueError, match='reranker'):
+        create_engine(reranker=MinimalSpanReranker(), dense_threshold=0.5)
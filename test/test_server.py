@@ -0,0 +1,132 @@
+import asyncio
+import json
+import threading
+import time
+import typing
+import urllib.parse
+from stefansearch.server import SearchServer
+from util import create_engine
+"""Test cases for the HTTP server, which run it on localhost."""
+
+
+async def request(
+        port: int,
+        method: str,
+        target: str,
+        body: typing.Any = None,
+) -> typing.Tuple[int, typing.Any]:
+    """Send an HTTP request to the server and return the status and decoded JSON body."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = json.dumps(body).encode('utf8') if body is not None else b''
+    writer.write(
+        '{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\n\r\n'.format(method, target, len(data))
+        .encode('latin-1') + data
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), json.loads(body)
+
+
+def run_with_server(test: typing.Callable, engine=None, **kwargs):
+    """Run the coroutine function `test(server)` against a server on a free port."""
+    async def main():
+        server = SearchServer(engine if engine else create_engine(), **kwargs)
+        await server.start(port=0)
+        try:
+            await test(server)
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+
+class SlowSearch:
+    """Replaces `engine.search` with a slow version that counts its calls."""
+    def __init__(self, engine, delay: float = 0.2):
+        self._search = engine.search
+        self.delay = delay
+        self.num_calls = 0
+        self.lock = threading.Lock()
+        engine.search = self
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            self.num_calls += 1
+        time.sleep(self.delay)
+        return self._search(*args, **kwargs)
+
+
+def test_endpoints():
+    async def test(server):
+        port = server.port
+        assert await request(port, 'POST', '/documents', {'slug': '1', 'text': 'APPLE BANANA'}) == (201, {'slug': '1'})
+        await request(port, 'POST', '/documents', {'slug': '2', 'text': 'BANANA', 'metadata': {'even': True}})
+        status, body = await request(port, 'GET', '/search?q=' + urllib.parse.quote('APPLE BANANA'))
+        assert status == 200
+        assert [res['slug'] for res in body['results']] == ['1', '2']
+        status, body = await request(port, 'POST', '/search', {'query': 'BANANA', 'filter': {'even': True}})
+        assert [res['slug'] for res in body['results']] == ['2']
+        # Indexing a slug twice is a client error
+        assert (await request(port, 'POST', '/documents', {'slug': '1', 'text': 'X'}))[0] == 400
+        assert await request(port, 'DELETE', '/documents?slug=1') == (200, {'slug': '1'})
+        assert (await request(port, 'DELETE', '/documents?slug=1'))[0] == 404
+        assert await request(port, 'POST', '/commit') == (200, {})
+        assert (await request(port, 'GET', '/health'))[1]['num_docs'] == 1
+        assert (await request(port, 'GET', '/nothing'))[0] == 404
+        assert (await request(port, 'PUT', '/search'))[0] == 405
+        assert (await request(port, 'GET', '/search'))[0] == 400
+    engine = create_engine()
+    run_with_server(test, engine)
+    assert engine.filepath.read_text()
+
+
+def test_invalid_requests():
+    async def test(server):
+        port = server.port
+        for method, target, body in [
+            ('POST', '/search', ['APPLE']),
+            ('POST', '/search', {'query': ['APPLE']}),
+            ('POST', '/search', {'query': 'APPLE', 'filter': [1]}),
+            ('POST', '/search', {'query': 'APPLE', 'filter': {'even': {'a': 1}}}),
+            ('GET', '/search?q=APPLE&filter=' + urllib.parse.quote('"even"'), None),
+            ('POST', '/documents', 'APPLE'),
+            ('POST', '/documents', {'slug': 1, 'text': 'APPLE'}),
+            ('POST', '/documents', {'slug': '1', 'text': {'APPLE': 1}}),
+            ('POST', '/documents', {'slug': '1', 'text': 'APPLE', 'metadata': 'even'}),
+            ('POST', '/documents', {'slug': '1', 'text': 'APPLE', 'allow_overwrite': 'yes'}),
+        ]:
+            status, response = await request(port, method, target, body)
+            assert status == 400, (method, target, body)
+            assert 'must be' in response['error']
+        assert server.engine.num_docs == 0
+    run_with_server(test)
+
+
+def test_coalescing():
+    engine = create_engine()
+    engine.index_string('APPLE', '1')
+    slow_search = SlowSearch(engine)
+
+    async def test(server):
+        responses = await asyncio.gather(*[
+            request(server.port, 'GET', '/search?q=APPLE') for _ in range(5)
+        ])
+        assert all(response == responses[0] for response in responses)
+        assert responses[0][0] == 200
+    run_with_server(test, engine)
+    assert slow_search.num_calls == 1
+
+
+def test_backpressure():
+    engine = create_engine()
+    engine.index_string('APPLE', '1')
+    SlowSearch(engine)
+
+    async def test(server):
+        responses = await asyncio.gather(
+            request(server.port, 'GET', '/search?q=APPLE'),
+            request(server.port, 'GET', '/search?q=BANANA'),
+        )
+        assert sorted(status for status, _ in responses) == [200, 503]
+    run_with_server(test, engine, max_pending=1)
@@ -0,0 +1,42 @@
+from stefansearch.engine.stopper import Stopper
+from stefansearch.stemming.caching_stemmer import CachingStemmer
+from stefansearch.stemming.porter_stemmer import PorterStemmer
+from util import create_engine
+"""Test cases for stemming and the analysis caches."""
+
+
+WORDS = ['caresses', 'ponies', 'ties', 'cats', 'feed', 'agreed', 'plastered', 'motoring', 'sing', 'hopping']
+
+
+def test_porter_stemmer():
+    stemmer = PorterStemmer()
+    assert [stemmer.get_stem(word) for word in WORDS] == \
+        ['caress', 'poni', 'tie', 'cat', 'fee', 'agree', 'plaster', 'motor', 'sing', 'hop']
+
+
+def test_caching_stemmer():
+    stemmer = PorterStemmer()
+    caching_stemmer = CachingStemmer(PorterStemmer(), max_size=4)
+    for word in WORDS + WORDS[-2:]:
+        assert caching_stemmer.get_stem(word) == stemmer.get_stem(word)
+    stats = caching_stemmer.cache_stats()
+    assert stats.hits == 2
+    assert stats.misses == len(WORDS)
+    assert stats.size == 4
+    assert stats.hit_rate == 2 / (len(WORDS) + 2)
+
+
+def test_engine_analysis_cache():
+    engine = create_engine(stopper=Stopper(['the']))
+    engine.index_string('the cats and the ponies and the cats', '1')
+    stats = engine.analysis_cache_stats()
+    assert stats.misses == 4
+    assert stats.hits == 4
+    assert list(engine._process_text('the cats')) == ['cat']
+
+
+def test_engine_analysis_cache_disabled():
+    engine = create_engine(analysis_cache_size=0)
+    engine.index_string('the cats and the ponies', '1')
+    assert engine.analysis_cache_stats() is None
+    assert engine.search('cat')[0].slug == '1'
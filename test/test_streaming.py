@@ -0,0 +1,115 @@
+import random
+import typing
+import pytest
+from stefansearch.engine.search_engine import SearchResult
+from stefansearch.tokenizing.alphanumeric_tokenizer import AlphanumericTokenizer
+from stefansearch.tokenizing.tokenizer import Tokenizer
+from stefansearch.tokenizing.unicode_tokenizer import UnicodeTokenizer
+from util import create_engine
+"""Test cases for indexing text in chunks."""
+
+
+TEXT = (
+    'From fairest creatures we desire increase, That thereby beauty’s rose '
+    'might never die, But as the riper should by time decease, His tender '
+    'heir might bear his memory: But thou, contracted to thine own bright eyes, '
+    'Feed’st thy light’s flame with self-substantial fuel, 1609'
+)
+
+
+def random_chunks(text: str, seed: int) -> typing.List[str]:
+    rng = random.Random(seed)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + rng.randint(0, 12)
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+class JoiningTokenizer(Tokenizer):
+    """A tokenizer that only implements `tokenize_string()`."""
+    def tokenize_string(self, string: str) -> typing.Generator[str, None, None]:
+        yield from string.split()
+
+
+@pytest.mark.parametrize('tokenizer', [AlphanumericTokenizer(), UnicodeTokenizer(lowercase=True), JoiningTokenizer()])
+def test_tokenize_chunks(tokenizer: Tokenizer):
+    expected = list(tokenizer.tokenize_string(TEXT))
+    for seed in range(50):
+        assert list(tokenizer.tokenize_chunks(random_chunks(TEXT, seed))) == expected
+
+
+def test_tokenize_chunks_long_token():
+    text = 'a' * 1000 + ' ' + 'b' * 300
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert list(AlphanumericTokenizer().tokenize_chunks(chunks)) == ['a' * 1000, 'b' * 300]
+
+
+def test_tokenize_chunk_spans():
+    tokenizer = AlphanumericTokenizer()
+    expected = list(tokenizer.tokenize_spans(TEXT))
+    for seed in range(50):
+        assert list(tokenizer.tokenize_chunk_spans(random_chunks(TEXT, seed))) == expected
+
+
+def test_index_chunks():
+    string_engine = create_engine()
+    string_engine.index_string(TEXT, 'sonnet-1')
+    chunk_engine = create_engine()
+    chunk_engine.index_chunks((chunk for chunk in random_chunks(TEXT, 0)), 'sonnet-1')
+    assert chunk_engine.num_terms == string_engine.num_terms
+    assert chunk_engine.search('beauty’s rose') == string_engine.search('beauty’s rose')
+
+
+def test_index_file(tmp_path):
+    filepath = tmp_path / 'sonnet.txt'
+    filepath.write_text(TEXT, encoding='utf-8')
+    engine = create_engine(store_offsets=True)
+    engine.index_file(filepath, 'sonnet-1', encoding='utf-8', chunk_size=10)
+    assert engine.num_terms == len(list(AlphanumericTokenizer().tokenize_string(TEXT)))
+    snippet = engine.highlight(SearchResult('sonnet-1', 0), 'flame')
+    assert snippet.text[slice(*snippet.highlights[0])] == 'flame'
+
+
+def test_index_chunks_error():
+    def failing_chunks():
+        yield 'some text that gets indexed '
+        raise IOError('read failed')
+
+    engine = create_engine()
+    engine.index_string('some other text', 'other')
+    with pytest.raises(IOError):
+        engine.index_chunks(failing_chunks(), 'failing')
+    assert not engine.has_document('failing')
+    assert engine.num_terms == 3
+    assert engine._get_inverted_list('indexed') is None
+    assert [res.slug for res in engine.search('some text')] == ['other']
+
+
+@pytest.mark.parametrize('store_offsets', [False, True])
+def test_overwrite_chunks_error(store_offsets: bool):
+    def failing_chunks():
+        yield 'NEW TEXT THAT GETS INDEXED '
+        raise IOError('read failed')
+
+    engine = create_engine(store_offsets=store_offsets)
+    engine.index_string('OLD TEXT', 'doc', metadata={'version': 1})
+    engine.index_string('OTHER TEXT', 'other')
+    with pytest.raises(IOError):
+        engine.index_chunks(failing_chunks(), 'doc', allow_overwrite=True, metadata={'version': 2})
+    # The old version is still indexed
+    assert engine.num_docs == 2
+    assert engine.num_terms == 4
+    assert engine._get_inverted_list('NEW') is None
+    assert [res.slug for res in engine.search('OLD')] == ['doc']
+    assert [res.slug for res in engine.search('TEXT', filter={'version': 1})] == ['doc']
+    if store_offsets:
+        assert engine.highlight(SearchResult('doc', 0), 'OLD').text == 'OLD TEXT'
+    # Overwriting succeeds once the chunks can be read
+    engine.index_chunks(iter(['NEW ', 'TEXT']), 'doc', allow_overwrite=True, metadata={'version': 2})
+    assert engine.num_docs == 2
+    assert engine.num_terms == 4
+    assert engine.search('OLD') == []
+    assert [res.slug for res in engine.search('TEXT', filter={'version': 2})] == ['doc']
@@ -0,0 +1,44 @@
+import random
+import typing
+from stefansearch.tokenizing.alphanumeric_tokenizer import AlphanumericTokenizer
+from stefansearch.tokenizing.unicode_tokenizer import UnicodeTokenizer
+"""Test cases for the tokenizers."""
+
+
+def reference_tokenize(string: str, lowercase: bool) -> typing.List[str]:
+    """The original character-by-character implementation of `AlphanumericTokenizer`."""
+    tokens = []
+    token_start = None
+    for i, char in enumerate(string + ' '):
+        is_tokenizable = 'a' <= char <= 'z' or 'A' <= char <= 'Z' or '0' <= char <= '9'
+        if is_tokenizable and token_start is None:
+            token_start = i
+        elif not is_tokenizable and token_start is not None:
+            token = string[token_start:i]
+            tokens.append(token.lower() if lowercase else token)
+            token_start = None
+    return tokens
+
+
+def test_same_tokens_as_reference():
+    rng = random.Random(4472)
+    alphabet = 'abcXYZ019 _-\'’\n\téÉßİK'
+    for _ in range(500):
+        string = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        for lowercase in (False, True):
+            tokenizer = AlphanumericTokenizer(lowercase=lowercase)
+            assert list(tokenizer.tokenize_string(string)) == reference_tokenize(string, lowercase)
+            assert [t for t, _, _ in tokenizer.tokenize_spans(string)] == reference_tokenize(string, lowercase)
+
+
+def test_spans():
+    string = 'Shall I compare thee to a summer’s day?'
+    for token, start, end in AlphanumericTokenizer().tokenize_spans(string):
+        assert string[start:end] == token
+
+
+def test_unicode_tokenizer():
+    tokenizer = UnicodeTokenizer(lowercase=True)
+    assert list(tokenizer.tokenize_string('Café au lait, STRAßE_42 naïve')) == \
+        ['café', 'au', 'lait', 'straße', '42', 'naïve']
+    assert list(AlphanumericTokenizer().tokenize_string('Café')) == ['Caf']
@@ -0,0 +1,96 @@
+import pytest
+from stefansearch.engine.lazy_index import LazyIndex
+from stefansearch.engine.query_log import QueryLog
+from stefansearch.engine.search_engine import SearchEngine
+from stefansearch.scoring.bm25 import Bm25Scorer
+from util import create_engine
+"""Test cases for the query log, lazy loading, and warmup."""
+
+
+@pytest.fixture
+def engine() -> SearchEngine:
+    engine = create_engine(query_log_size=100)
+    engine.index_string('APPLE BANANA APPLE', '1')
+    engine.index_string('BANANA CARROT', '2')
+    engine.index_string('CARROT DATE', '3')
+    engine.index_string('ELDERBERRY FIG', '4')
+    engine.commit()
+    return engine
+
+
+def test_query_log():
+    query_log = QueryLog(max_entries=3)
+    for query in ['a b', 'b', 'a b', 'c']:
+        query_log.record(query, query.split())
+    # The first query has rolled out of the log
+    assert len(query_log) == 3
+    assert query_log.top_queries() == [('b', 1), ('a b', 1), ('c', 1)]
+    assert query_log.top_terms(1) == [('b', 2)]
+    assert QueryLog.from_json(query_log.to_json()).to_json() == query_log.to_json()
+
+
+def test_query_log_persistence(engine):
+    engine.search('APPLE BANANA')
+    engine.search('BANANA')
+    assert engine.query_log.top_terms() == [('BANANA', 2), ('APPLE', 1)]
+    engine.commit()
+    assert engine.query_log_path.exists()
+    # The log is replaced atomically: no temporary file is left behind
+    assert not engine.query_log_path.with_name(engine.query_log_path.name + '.tmp').exists()
+    reopened = SearchEngine(engine.filepath, query_log_size=100)
+    assert reopened.query_log.top_queries() == [('APPLE BANANA', 1), ('BANANA', 1)]
+    assert SearchEngine(engine.filepath).query_log is None
+    with pytest.raises(ValueError):
+        SearchEngine(engine.filepath).save_query_log()
+
+
+@pytest.mark.parametrize('scorer', [None, Bm25Scorer()], ids=['ql', 'bm25'])
+def test_lazy_load(engine, scorer):
+    eager = SearchEngine(engine.filepath, scorer=scorer)
+    lazy = SearchEngine(engine.filepath, scorer=scorer, lazy_load=True)
+    assert isinstance(lazy._index, LazyIndex)
+    assert lazy._index.num_decoded() == 0
+    assert lazy.num_terms == eager.num_terms
+    assert lazy.search('CARROT DATE') == eager.search('CARROT DATE')
+    assert lazy._index.num_decoded() == 2
+    assert lazy.memory_report().top_terms
+    assert lazy.metrics.get('stefansearch_vocabulary_size').value == 6
+    assert lazy._index.num_decoded() == 2
+    # Undecoded InvertedLists are written back as-is
+    lazy.commit()
+    assert SearchEngine(engine.filepath, scorer=scorer).search('APPLE FIG') == eager.search('APPLE FIG')
+    for other in [eager, lazy]:
+        other.index_string('APPLE GRAPE', '5')
+        other.remove_document('2')
+    assert lazy.search('APPLE BANANA GRAPE') == eager.search('APPLE BANANA GRAPE')
+    with pytest.raises(ValueError):
+        SearchEngine(engine.filepath, lazy_load=True, dense_threshold=0.5)
+
+
+def test_warmup(engine):
+    for _ in range(3):
+        engine.search('CARROT')
+    engine.search('APPLE DATE')
+    engine.search('UNKNOWN')
+    engine.commit()
+    lazy = SearchEngine(engine.filepath, query_log_size=100, lazy_load=True)
+    stats = lazy.start_warmup(num_terms=2).result(timeout=10)
+    assert stats.terms_warmed == 2
+    assert stats.queries_run == 3
+    assert stats.bytes_loaded > 0
+    assert not stats.budget_exhausted
+    assert lazy._index.is_decoded(lazy._term_dict.get_id('CARROT'))
+    # Re-run queries are not recorded
+    assert len(lazy.query_log) == 5
+
+
+def test_warmup_budget(engine):
+    engine.search('APPLE BANANA CARROT')
+    engine.commit()
+    lazy = SearchEngine(engine.filepath, query_log_size=100, lazy_load=True)
+    stats = lazy.warmup(budget_bytes=1)
+    assert stats.budget_exhausted
+    assert stats.terms_warmed == 1
+    assert stats.queries_run == 0
+    with pytest.raises(ValueError):
+        create_engine().warmup()
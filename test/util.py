@@ -8,9 +8,13 @@ from stefansearch.engine.search_engine import SearchEngine
 TESTDATA_PATH = pathlib.Path(__file__).parent / 'TestData'
 
 
-def create_engine() -> SearchEngine:
-    """Create search engine on a temp file."""
+def create_engine(**kwargs) -> SearchEngine:
+    """
+    Create search engine on a temp file.
+
+    Any keyword arguments are passed through to the `SearchEngine`.
+    """
     temp_fd, temp_path = tempfile.mkstemp(suffix='.json')
     with open(temp_path, 'w') as f:
         f.write('{"doc_data": {}, "index": []}')
-    return SearchEngine(pathlib.Path(temp_path))
+    return SearchEngine(pathlib.Path(temp_path), **kwargs)